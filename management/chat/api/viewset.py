@@ -1,24 +1,37 @@
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 from rest_framework import authentication, generics, permissions, status
 from rest_framework.decorators import APIView
 from rest_framework.response import Response
 
-from chat.models import ChatGroup, GroupMessage
+from chat import uploads
+from chat.archive import read_history
+from chat.models import ChatGroup, GroupMessage, ReadCursor, UploadSession
 from chat.serializers import (
     ChatSerializers,
     FileAttachmentSerializers,
     GroupSerializers,
     ImageAttachmentSerializer,
+    RoomListSerializer,
+    UploadSessionSerializer,
 )
+from chat.tasks import generate_image_derivatives
+from chat.validators import AttachmentSniffingHandler
+from core.constants import UploadKind
 
 
 class ChatMessageView(generics.ListAPIView):
     """
     API endpoint to retrieve chat groups and their messages.
 
+    Only messages still in the hot table are listed; messages moved to the
+    archive are read through GET /chat/groups/<group_name>/history/.
+
     Request Method: GET /chat/messages/
 
     Responses:
-    - 200 OK: Returns a list of chat groups and their messages.
+    - 200 OK: Returns a list of chat groups and their recent messages.
     - 401 Unauthorized: Authentication failed.
     """
 
@@ -161,7 +174,137 @@ class GroupNameUpdate(generics.UpdateAPIView):
 group_update = GroupNameUpdate.as_view()
 
 
-class FileAttachment(APIView):
+class GroupListView(generics.ListAPIView):
+    """
+    API endpoint to list chat groups with their latest message and the
+    requesting user's unread count.
+
+        Request Method: GET /chat/groups/
+
+        Responses:
+        - 200 OK: Returns the list of chat groups.
+        - 401 Unauthorized: Authentication failed.
+    """
+
+    # groups that never had a message sort last, not first as NULLs do
+    queryset = ChatGroup.objects.order_by(F("last_message_at").desc(nulls_last=True))
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = RoomListSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["read_counts"] = dict(
+            ReadCursor.objects.filter(user=self.request.user).values_list(
+                "group_id", "read_count"
+            )
+        )
+        return context
+
+
+group_list = GroupListView.as_view()
+
+
+class GroupMarkRead(APIView):
+    """
+    API endpoint to move the requesting user's read cursor to the latest
+    message of a chat group.
+
+        Request Method: POST /chat/groups/str:<group_name>/read/
+
+        Responses:
+        - 200 OK: Read cursor updated.
+        - 401 Unauthorized: Authentication failed.
+        - 404 Not Found: Chat group with the specified group_name does not exist.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, group_name, format=None):
+        group = get_object_or_404(ChatGroup, group_name=group_name)
+        cursor = ReadCursor.mark_read(request.user, group)
+        return Response(
+            {"group_name": group.group_name, "read_count": cursor.read_count},
+            status=status.HTTP_200_OK,
+        )
+
+
+group_mark_read = GroupMarkRead.as_view()
+
+
+class GroupHistoryView(APIView):
+    """
+    API endpoint to page backwards through a chat group's history, including
+    messages that were moved to the archive.
+
+        Request Method: GET /chat/groups/str:<group_name>/history/?before=<iso-datetime>&limit=<int>
+
+        Responses:
+        - 200 OK: Returns up to `limit` messages older than `before`, newest first.
+        - 400 Bad Request: Invalid `before` or `limit`.
+        - 401 Unauthorized: Authentication failed.
+        - 404 Not Found: Chat group with the specified group_name does not exist.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 200
+
+    def get(self, request, group_name, format=None):
+        group = get_object_or_404(ChatGroup, group_name=group_name)
+        before = request.query_params.get("before")
+        try:
+            before = parse_datetime(before) if before else None
+            limit = min(int(request.query_params.get("limit", 50)), self.max_limit)
+        except (TypeError, ValueError):
+            before, limit = None, 0
+        if limit <= 0 or (request.query_params.get("before") and before is None):
+            return Response(
+                {"error": "Invalid `before` or `limit` parameter."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        messages = read_history(group, before=before, limit=limit)
+        return Response(
+            {"group_name": group.group_name, "messages": messages},
+            status=status.HTTP_200_OK,
+        )
+
+
+group_history = GroupHistoryView.as_view()
+
+
+class SniffedUploadMixin:
+    """
+    Installs an AttachmentSniffingHandler before the request body is parsed,
+    so a wrong-type or oversized upload is rejected within its first chunk,
+    and saves uploads whose content is already stored without re-uploading.
+    """
+
+    upload_field = None
+    upload_kind = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.sniffer = AttachmentSniffingHandler(
+            self.upload_field, self.upload_kind, request
+        )
+        request.upload_handlers.insert(0, self.sniffer)
+        return super().initialize_request(request, *args, **kwargs)
+
+    def sniffer_errors(self):
+        if self.sniffer.error:
+            return {self.upload_field: [self.sniffer.error]}
+        return None
+
+    def save_deduplicated(self, serializer):
+        return uploads.save_deduplicated(
+            serializer,
+            self.request.user,
+            self.upload_kind,
+            self.sniffer.content_hash,
+            self.sniffer.received,
+        )
+
+
+class FileAttachment(SniffedUploadMixin, APIView):
     """
     API endpoint to upload the file such as `.pdf`.
 
@@ -174,6 +317,8 @@ class FileAttachment(APIView):
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    upload_field = "file"
+    upload_kind = UploadKind.FILE
 
     def post(self, request, format=None):
         client = request.user
@@ -183,8 +328,16 @@ class FileAttachment(APIView):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
         serializer = FileAttachmentSerializers(data=request.data)
+        if self.sniffer_errors():
+            return Response(
+                {
+                    "failed": "Unable to upload file",
+                    "detail_error": self.sniffer_errors(),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            self.save_deduplicated(serializer)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(
             {"failed": "Unable to upload file", "detail_error": serializer.errors},
@@ -195,7 +348,7 @@ class FileAttachment(APIView):
 upload_file = FileAttachment.as_view()
 
 
-class ImageAttachment(APIView):
+class ImageAttachment(SniffedUploadMixin, APIView):
     """
     API endpoint to upload the image file.
 
@@ -208,6 +361,8 @@ class ImageAttachment(APIView):
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    upload_field = "image"
+    upload_kind = UploadKind.IMAGE
 
     def post(self, request, format=None):
         client = request.user
@@ -217,8 +372,17 @@ class ImageAttachment(APIView):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
         serializer = ImageAttachmentSerializer(data=request.data)
+        if self.sniffer_errors():
+            return Response(
+                {
+                    "failed": "Unable to upload image",
+                    "detail_error": self.sniffer_errors(),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            self.save_deduplicated(serializer)
+            generate_image_derivatives.delay(serializer.instance.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(
             {"failed": "Unable to upload image", "detail_error": serializer.errors},
@@ -227,3 +391,168 @@ class ImageAttachment(APIView):
 
 
 upload_image = ImageAttachment.as_view()
+
+
+class UploadSessionCreate(APIView):
+    """
+    API endpoint to open an upload session for a file or image attachment.
+
+        Request Method: POST /chat/uploads/
+
+        Request Body:
+        - kind (str): `file` or `image`.
+        - file_name (str): Name of the file, used for extension checks.
+        - size (int): Size of the file in bytes.
+        - sha256 (str, optional): Content hash; if you already uploaded the
+          same content, the attachment is recorded without any upload.
+
+        Responses:
+        - 200 OK: Content already uploaded, returns the new attachment.
+        - 201 Created: Returns the session token, the resume offset and the
+          signed parameters for uploading straight to storage.
+        - 400 Bad Request: Invalid kind, extension or size.
+        - 401 Unauthorized: Authentication failed.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, format=None):
+        kind = request.data.get("kind")
+        content_hash = request.data.get("sha256")
+        if content_hash and kind in UploadKind.values:
+            attachment = uploads.reuse_own_upload(
+                request.user, kind, request.data.get("file_name", ""), content_hash
+            )
+            if attachment:
+                return Response(
+                    self.attachment_data(kind, attachment), status=status.HTTP_200_OK
+                )
+
+        try:
+            session = uploads.open_session(
+                request.user,
+                kind,
+                request.data.get("file_name", ""),
+                int(request.data.get("size", 0)),
+            )
+        except (TypeError, ValueError, uploads.UploadError) as e:
+            return Response(
+                {"failed": "Unable to open upload session", "detail_error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = UploadSessionSerializer(session).data
+        data["direct_upload"] = uploads.get_upload_storage().direct_upload(session)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def attachment_data(kind, attachment):
+        if kind == UploadKind.IMAGE:
+            return ImageAttachmentSerializer(attachment).data
+        return FileAttachmentSerializers(attachment).data
+
+
+upload_session_create = UploadSessionCreate.as_view()
+
+
+class UploadSessionDetail(APIView):
+    """
+    API endpoint to read the state of an upload session, e.g. the offset to
+    resume a chunked upload from.
+
+        Request Method: GET /chat/uploads/uuid:<token>/
+
+        Responses:
+        - 200 OK: Returns the session state.
+        - 401 Unauthorized: Authentication failed.
+        - 404 Not Found: Session does not exist or belongs to another user.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, token, format=None):
+        session = get_object_or_404(UploadSession, token=token, user=request.user)
+        return Response(
+            UploadSessionSerializer(session).data, status=status.HTTP_200_OK
+        )
+
+
+upload_session_detail = UploadSessionDetail.as_view()
+
+
+class UploadSessionChunk(APIView):
+    """
+    API endpoint to append a chunk of raw bytes to an upload session. The
+    body is streamed to disk and never held in memory as a whole.
+
+        Request Method: PUT /chat/uploads/uuid:<token>/chunk/?offset=<int>
+
+        Request Body: raw bytes (`application/octet-stream`).
+
+        Responses:
+        - 200 OK: Chunk stored, returns the new resume offset.
+        - 400 Bad Request: Empty body, wrong offset, expired session, too
+          many bytes or another request in progress for the session.
+        - 401 Unauthorized: Authentication failed.
+        - 404 Not Found: Session does not exist or belongs to another user.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def put(self, request, token, format=None):
+        session = get_object_or_404(UploadSession, token=token, user=request.user)
+        try:
+            offset = int(request.query_params.get("offset", 0))
+            # DRF gives no stream at all for an empty body
+            if request.stream is None:
+                raise uploads.UploadError("Chunk body is empty.")
+            session = uploads.write_chunk(session, offset, request.stream)
+        except (ValueError, uploads.UploadError) as e:
+            return Response(
+                {"failed": "Unable to store chunk", "detail_error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            UploadSessionSerializer(session).data, status=status.HTTP_200_OK
+        )
+
+
+upload_session_chunk = UploadSessionChunk.as_view()
+
+
+class UploadSessionComplete(APIView):
+    """
+    API endpoint to finish an upload session and record the attachment.
+
+        Request Method: POST /chat/uploads/uuid:<token>/complete/
+
+        Request Body (direct uploads only): the `public_id`, `version`,
+        `signature`, `resource_type` and `format` returned by storage.
+
+        Responses:
+        - 200 OK: Returns the created attachment.
+        - 400 Bad Request: Upload incomplete, storage signature invalid or the
+          stored object does not match the declared size and type.
+        - 401 Unauthorized: Authentication failed.
+        - 404 Not Found: Session does not exist or belongs to another user.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, token, format=None):
+        session = get_object_or_404(UploadSession, token=token, user=request.user)
+        try:
+            attachment = uploads.complete_session(session, request.data)
+        except uploads.UploadError as e:
+            return Response(
+                {"failed": "Unable to complete upload", "detail_error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if session.kind == UploadKind.IMAGE:
+            generate_image_derivatives.delay(attachment.id)
+        return Response(
+            UploadSessionCreate.attachment_data(session.kind, attachment),
+            status=status.HTTP_200_OK,
+        )
+
+
+upload_session_complete = UploadSessionComplete.as_view()
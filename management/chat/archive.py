@@ -0,0 +1,196 @@
+"""
+Hot/cold storage for chat history.
+
+GroupMessage only keeps the recent window of a conversation. Older messages
+are moved in bulk into MessageArchive as compressed JSON lines, and
+`read_history` reads through both tables so callers never need to know where
+a message lives.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import json
+import logging
+import zlib
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from chat.models import GroupMessage, MessageArchive
+from core.dumps import CHAT_ARCHIVE_BATCH_SIZE, CHAT_HOT_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ("id", "group_id", "author_id", "parent_id", "body", "tag", "created")
+
+
+def _to_record(row):
+    return {
+        "id": row["id"],
+        "group": row["group_id"],
+        "author": row["author_id"],
+        "parent": row["parent_id"],
+        "body": row["body"],
+        "tag": row["tag"],
+        "created": row["created"].isoformat(),
+    }
+
+
+def compress_records(records):
+    lines = "\n".join(json.dumps(record, separators=(",", ":")) for record in records)
+    return zlib.compress(lines.encode("utf-8"))
+
+
+def decompress_records(payload):
+    data = zlib.decompress(bytes(payload)).decode("utf-8")
+    return [json.loads(line) for line in data.splitlines() if line]
+
+
+def _protected_ids(cutoff):
+    """
+    Ids of old messages that still have a hot descendant.
+
+    Deleting a parent cascades to its replies, so every ancestor of a message
+    newer than the cutoff has to stay in the hot table.
+    """
+    protected = set()
+    frontier = set(
+        GroupMessage.objects.filter(
+            created__gte=cutoff, parent__isnull=False
+        ).values_list("parent_id", flat=True)
+    )
+    while frontier:
+        protected |= frontier
+        frontier = (
+            set(
+                GroupMessage.objects.filter(
+                    id__in=frontier, parent__isnull=False
+                ).values_list("parent_id", flat=True)
+            )
+            - protected
+        )
+    return protected
+
+
+def _with_replies(rows):
+    """
+    Add the whole reply subtree of every message in `rows`, locked, sorted
+    by group and creation time.
+
+    Deleting a message cascades to its replies, so a thread must move to
+    the archive in a single batch. Unprotected messages only have old
+    descendants, so the subtree is all due for archiving anyway.
+    """
+    seen = {row["id"] for row in rows}
+    frontier = seen
+    while frontier:
+        replies = list(
+            GroupMessage.objects.select_for_update()
+            .filter(parent_id__in=frontier)
+            .exclude(id__in=seen)
+            .values(*ARCHIVE_FIELDS)
+        )
+        rows += replies
+        frontier = {row["id"] for row in replies}
+        seen |= frontier
+    return sorted(rows, key=lambda row: (row["group_id"], row["created"], row["id"]))
+
+
+def archive_messages(older_than_days=CHAT_HOT_RETENTION_DAYS, batch_size=None):
+    """
+    Move messages older than `older_than_days` into MessageArchive.
+
+    Work is done in batches of `batch_size` messages, grown by the replies
+    of the messages picked so threads are never split; each batch is written
+    as one archive chunk per group and deleted from the hot table inside the
+    same transaction. Returns the number of archived messages.
+    """
+    batch_size = batch_size or CHAT_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    protected = _protected_ids(cutoff)
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                GroupMessage.objects.select_for_update()
+                .filter(created__lt=cutoff)
+                .exclude(id__in=protected)
+                .order_by("group_id", "created")
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            selected = len(rows)
+            rows = _with_replies(rows)
+
+            by_group = {}
+            for row in rows:
+                by_group.setdefault(row["group_id"], []).append(row)
+
+            MessageArchive.objects.bulk_create(
+                MessageArchive(
+                    group_id=group_id,
+                    first_created=group_rows[0]["created"],
+                    last_created=group_rows[-1]["created"],
+                    message_count=len(group_rows),
+                    payload=compress_records(_to_record(row) for row in group_rows),
+                )
+                for group_id, group_rows in by_group.items()
+            )
+            GroupMessage.objects.filter(id__in=[row["id"] for row in rows]).delete()
+            archived += len(rows)
+
+        if selected < batch_size:
+            break
+
+    logger.info(f"Archived {archived} chat messages older than {cutoff}.")
+    return archived
+
+
+def _newest_first(record):
+    return parse_datetime(record["created"]), record["id"]
+
+
+def read_history(group, before=None, limit=50):
+    """
+    Return up to `limit` messages of `group` created before `before`, newest
+    first, reading from the hot table and falling through to the archive.
+
+    Chunks that pulled in a thread's replies overlap in time with the chunks
+    around them, and ancestors of hot replies stay hot while older messages
+    are archived, so records are merged by creation time across the hot
+    table and every chunk that can still reach into the page.
+    """
+    hot = GroupMessage.objects.filter(group=group)
+    if before:
+        hot = hot.filter(created__lt=before)
+    messages = [
+        _to_record(row)
+        for row in hot.order_by("-created").values(*ARCHIVE_FIELDS)[:limit]
+    ]
+
+    chunks = MessageArchive.objects.filter(group=group)
+    if before:
+        chunks = chunks.filter(first_created__lt=before)
+    if len(messages) >= limit:
+        # only chunks reaching past the oldest hot message can change the page
+        chunks = chunks.filter(last_created__gte=messages[-1]["created"])
+
+    for chunk in chunks.order_by("-last_created").iterator():
+        if (
+            len(messages) >= limit
+            and parse_datetime(messages[-1]["created"]) > chunk.last_created
+        ):
+            # this and every later chunk is older than the whole page
+            break
+        for record in decompress_records(chunk.payload):
+            if before and parse_datetime(record["created"]) >= before:
+                continue
+            messages.append(record)
+        messages.sort(key=_newest_first, reverse=True)
+        del messages[limit:]
+    return messages
@@ -1,10 +1,15 @@
 import json
+import time
 
-from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 
+from core import ticket_events
+from core.constants import Status
+from core.ticket_queue import tier_for
+
 from .models import ChatGroup, GroupMessage
 
 User = get_user_model()
@@ -22,7 +27,7 @@ class ChatroomConsumer(AsyncWebsocketConsumer):
             return
 
         self.chatroom_name = self.scope["url_route"]["kwargs"]["chatroom_name"]
-        self.chatroom = await sync_to_async(get_object_or_404, thread_sensitive=True)(
+        self.chatroom = await database_sync_to_async(get_object_or_404)(
             ChatGroup, group_name=self.chatroom_name
         )
 
@@ -33,8 +38,9 @@ class ChatroomConsumer(AsyncWebsocketConsumer):
         text_data_json = json.loads(text_data)
         body = text_data_json["body"]
 
-        # Create message asynchronously
-        message = await sync_to_async(GroupMessage.objects.create)(
+        # Create message asynchronously; database_sync_to_async recycles
+        # connections past CONN_MAX_AGE like a request would
+        message = await database_sync_to_async(GroupMessage.objects.create)(
             body=body, author=self.user, group=self.chatroom
         )
 
@@ -50,3 +56,107 @@ class ChatroomConsumer(AsyncWebsocketConsumer):
         # Remove user from the chat group on disconnect
         await self.channel_layer.group_discard(self.chatroom_name, self.channel_name)
         print(f"User {self.user.username} has disconnected from {self.chatroom_name}.")
+
+
+class TicketEventsConsumer(AsyncWebsocketConsumer):
+    """
+    Pushes a ticket's assignment, status and queue position to the ticket's
+    customer and agent, instead of them polling the assign endpoint.
+
+    The current state is sent on connect; afterwards every change arrives
+    through the ticket's group, and queue positions are shifted locally from
+    the queue-wide joined/left announcements of tickets in the same tier.
+    """
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated:
+            await self.close(code=403)
+            return
+
+        self.ticket_id = self.scope["url_route"]["kwargs"]["ticket_id"]
+        self.group_name = ticket_events.ticket_group(self.ticket_id)
+        self.in_queue = False
+        # join before taking the snapshot so no change can slip in between
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.channel_layer.group_add(ticket_events.QUEUE_GROUP, self.channel_name)
+        self.in_queue = True
+
+        self.state = await database_sync_to_async(ticket_events.snapshot)(
+            self.ticket_id, self.user
+        )
+        if self.state is None:
+            await self.close(code=4404)
+            return
+
+        await self.accept()
+        await self.sync_queue_membership()
+        await self.send(text_data=json.dumps(self.public_state()))
+
+    def public_state(self):
+        return {
+            key: value
+            for key, value in self.state.items()
+            if key not in ("created_at", "is_paid")
+        }
+
+    async def sync_queue_membership(self):
+        """Only waiting tickets need the queue-wide announcements."""
+        waiting = self.state["status"] == Status.WAITING
+        if waiting and not self.in_queue:
+            await self.channel_layer.group_add(
+                ticket_events.QUEUE_GROUP, self.channel_name
+            )
+        elif self.in_queue and not waiting:
+            await self.channel_layer.group_discard(
+                ticket_events.QUEUE_GROUP, self.channel_name
+            )
+        self.in_queue = waiting
+
+    async def ticket_event(self, message):
+        self.state.update(message["event"])
+        await self.sync_queue_membership()
+        await self.send(text_data=json.dumps(self.public_state()))
+
+    def same_tier(self, message):
+        now = time.time()
+        return tier_for(message["is_paid"], now - message["created_at"]) == tier_for(
+            self.state["is_paid"], now - self.state["created_at"]
+        )
+
+    async def shift_position(self, message, delta):
+        if (
+            self.state["status"] != Status.WAITING
+            or message["ticket_id"] == self.ticket_id
+            or message["created_at"] >= self.state["created_at"]
+            or not self.same_tier(message)
+        ):
+            return
+        self.state["queue_position"] = max(1, self.state["queue_position"] + delta)
+        await self.send(text_data=json.dumps(self.public_state()))
+
+    async def queue_left(self, message):
+        await self.shift_position(message, -1)
+
+    async def queue_joined(self, message):
+        await self.shift_position(message, 1)
+
+    async def queue_refresh(self, message):
+        state = await database_sync_to_async(ticket_events.snapshot)(
+            self.ticket_id, self.user
+        )
+        if state is None:
+            await self.close(code=4404)
+            return
+        self.state = state
+        await self.sync_queue_membership()
+        await self.send(text_data=json.dumps(self.public_state()))
+
+    async def disconnect(self, close_code):
+        if not getattr(self, "group_name", None):
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.in_queue:
+            await self.channel_layer.group_discard(
+                ticket_events.QUEUE_GROUP, self.channel_name
+            )
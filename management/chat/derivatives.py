@@ -0,0 +1,93 @@
+"""
+Thumbnail and WebP derivatives for ImageAttachment.
+
+Derivatives are rendered with Pillow from the stored original and saved
+through the configured upload storage. Images that share a StoredObject,
+i.e. identical content, reuse the derivative URLs of the first one
+processed instead of being downloaded and rendered again.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from chat.models import ImageAttachment
+from chat.uploads import get_upload_storage
+from core.dumps import ImageThumbnailSize, ImageWebpMaxSize, ImageWebpQuality
+
+logger = logging.getLogger(__name__)
+
+
+def _resize(data, max_side):
+    image = Image.open(BytesIO(data))
+    # let the JPEG decoder skip detail we are about to throw away
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    return image
+
+
+def render_derivatives(data):
+    """
+    Return {"thumbnail": bytes, "webp": bytes} rendered from the original
+    image bytes.
+    """
+    thumbnail = BytesIO()
+    _resize(data, ImageThumbnailSize).save(
+        thumbnail, format="WEBP", quality=ImageWebpQuality
+    )
+    webp = BytesIO()
+    _resize(data, ImageWebpMaxSize).save(webp, format="WEBP", quality=ImageWebpQuality)
+    return {"thumbnail": thumbnail.getvalue(), "webp": webp.getvalue()}
+
+
+def generate_derivatives(attachment):
+    """
+    Fill `thumbnail_url` and `webp_url` for an attachment. Returns True when
+    new derivatives were rendered, False when they were reused from an
+    attachment sharing the same StoredObject.
+    """
+    storage = get_upload_storage()
+    stored = attachment.stored_object
+    existing = None
+    if stored:
+        key = stored.content_hash
+        existing = (
+            ImageAttachment.objects.filter(stored_object=stored)
+            .exclude(thumbnail_url="")
+            .exclude(pk=attachment.pk)
+            .values("thumbnail_url", "webp_url")
+            .first()
+        )
+    else:
+        # not deduplicated, e.g. a direct upload: render for this image only
+        key = f"image{attachment.pk}"
+
+    rendered = existing is None
+    if rendered:
+        derivatives = render_derivatives(storage.read(attachment.image))
+        existing = {
+            f"{name}_url": storage.save_derivative(f"{key}_{name}.webp", body)
+            for name, body in derivatives.items()
+        }
+
+    ImageAttachment.objects.filter(pk=attachment.pk).update(**existing)
+    logger.info(
+        f"Derivatives for image {attachment.pk} "
+        f"{'rendered' if rendered else 'reused'} ({key[:12]})."
+    )
+    return rendered
+
+
+def skip_derivatives(attachment, reason):
+    """Record why `attachment` keeps serving its original only."""
+    ImageAttachment.objects.filter(pk=attachment.pk).update(
+        derivative_error=reason[:255]
+    )
+    logger.warning(f"No derivatives for image {attachment.pk}: {reason}")
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_group_counters(apps, schema_editor):
+    ChatGroup = apps.get_model("chat", "ChatGroup")
+    GroupMessage = apps.get_model("chat", "GroupMessage")
+    for group in ChatGroup.objects.all():
+        messages = GroupMessage.objects.filter(group=group)
+        latest = messages.order_by("-created").first()
+        group.message_count = messages.count()
+        if latest:
+            group.last_message_at = latest.created
+            group.last_message_preview = latest.body[:100]
+        group.save(
+            update_fields=["message_count", "last_message_at", "last_message_preview"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_alter_fileattachment_file_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatgroup",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="chatgroup",
+            name="last_message_preview",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="chatgroup",
+            name="message_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="ReadCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("read_count", models.PositiveIntegerField(default=0)),
+                ("last_read_at", models.DateTimeField(auto_now=True)),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="read_cursors",
+                        to="chat.chatgroup",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="read_cursors",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "group")},
+            },
+        ),
+        migrations.RunPython(backfill_group_counters, migrations.RunPython.noop),
+    ]
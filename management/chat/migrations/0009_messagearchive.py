@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_chatgroup_counters_readcursor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("first_created", models.DateTimeField()),
+                ("last_created", models.DateTimeField()),
+                ("message_count", models.PositiveIntegerField(default=0)),
+                ("payload", models.BinaryField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archives",
+                        to="chat.chatgroup",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-last_created"],
+                "indexes": [
+                    models.Index(
+                        fields=["group", "-last_created"],
+                        name="chat_messag_group_i_5df7be_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+SEARCH_TRIGGER_SQL = """
+CREATE TRIGGER chat_groupmessage_search_vector_update
+BEFORE INSERT OR UPDATE OF body ON chat_groupmessage
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.english', body);
+
+UPDATE chat_groupmessage SET search_vector = to_tsvector('pg_catalog.english', body);
+"""
+
+DROP_SEARCH_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS chat_groupmessage_search_vector_update ON chat_groupmessage;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0009_messagearchive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="groupmessage",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="groupmessage",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="chat_groupm_search__f5bc46_gin"
+            ),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, DROP_SEARCH_TRIGGER_SQL),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0011_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="imageattachment",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="imageattachment",
+            name="thumbnail_url",
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="imageattachment",
+            name="webp_url",
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0013_storedobject"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="imageattachment",
+            name="derivative_error",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0014_imageattachment_derivative_error"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="imageattachment",
+            name="content_hash",
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0015_remove_imageattachment_content_hash"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="groupmessage",
+            index=models.Index(
+                fields=["group", "created"], name="chat_groupm_group_i_fe93b7_idx"
+            ),
+        ),
+    ]
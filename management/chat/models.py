@@ -1,12 +1,59 @@
+import uuid
+
 from cloudinary.models import CloudinaryField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Substr
 
-from core.constants import Reaction
+from core.constants import Reaction, UploadKind, UploadStatus
+from core.dumps import MESSAGE_PREVIEW_LENGTH
 from core.models import User
 
 
 class ChatGroup(models.Model):
     group_name = models.CharField(max_length=128, unique=True)
+    # Denormalized counters maintained from the message write path so room
+    # lists never have to aggregate over GroupMessage.
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(
+        max_length=MESSAGE_PREVIEW_LENGTH, blank=True
+    )
+
+    @classmethod
+    def record_message(cls, message):
+        """
+        Bump the counters of the message's group in a single UPDATE.
+        """
+        return cls.objects.filter(pk=message.group_id).update(
+            message_count=F("message_count") + 1,
+            last_message_at=message.created,
+            last_message_preview=message.body[:MESSAGE_PREVIEW_LENGTH],
+        )
+
+    @classmethod
+    def forget_message(cls, group_id, count=1):
+        """
+        Decrement the message counter of a group by `count`, never going below
+        zero, and point the last-message fields at the newest message left.
+        """
+        latest = GroupMessage.objects.filter(group_id=group_id).order_by(
+            "-created", "-id"
+        )[:1]
+        return cls.objects.filter(pk=group_id).update(
+            message_count=Greatest(F("message_count") - count, 0),
+            last_message_at=Subquery(latest.values("created")),
+            last_message_preview=Coalesce(
+                Subquery(
+                    latest.annotate(
+                        preview=Substr("body", 1, MESSAGE_PREVIEW_LENGTH)
+                    ).values("preview")
+                ),
+                Value(""),
+            ),
+        )
 
     def __str__(self):
         return self.group_name
@@ -28,14 +75,148 @@ class GroupMessage(models.Model):
     tag = models.CharField(max_length=50, blank=True)
     created = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
+    # Maintained by a database trigger, see migration 0010.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            # the archive scan walks old messages group by group
+            models.Index(fields=["group", "created"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        if is_new:
+            ChatGroup.record_message(self)
+
+    def delete(self, *args, **kwargs):
+        group_id = self.group_id
+        result = super().delete(*args, **kwargs)
+        # replies are deleted with their parent
+        ChatGroup.forget_message(group_id, result[1].get(self._meta.label, 1))
+        return result
 
     def __str__(self):
         return f"{self.author.username}: {self.body}"
 
 
+class MessageArchive(models.Model):
+    """
+    Cold storage for GroupMessage rows that aged out of the hot table.
+
+    Each row is one archived batch for a group: the messages are stored as
+    zlib-compressed JSON lines and the covered time range is kept in plain
+    columns so history reads can find the right chunks through an index.
+    """
+
+    group = models.ForeignKey(
+        ChatGroup, on_delete=models.CASCADE, related_name="archives"
+    )
+    first_created = models.DateTimeField()
+    last_created = models.DateTimeField()
+    message_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-last_created"]
+        indexes = [models.Index(fields=["group", "-last_created"])]
+
+    def __str__(self):
+        return f"{self.group.group_name}: {self.message_count} archived messages"
+
+
+class ReadCursor(models.Model):
+    """
+    Per-user read position inside a chat group.
+
+    `read_count` stores the group's `message_count` at the time the user last
+    read it, so unread counts are a subtraction instead of a COUNT(*).
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="read_cursors"
+    )
+    group = models.ForeignKey(
+        ChatGroup, on_delete=models.CASCADE, related_name="read_cursors"
+    )
+    read_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "group")
+
+    @classmethod
+    def mark_read(cls, user, group):
+        cursor, _ = cls.objects.update_or_create(
+            user=user, group=group, defaults={"read_count": group.message_count}
+        )
+        return cursor
+
+    def __str__(self):
+        return f"{self.user.username} read {self.group.group_name}"
+
+
+class StoredObject(models.Model):
+    """
+    One stored attachment blob, addressed by the SHA-256 of its content.
+
+    Attachments with identical content share a StoredObject; `ref_count`
+    tracks how many attachments point at it so the blob is only removed
+    from storage when the last one is deleted.
+    """
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=10, choices=UploadKind.choices)
+    resource = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def acquire(cls, content_hash):
+        """
+        Take a reference on the object with `content_hash`, or return None.
+        """
+        if not cls.objects.filter(content_hash=content_hash).update(
+            ref_count=F("ref_count") + 1
+        ):
+            return None
+        return cls.objects.get(content_hash=content_hash)
+
+    @classmethod
+    def register(cls, content_hash, kind, resource, size):
+        """
+        Record a freshly stored blob and take the first reference on it.
+        Returns (stored_object, created); when another upload registered the
+        same content first, its object is referenced instead.
+        """
+        stored, created = cls.objects.get_or_create(
+            content_hash=content_hash,
+            defaults={"kind": kind, "resource": resource, "size": size, "ref_count": 1},
+        )
+        if not created:
+            stored = cls.acquire(content_hash)
+        return stored, created
+
+    def release(self):
+        """
+        Drop one reference. Returns True when this was the last reference
+        and the row was deleted.
+        """
+        StoredObject.objects.filter(pk=self.pk).update(
+            ref_count=Greatest(F("ref_count") - 1, 0)
+        )
+        deleted, _ = StoredObject.objects.filter(pk=self.pk, ref_count=0).delete()
+        return bool(deleted)
+
+    def __str__(self):
+        return f"{self.kind} {self.content_hash[:12]} ({self.ref_count} refs)"
+
+
 class ImageAttachment(models.Model):
     user = models.ForeignKey(
         User,
@@ -45,6 +226,18 @@ class ImageAttachment(models.Model):
         blank=True,
     )
     image = CloudinaryField("image")
+    stored_object = models.ForeignKey(
+        StoredObject,
+        on_delete=models.PROTECT,
+        related_name="images",
+        null=True,
+        blank=True,
+    )
+    # Filled in by chat.tasks.generate_image_derivatives after upload.
+    thumbnail_url = models.CharField(max_length=500, blank=True)
+    webp_url = models.CharField(max_length=500, blank=True)
+    # why no derivatives could be rendered, the original is served instead
+    derivative_error = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -61,6 +254,13 @@ class FileAttachment(models.Model):
         null=True,
     )
     file = CloudinaryField("file")
+    stored_object = models.ForeignKey(
+        StoredObject,
+        on_delete=models.PROTECT,
+        related_name="files",
+        null=True,
+        blank=True,
+    )
     file_name = models.CharField(max_length=30, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -69,6 +269,37 @@ class FileAttachment(models.Model):
         return f"{self.user.username} uploaded {self.file_name}"
 
 
+class UploadSession(models.Model):
+    """
+    Upload ticket issued before any attachment bytes are sent.
+
+    The client either uploads straight to storage with the signed parameters
+    returned for the session, or streams the file to the server in chunks.
+    `bytes_received` is the resume offset for the chunked path.
+    """
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    kind = models.CharField(max_length=10, choices=UploadKind.choices)
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    bytes_received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=20, choices=UploadStatus.choices, default=UploadStatus.PENDING
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def is_complete(self):
+        return self.bytes_received == self.size
+
+    def __str__(self):
+        return f"{self.user.username} uploading {self.file_name} ({self.status})"
+
+
 class Reaction(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="reactions", blank=True, null=True
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from .consumer import ChatroomConsumer
+from .consumer import ChatroomConsumer, TicketEventsConsumer
 
 websocket_urlpatterns = [
     path("/ws/chatroom/<str:chatroom_name>/", ChatroomConsumer.as_asgi()),
+    path("ws/tickets/<str:ticket_id>/", TicketEventsConsumer.as_asgi()),
 ]
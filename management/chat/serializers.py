@@ -1,6 +1,14 @@
 from rest_framework import serializers
 
-from chat.models import ChatGroup, FileAttachment, GroupMessage, ImageAttachment
+from chat.models import (
+    ChatGroup,
+    FileAttachment,
+    GroupMessage,
+    ImageAttachment,
+    UploadSession,
+)
+from chat.validators import check_header, read_header
+from core.constants import UploadKind
 from core.dumps import (
     FileAttachmentExt,
     FileAttachmentSize,
@@ -36,15 +44,49 @@ class ChatSerializers(serializers.ModelSerializer):
     class Meta:
         model = ChatGroup
         fields = "__all__"
+        read_only_fields = ["message_count", "last_message_at", "last_message_preview"]
+
+
+class RoomListSerializer(serializers.ModelSerializer):
+    """
+    Room list entry built purely from the denormalized counters on ChatGroup.
+    Expects `read_counts` ({group_id: read_count}) in the serializer context.
+    """
+
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChatGroup
+        fields = [
+            "id",
+            "group_name",
+            "message_count",
+            "last_message_at",
+            "last_message_preview",
+            "unread_count",
+        ]
+
+    def get_unread_count(self, obj):
+        read_count = self.context.get("read_counts", {}).get(obj.id, 0)
+        return max(obj.message_count - read_count, 0)
 
 
 class ImageAttachmentSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    original_url = serializers.SerializerMethodField()
 
     class Meta:
         model = ImageAttachment
-        fields = ["id", "image", "image_url", "updated_at"]
-        read_only_fields = ["uploaded_at", "user"]
+        fields = [
+            "id",
+            "image",
+            "image_url",
+            "original_url",
+            "thumbnail_url",
+            "webp_url",
+            "updated_at",
+        ]
+        read_only_fields = ["uploaded_at", "user", "thumbnail_url", "webp_url"]
 
     def validate_image(self, value):
         if not value.name.lower().endswith(tuple(ImageAttachmentExt)):
@@ -55,9 +97,18 @@ class ImageAttachmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 f"Your file size is {value.size} bytes, maximum allowed is 5MB."
             )
+        error = check_header(UploadKind.IMAGE, value.name, read_header(value))
+        if error:
+            raise serializers.ValidationError(error)
         return value
 
     def get_image_url(self, obj):
+        # serve the small variant once it has been generated
+        if obj.thumbnail_url:
+            return obj.thumbnail_url
+        return self.get_original_url(obj)
+
+    def get_original_url(self, obj):
         if obj.image:
             return obj.image.url
         return None
@@ -80,9 +131,27 @@ class FileAttachmentSerializers(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 f"Your file size is {value.size} bytes, maximum allowed is 20MB."
             )
+        error = check_header(UploadKind.FILE, value.name, read_header(value))
+        if error:
+            raise serializers.ValidationError(error)
         return value
 
     def get_file_url(self, obj):
         if obj.file:
             return obj.file.url
         return None
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            "token",
+            "kind",
+            "file_name",
+            "size",
+            "bytes_received",
+            "status",
+            "expires_at",
+        ]
+        read_only_fields = fields
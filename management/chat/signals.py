@@ -0,0 +1,29 @@
+"""
+Signal receivers for the chat app.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from chat.models import FileAttachment, ImageAttachment
+
+
+@receiver(post_delete, sender=FileAttachment)
+@receiver(post_delete, sender=ImageAttachment)
+def release_stored_object(sender, instance, **kwargs):
+    """
+    Drop the attachment's reference on its stored content and remove the
+    blob from storage once nothing points at it any more.
+    """
+    stored = instance.stored_object
+    if stored is None or not stored.release():
+        return
+
+    from chat.uploads import get_upload_storage
+
+    storage = get_upload_storage()
+    transaction.on_commit(lambda: storage.delete(stored.resource))
@@ -0,0 +1,54 @@
+import logging
+
+from celery import shared_task
+from PIL import Image, UnidentifiedImageError
+
+from chat.archive import archive_messages
+from chat.derivatives import generate_derivatives, skip_derivatives
+from chat.models import ImageAttachment
+from chat.uploads import discard_expired_sessions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def archive_old_messages(self):
+    """
+    Move chat messages past the hot retention window into the archive table.
+    """
+    archived = archive_messages()
+    logger.info(f"Chat archive run moved {archived} messages.")
+    return archived
+
+
+@shared_task(bind=True)
+def discard_expired_uploads(self):
+    """
+    Remove upload sessions that expired before completing, and their temp files.
+    """
+    discarded = discard_expired_sessions()
+    logger.info(f"Discarded {discarded} expired upload sessions.")
+    return discarded
+
+
+@shared_task(bind=True)
+def generate_image_derivatives(self, attachment_id):
+    """
+    Render the thumbnail and WebP variants of an uploaded image.
+    Routed to the `media` queue, see CELERY_TASK_ROUTES.
+    """
+    try:
+        attachment = ImageAttachment.objects.get(pk=attachment_id)
+    except ImageAttachment.DoesNotExist:
+        logger.warning(f"Image {attachment_id} no longer exists, skipping.")
+        return False
+    try:
+        return generate_derivatives(attachment)
+    except Image.DecompressionBombError as e:
+        # decoding it would exhaust the worker, so never try again
+        skip_derivatives(attachment, f"Image rejected as a decompression bomb: {e}")
+        return False
+    except (UnidentifiedImageError, OSError) as e:
+        # formats Pillow cannot decode (svg, heic) keep serving the original
+        skip_derivatives(attachment, str(e))
+        return False
@@ -1,15 +1,24 @@
 import shutil
 import tempfile
+from datetime import timedelta
 from io import BytesIO
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from chat.models import ChatGroup, GroupMessage
+from chat.archive import (
+    archive_messages,
+    compress_records,
+    decompress_records,
+    read_history,
+)
+from chat.models import ChatGroup, GroupMessage, MessageArchive
 from core.models import User
 
 
@@ -71,6 +80,149 @@ class ChatAPITest(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_group_counters_follow_messages(self):
+        GroupMessage.objects.create(group=self.group, author=self.user, body="Latest")
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.message_count, 2)
+        self.assertEqual(self.group.last_message_preview, "Latest")
+
+        self.message.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.message_count, 1)
+
+    def test_deleting_latest_message_rewinds_last_message(self):
+        latest = GroupMessage.objects.create(
+            group=self.group, author=self.user, body="Latest"
+        )
+        GroupMessage.objects.create(
+            group=self.group, author=self.user, body="Reply", parent=latest
+        )
+
+        latest.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.message_count, 1)
+        self.assertEqual(self.group.last_message_preview, self.message.body)
+        self.assertEqual(self.group.last_message_at, self.message.created)
+
+        self.message.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.message_count, 0)
+        self.assertIsNone(self.group.last_message_at)
+        self.assertEqual(self.group.last_message_preview, "")
+
+    def test_group_list_unread_and_mark_read(self):
+        url = reverse("chat-group-list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["unread_count"], 1)
+
+        read_url = reverse("chat-group-read", kwargs={"group_name": self.group_name})
+        response = self.client.post(read_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]["unread_count"], 0)
+
+    def test_group_list_puts_groups_without_messages_last(self):
+        ChatGroup.objects.create(group_name="empty")
+        response = self.client.get(reverse("chat-group-list"))
+        self.assertEqual(
+            [group["group_name"] for group in response.data],
+            [self.group_name, "empty"],
+        )
+
+    def test_archive_moves_old_messages_and_history_reads_through(self):
+        old = GroupMessage.objects.create(
+            group=self.group, author=self.user, body="Old"
+        )
+        GroupMessage.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(days=365)
+        )
+
+        self.assertEqual(archive_messages(older_than_days=30), 1)
+        self.assertFalse(GroupMessage.objects.filter(pk=old.pk).exists())
+        self.assertEqual(MessageArchive.objects.filter(group=self.group).count(), 1)
+
+        url = reverse("chat-group-history", kwargs={"group_name": self.group_name})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bodies = [message["body"] for message in response.data["messages"]]
+        self.assertEqual(bodies, ["Hello World", "Old"])
+
+    def test_history_merges_overlapping_archive_chunks(self):
+        GroupMessage.objects.all().delete()
+        start = timezone.now() - timedelta(days=400)
+
+        def record(pk, minutes):
+            return {
+                "id": pk,
+                "group": self.group.id,
+                "author": self.user.id,
+                "parent": None,
+                "body": f"m{pk}",
+                "tag": "",
+                "created": (start + timedelta(minutes=minutes)).isoformat(),
+            }
+
+        # a thread whose reply is newer than the next batch of messages
+        for records in ([record(1, 1), record(5, 5)], [record(3, 3), record(4, 4)]):
+            MessageArchive.objects.create(
+                group=self.group,
+                first_created=parse_datetime(records[0]["created"]),
+                last_created=parse_datetime(records[-1]["created"]),
+                message_count=len(records),
+                payload=compress_records(records),
+            )
+
+        bodies = [record["body"] for record in read_history(self.group, limit=3)]
+        self.assertEqual(bodies, ["m5", "m4", "m3"])
+        before = start + timedelta(minutes=4)
+        bodies = [record["body"] for record in read_history(self.group, before)]
+        self.assertEqual(bodies, ["m3", "m1"])
+
+    def test_archive_keeps_threads_together_across_batches(self):
+        parent = GroupMessage.objects.create(
+            group=self.group, author=self.user, body="parent"
+        )
+        reply = GroupMessage.objects.create(
+            group=self.group, author=self.user, body="reply", parent=parent
+        )
+        GroupMessage.objects.create(
+            group=self.group, author=self.user, body="nested", parent=reply
+        )
+        GroupMessage.objects.filter(group=self.group).update(
+            created=timezone.now() - timedelta(days=400)
+        )
+
+        self.assertEqual(archive_messages(older_than_days=30, batch_size=1), 4)
+        self.assertFalse(GroupMessage.objects.exists())
+        bodies = [
+            record["body"]
+            for chunk in MessageArchive.objects.all()
+            for record in decompress_records(chunk.payload)
+        ]
+        self.assertEqual(sorted(bodies), ["Hello World", "nested", "parent", "reply"])
+
+    def test_file_upload_with_wrong_content_is_rejected(self):
+        file = SimpleUploadedFile(
+            "document.pdf", b"MZ\x90\x00 not a pdf", content_type="application/pdf"
+        )
+        response = self.client.post(self.file_url, {"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("does not match", response.data["detail_error"]["file"][0])
+
+    def test_oversized_image_upload_is_rejected_before_parsing(self):
+        big_img = SimpleUploadedFile(
+            "image.png", b"\x89PNG\r\n\x1a\n" + b"x" * (6 * 1024 * 1024)
+        )
+        response = self.client.post(
+            self.image_url, {"image": big_img}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(
+            "larger than the maximum", response.data["detail_error"]["image"][0]
+        )
+
     # TODO: currently all test images are uploading in the cloud
     # and we don't want that because it cost.
 
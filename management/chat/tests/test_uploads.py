@@ -0,0 +1,284 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+import cloudinary
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from chat import uploads
+from chat.derivatives import generate_derivatives
+from chat.models import FileAttachment, ImageAttachment, StoredObject, UploadSession
+from chat.tasks import generate_image_derivatives
+from core.constants import UploadStatus
+from core.models import User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+TEMP_UPLOAD_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    CHAT_UPLOAD_STORAGE="local",
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    CHAT_UPLOAD_TEMP_DIR=TEMP_UPLOAD_DIR,
+)
+class UploadSessionTest(APITestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+        shutil.rmtree(TEMP_UPLOAD_DIR)
+
+    def setUp(self):
+        cloudinary.config(cloud_name="supportix", api_key="key", api_secret="secret")
+        self.addCleanup(cloudinary.reset_config)
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.content = b"%PDF-1.4 " + b"x" * 100
+
+    def open_session(self, **overrides):
+        data = {"kind": "file", "file_name": "report.pdf", "size": len(self.content)}
+        data.update(overrides)
+        return self.client.post(reverse("upload-session-create"), data, format="json")
+
+    def put_chunk(self, token, offset, body):
+        url = reverse("upload-session-chunk", kwargs={"token": token})
+        return self.client.put(
+            f"{url}?offset={offset}", body, content_type="application/octet-stream"
+        )
+
+    def test_chunked_upload_resumes_and_completes(self):
+        response = self.open_session()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        token = response.data["token"]
+
+        response = self.put_chunk(token, 0, self.content[:40])
+        self.assertEqual(response.data["bytes_received"], 40)
+
+        # resuming from a stale offset is refused
+        response = self.put_chunk(token, 0, self.content[:40])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        detail = self.client.get(
+            reverse("upload-session-detail", kwargs={"token": token})
+        )
+        response = self.put_chunk(
+            token, detail.data["bytes_received"], self.content[40:]
+        )
+        self.assertEqual(response.data["bytes_received"], len(self.content))
+
+        response = self.client.post(
+            reverse("upload-session-complete", kwargs={"token": token})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        attachment = FileAttachment.objects.get(user=self.user)
+        self.assertEqual(attachment.file_name, "report.pdf")
+        self.assertEqual(
+            UploadSession.objects.get(token=token).status, UploadStatus.COMPLETED
+        )
+
+    def test_chunk_larger_than_declared_size_is_rejected(self):
+        token = self.open_session().data["token"]
+        response = self.put_chunk(token, 0, self.content + b"extra")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get(token=token).bytes_received, 0)
+
+    def test_empty_chunk_is_rejected(self):
+        token = self.open_session().data["token"]
+        response = self.put_chunk(token, 0, b"")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get(token=token).bytes_received, 0)
+
+    def test_session_rejects_bad_extension_and_size(self):
+        self.assertEqual(
+            self.open_session(file_name="notes.txt").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.open_session(size=20 * 1024 * 1024 + 1).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_incomplete_upload_cannot_complete(self):
+        token = self.open_session().data["token"]
+        self.put_chunk(token, 0, self.content[:10])
+        response = self.client.post(
+            reverse("upload-session-complete", kwargs={"token": token})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("chat.api.viewset.generate_image_derivatives.delay")
+    def test_image_derivatives_are_generated_once_per_content(self, mock_delay):
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 900), color=(0, 128, 0)).save(buffer, format="PNG")
+        content = buffer.getvalue()
+
+        images = []
+        for _ in range(2):
+            token = self.open_session(
+                kind="image", file_name="shot.png", size=len(content)
+            ).data["token"]
+            self.put_chunk(token, 0, content)
+            response = self.client.post(
+                reverse("upload-session-complete", kwargs={"token": token})
+            )
+            images.append(ImageAttachment.objects.get(pk=response.data["id"]))
+        self.assertEqual(mock_delay.call_count, 2)
+
+        self.assertTrue(generate_derivatives(images[0]))
+        self.assertFalse(generate_derivatives(images[1]))
+
+        first, second = (ImageAttachment.objects.get(pk=i.pk) for i in images)
+        self.assertEqual(first.stored_object_id, second.stored_object_id)
+        self.assertEqual(first.thumbnail_url, second.thumbnail_url)
+        with open(f"{TEMP_MEDIA_ROOT}/{first.thumbnail_url}", "rb") as fh:
+            self.assertLessEqual(max(Image.open(fh).size), 320)
+
+    @patch("chat.api.viewset.generate_image_derivatives.delay")
+    def test_decompression_bomb_is_marked_and_skipped(self, mock_delay):
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 900)).save(buffer, format="PNG")
+        content = buffer.getvalue()
+        token = self.open_session(
+            kind="image", file_name="bomb.png", size=len(content)
+        ).data["token"]
+        self.put_chunk(token, 0, content)
+        response = self.client.post(
+            reverse("upload-session-complete", kwargs={"token": token})
+        )
+
+        with patch("PIL.Image.MAX_IMAGE_PIXELS", 1000):
+            self.assertFalse(generate_image_derivatives(response.data["id"]))
+
+        image = ImageAttachment.objects.get(pk=response.data["id"])
+        self.assertIn("decompression bomb", image.derivative_error)
+        self.assertEqual(image.thumbnail_url, "")
+
+    @patch("cloudinary.uploader.upload")
+    def test_cloudinary_derivative_public_id_has_no_extension(self, mock_upload):
+        mock_upload.return_value = {"secure_url": "https://cdn/derivatives/h_webp.webp"}
+        url = uploads.CloudinaryUploadStorage().save_derivative("h_webp.webp", b"data")
+        self.assertEqual(url, "https://cdn/derivatives/h_webp.webp")
+        _, options = mock_upload.call_args
+        self.assertEqual(options["public_id"], "h_webp")
+        self.assertEqual(options["format"], "webp")
+
+    @override_settings(CHAT_UPLOAD_STORAGE="cloudinary")
+    @patch("cloudinary.api.resource", return_value={"bytes": 2048, "format": "png"})
+    @patch("cloudinary.utils.verify_api_response_signature", return_value=True)
+    @patch("chat.api.viewset.generate_image_derivatives.delay")
+    def test_direct_upload_records_verified_resource(
+        self, mock_delay, mock_verify, mock_resource
+    ):
+        response = self.open_session(kind="image", file_name="shot.png", size=2048)
+        token = response.data["token"]
+        self.assertIn("signature", response.data["direct_upload"]["fields"])
+
+        response = self.client.post(
+            reverse("upload-session-complete", kwargs={"token": token}),
+            {
+                "public_id": f"attachments/{token}",
+                "version": "1700000000",
+                "signature": "sig",
+                "format": "png",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        image = ImageAttachment.objects.get(user=self.user)
+        self.assertEqual(image.image.public_id, f"attachments/{token}")
+        mock_verify.assert_called_once()
+
+    @override_settings(CHAT_UPLOAD_STORAGE="cloudinary")
+    @patch("cloudinary.uploader.destroy")
+    @patch("cloudinary.api.resource", return_value={"bytes": 9999, "format": "svg"})
+    @patch("cloudinary.utils.verify_api_response_signature", return_value=True)
+    def test_direct_upload_must_match_declared_size_and_type(
+        self, mock_verify, mock_resource, mock_destroy
+    ):
+        response = self.open_session(kind="image", file_name="shot.png", size=2048)
+        token = response.data["token"]
+        url = reverse("upload-session-complete", kwargs={"token": token})
+        data = {
+            "public_id": f"attachments/{token}",
+            "version": "1700000000",
+            "signature": "sig",
+        }
+
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("declared 2048", response.data["detail_error"])
+
+        mock_resource.return_value = {"bytes": 2048, "format": "svg"}
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("svg", response.data["detail_error"])
+
+        self.assertEqual(mock_destroy.call_count, 2)
+        self.assertFalse(ImageAttachment.objects.exists())
+        self.assertEqual(
+            UploadSession.objects.get(token=token).status, UploadStatus.PENDING
+        )
+
+    def test_concurrent_request_on_a_session_is_refused(self):
+        token = self.open_session().data["token"]
+        session = UploadSession.objects.get(token=token)
+        with uploads.exclusive(session):
+            response = self.put_chunk(token, 0, self.content)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.put_chunk(token, 0, self.content).status_code, 200)
+
+    def upload_chunked(self, content, **overrides):
+        token = self.open_session(size=len(content), **overrides).data["token"]
+        self.put_chunk(token, 0, content)
+        return self.client.post(
+            reverse("upload-session-complete", kwargs={"token": token})
+        )
+
+    def test_identical_uploads_share_stored_content(self):
+        first = FileAttachment.objects.get(
+            pk=self.upload_chunked(self.content).data["id"]
+        )
+        second = FileAttachment.objects.get(
+            pk=self.upload_chunked(self.content).data["id"]
+        )
+
+        stored = StoredObject.objects.get()
+        self.assertEqual(stored.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(stored.ref_count, 2)
+        self.assertEqual(first.stored_object, stored)
+        self.assertEqual(str(first.file), str(second.file))
+        path = os.path.join(TEMP_MEDIA_ROOT, stored.resource)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(StoredObject.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(StoredObject.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_declared_hash_skips_upload_of_own_content(self):
+        self.upload_chunked(self.content)
+        content_hash = hashlib.sha256(self.content).hexdigest()
+
+        response = self.open_session(sha256=content_hash)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(FileAttachment.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(StoredObject.objects.get().ref_count, 2)
+
+        # another user cannot claim the content by its hash alone
+        other = User.objects.create_user(username="other", password="testpass")
+        self.client.force_authenticate(user=other)
+        response = self.open_session(sha256=content_hash)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,48 @@
+import struct
+from io import BytesIO
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from chat.validators import UPLOAD_RULES, check_header, image_dimensions
+from core.constants import UploadKind
+
+
+def image_bytes(fmt, size=(120, 80)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(0, 0, 255)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class HeaderSniffingTest(SimpleTestCase):
+    def test_image_dimensions_from_header(self):
+        for fmt in ("PNG", "JPEG", "GIF", "BMP", "WEBP"):
+            with self.subTest(fmt=fmt):
+                self.assertEqual(image_dimensions(image_bytes(fmt)[:1024]), (120, 80))
+
+    def test_matching_header_is_accepted(self):
+        self.assertIsNone(check_header(UploadKind.IMAGE, "a.png", image_bytes("PNG")))
+        self.assertIsNone(check_header(UploadKind.FILE, "a.pdf", b"%PDF-1.7\n"))
+
+    def test_mismatched_header_is_rejected(self):
+        self.assertIsNotNone(
+            check_header(UploadKind.IMAGE, "a.png", image_bytes("JPEG"))
+        )
+        self.assertIsNotNone(check_header(UploadKind.FILE, "a.pdf", b"<html>"))
+
+    def test_svg_is_sniffed_and_unknown_extensions_are_rejected(self):
+        svg = b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"/>'
+        self.assertIsNone(check_header(UploadKind.IMAGE, "a.svg", svg))
+        self.assertIsNotNone(check_header(UploadKind.IMAGE, "a.svg", b"GIF89a"))
+
+        extensions, size = UPLOAD_RULES[UploadKind.FILE]
+        with patch.dict(UPLOAD_RULES, {UploadKind.FILE: (extensions + [".txt"], size)}):
+            error = check_header(UploadKind.FILE, "notes.txt", b"anything")
+        self.assertIn("does not match", error)
+
+    def test_huge_dimensions_are_rejected(self):
+        header = bytearray(image_bytes("PNG"))
+        header[16:24] = struct.pack(">II", 50000, 50000)
+        error = check_header(UploadKind.IMAGE, "bomb.png", bytes(header))
+        self.assertIn("50000x50000", error)
@@ -0,0 +1,478 @@
+"""
+Attachment upload sessions.
+
+Two upload paths avoid buffering whole attachments inside a Django worker:
+
+* Direct upload: the API signs upload parameters, the client sends the file
+  straight to storage and then reports back, and the server only verifies the
+  storage signature before recording the attachment.
+* Chunked upload: the client streams the file to the server in pieces that
+  are appended to a temporary file on disk, so an interrupted upload can be
+  resumed from `UploadSession.bytes_received`.
+
+The storage backend is selected with `settings.CHAT_UPLOAD_STORAGE`:
+"cloudinary" in production and "local" as a filesystem stand-in for
+development and tests.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+from urllib.request import urlopen
+
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+from cloudinary.models import CloudinaryField
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from chat.models import FileAttachment, ImageAttachment, StoredObject, UploadSession
+from chat.validators import UPLOAD_RULES, check_header
+from core.constants import UploadKind, UploadStatus
+from core.dumps import (
+    UPLOAD_SESSION_LOCK_SECONDS,
+    UPLOAD_SESSION_TTL_MINUTES,
+    UPLOAD_STREAM_CHUNK_SIZE,
+)
+
+# storage reports one format name for these spellings
+EXTENSION_ALIASES = {".jpeg": ".jpg", ".tif": ".tiff"}
+
+
+class UploadError(Exception):
+    """Raised when an upload session cannot accept the request."""
+
+
+class CloudinaryUploadStorage:
+    folder = "attachments"
+
+    def direct_upload(self, session):
+        params = {
+            "timestamp": int(time.time()),
+            "public_id": str(session.token),
+            "folder": self.folder,
+        }
+        config = cloudinary.config()
+        params["signature"] = cloudinary.utils.api_sign_request(
+            params, config.api_secret
+        )
+        params["api_key"] = config.api_key
+        return {
+            "url": cloudinary.utils.cloudinary_api_url("upload", resource_type="auto"),
+            "fields": params,
+        }
+
+    def verify(self, session, data):
+        public_id = data.get("public_id", "")
+        version = data.get("version")
+        signature = data.get("signature", "")
+        if public_id != f"{self.folder}/{session.token}":
+            raise UploadError("Uploaded resource does not belong to this session.")
+        if not cloudinary.utils.verify_api_response_signature(
+            public_id, version, signature
+        ):
+            raise UploadError("Invalid storage signature.")
+        resource_type = data.get("resource_type", "image")
+        # the signature only covers public_id and version, so size and
+        # format are read back from storage rather than taken from `data`
+        try:
+            details = cloudinary.api.resource(public_id, resource_type=resource_type)
+        except cloudinary.exceptions.Error as e:
+            raise UploadError(f"Uploaded resource could not be read back: {e}")
+        fmt = f".{details['format']}" if details.get("format") else ""
+        resource = f"{resource_type}/upload/v{version}/{public_id}{fmt}"
+        try:
+            check_stored(session, details.get("bytes"), details.get("format", ""))
+        except UploadError:
+            self.delete(resource)
+            raise
+        return resource
+
+    def store(self, session, path):
+        result = cloudinary.uploader.upload(
+            str(path),
+            public_id=str(session.token),
+            folder=self.folder,
+            resource_type="auto",
+        )
+        fmt = f".{result['format']}" if result.get("format") else ""
+        return (
+            f"{result['resource_type']}/upload/v{result['version']}/"
+            f"{result['public_id']}{fmt}"
+        )
+
+    def read(self, resource):
+        with urlopen(resource.build_url(secure=True), timeout=30) as response:
+            return response.read(ImageAttachmentSize + 1)
+
+    def delete(self, resource):
+        resource = CloudinaryField().parse_cloudinary_resource(resource)
+        cloudinary.uploader.destroy(
+            resource.public_id, resource_type=resource.resource_type
+        )
+
+    def save_derivative(self, name, data):
+        # Cloudinary appends the format to the public_id itself
+        public_id, ext = os.path.splitext(name)
+        options = {"format": ext.lstrip(".")} if ext else {}
+        result = cloudinary.uploader.upload(
+            BytesIO(data),
+            public_id=public_id,
+            folder="derivatives",
+            overwrite=False,
+            **options,
+        )
+        return result["secure_url"]
+
+
+class LocalUploadStorage:
+    """
+    Filesystem stand-in for Cloudinary. There is no external service to
+    upload to, so the "direct" upload URL is the chunked upload endpoint.
+    """
+
+    folder = "attachments"
+
+    def __init__(self):
+        self.storage = FileSystemStorage(location=settings.MEDIA_ROOT)
+
+    def direct_upload(self, session):
+        return {"url": f"/chat/uploads/{session.token}/chunk/", "fields": {}}
+
+    def verify(self, session, data):
+        raise UploadError(
+            f"Upload is not complete, {session.bytes_received} of {session.size} bytes received."
+        )
+
+    def store(self, session, path):
+        suffix = Path(session.file_name).suffix.lower()
+        with open(path, "rb") as fh:
+            return self.storage.save(f"{self.folder}/{session.token}{suffix}", File(fh))
+
+    def read(self, resource):
+        name = resource.public_id
+        if resource.format:
+            name = f"{name}.{resource.format}"
+        with self.storage.open(name) as fh:
+            return fh.read()
+
+    def delete(self, resource):
+        self.storage.delete(resource)
+
+    def save_derivative(self, name, data):
+        path = self.storage.save(f"derivatives/{name}", ContentFile(data))
+        return self.storage.url(path)
+
+
+UPLOAD_STORAGES = {
+    "cloudinary": CloudinaryUploadStorage,
+    "local": LocalUploadStorage,
+}
+
+
+def get_upload_storage():
+    return UPLOAD_STORAGES[settings.CHAT_UPLOAD_STORAGE]()
+
+
+def chunk_path(session):
+    return Path(settings.CHAT_UPLOAD_TEMP_DIR) / f"{session.token}.part"
+
+
+def open_session(user, kind, file_name, size):
+    """
+    Validate the declared attachment and issue an upload session for it.
+    """
+    if kind not in UPLOAD_RULES:
+        raise UploadError(f"Unknown upload kind {kind}.")
+    extensions, max_size = UPLOAD_RULES[kind]
+    if not file_name or not file_name.lower().endswith(tuple(extensions)):
+        raise UploadError(
+            f"Your file has a {file_name} extension, use one of {extensions}."
+        )
+    if not 0 < size <= max_size:
+        raise UploadError(
+            f"Your file size is {size} bytes, maximum allowed is {max_size}."
+        )
+
+    return UploadSession.objects.create(
+        user=user,
+        kind=kind,
+        file_name=file_name,
+        size=size,
+        expires_at=timezone.now() + timedelta(minutes=UPLOAD_SESSION_TTL_MINUTES),
+    )
+
+
+def write_lock_key(session):
+    return f"upload_session:{session.token}:busy"
+
+
+@contextmanager
+def exclusive(session):
+    """
+    Serialize the requests that touch a session's temporary file or storage
+    object. The flag lives in the cache so no row lock or transaction is
+    held while bytes move over the network.
+    """
+    key = write_lock_key(session)
+    if not cache.add(key, 1, timeout=UPLOAD_SESSION_LOCK_SECONDS):
+        raise UploadError("Another request is in progress for this upload session.")
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def write_chunk(session, offset, stream):
+    """
+    Append the bytes of `stream` to the session's temporary file.
+
+    The body is copied in UPLOAD_STREAM_CHUNK_SIZE pieces, so memory use does
+    not depend on the chunk size. `offset` must equal the bytes already
+    received, which lets a client resume after a dropped connection. The
+    row is only touched to advance the offset once the body is on disk.
+    """
+    with exclusive(session):
+        session.refresh_from_db()
+        if session.status == UploadStatus.COMPLETED:
+            raise UploadError("Upload session is already completed.")
+        if session.expires_at <= timezone.now():
+            raise UploadError("Upload session has expired.")
+        if offset != session.bytes_received:
+            raise UploadError(f"Expected offset {session.bytes_received}.")
+
+        path = chunk_path(session)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        received = session.bytes_received
+        with open(path, "ab") as fh:
+            # drop anything left behind by an interrupted request
+            fh.truncate(session.bytes_received)
+            while True:
+                piece = stream.read(UPLOAD_STREAM_CHUNK_SIZE)
+                if not piece:
+                    break
+                if received == 0:
+                    error = check_header(session.kind, session.file_name, piece)
+                    if error:
+                        raise UploadError(error)
+                received += len(piece)
+                if received > session.size:
+                    fh.truncate(session.bytes_received)
+                    raise UploadError("Upload exceeds the declared size.")
+                fh.write(piece)
+
+        advanced = (
+            UploadSession.objects.filter(
+                pk=session.pk, bytes_received=session.bytes_received
+            )
+            .exclude(status=UploadStatus.COMPLETED)
+            .update(bytes_received=received, status=UploadStatus.UPLOADING)
+        )
+        if not advanced:
+            raise UploadError("Upload session changed while the chunk was written.")
+    session.bytes_received = received
+    session.status = UploadStatus.UPLOADING
+    return session
+
+
+def check_stored(session, size, fmt):
+    """
+    Reject a directly uploaded object whose size or type differs from what
+    the session declared.
+    """
+    if size != session.size:
+        raise UploadError(
+            f"Uploaded {size} bytes, but the session declared {session.size}."
+        )
+    extensions, _ = UPLOAD_RULES[session.kind]
+    declared = Path(session.file_name).suffix.lower()
+    stored = f".{fmt}".lower()
+    if stored not in extensions or EXTENSION_ALIASES.get(
+        stored, stored
+    ) != EXTENSION_ALIASES.get(declared, declared):
+        raise UploadError(
+            f"Uploaded a {fmt} file, but the session declared {session.file_name}."
+        )
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for piece in iter(lambda: fh.read(UPLOAD_STREAM_CHUNK_SIZE), b""):
+            digest.update(piece)
+    return digest.hexdigest()
+
+
+def create_attachment(user, kind, file_name, resource, stored_object=None):
+    if kind == UploadKind.IMAGE:
+        attachment = ImageAttachment.objects.create(
+            user=user, image=resource, stored_object=stored_object
+        )
+    else:
+        attachment = FileAttachment.objects.create(
+            user=user,
+            file=resource,
+            file_name=file_name[:30],
+            stored_object=stored_object,
+        )
+    # reload so the stored value is parsed into a CloudinaryResource
+    attachment.refresh_from_db()
+    return attachment
+
+
+def store_deduplicated(storage, kind, content_hash, size, store):
+    """
+    Return a StoredObject for `content_hash`, calling `store()` to upload
+    the blob only when no identical content is stored yet.
+    """
+    stored = StoredObject.acquire(content_hash)
+    if stored:
+        return stored
+    resource = store()
+    stored, created = StoredObject.register(content_hash, kind, resource, size)
+    if not created:
+        # a concurrent upload of the same content won the race
+        transaction.on_commit(lambda: storage.delete(resource))
+    return stored
+
+
+def complete_session(session, data):
+    """
+    Record the attachment for a finished session and return it.
+
+    Chunked sessions are hashed from disk and only handed to the storage
+    backend when their content is not stored yet; direct sessions are
+    accepted only when the storage signature in `data` checks out and the
+    stored object matches the declared size and type. Storage calls happen
+    before the short transaction that records the attachment.
+    """
+    storage = get_upload_storage()
+    path = chunk_path(session)
+    with exclusive(session):
+        session.refresh_from_db()
+        if session.status == UploadStatus.COMPLETED:
+            raise UploadError("Upload session is already completed.")
+
+        if session.is_complete and path.exists():
+            stored = store_deduplicated(
+                storage,
+                session.kind,
+                hash_file(path),
+                session.size,
+                lambda: storage.store(session, path),
+            )
+            resource = stored.resource
+        else:
+            stored = None
+            resource = storage.verify(session, data)
+
+        try:
+            with transaction.atomic():
+                completed = (
+                    UploadSession.objects.filter(pk=session.pk)
+                    .exclude(status=UploadStatus.COMPLETED)
+                    .update(status=UploadStatus.COMPLETED)
+                )
+                if not completed:
+                    raise UploadError("Upload session is already completed.")
+                attachment = create_attachment(
+                    session.user, session.kind, session.file_name, resource, stored
+                )
+        except Exception:
+            if stored and stored.release():
+                storage.delete(stored.resource)
+            raise
+        session.status = UploadStatus.COMPLETED
+
+    if path.exists():
+        os.remove(path)
+    return attachment
+
+
+def reuse_own_upload(user, kind, file_name, content_hash):
+    """
+    Short-circuit an upload whose declared SHA-256 matches content the same
+    user already uploaded. Returns the new attachment, or None when the file
+    has to be uploaded.
+
+    Only the user's own uploads are matched: a declared hash is not proof of
+    holding the content, so it must not unlock anyone else's files.
+    """
+    owned = StoredObject.objects.filter(content_hash=content_hash, kind=kind).filter(
+        Q(images__user=user) | Q(files__user=user)
+    )
+    with transaction.atomic():
+        if not owned.exists():
+            return None
+        stored = StoredObject.acquire(content_hash)
+        if stored is None:
+            return None
+        return create_attachment(user, kind, file_name, stored.resource, stored)
+
+
+def save_deduplicated(serializer, user, kind, content_hash, size):
+    """
+    Save an attachment serializer, pointing it at already stored content
+    when `content_hash` is known instead of uploading the file again. The
+    upload itself runs outside any transaction.
+    """
+    field = "image" if kind == UploadKind.IMAGE else "file"
+    if not content_hash:
+        return serializer.save(user=user)
+
+    stored = StoredObject.acquire(content_hash)
+    if stored:
+        # a string value is stored as-is, CloudinaryField skips the upload
+        serializer.validated_data[field] = stored.resource
+        try:
+            attachment = serializer.save(user=user, stored_object=stored)
+        except Exception:
+            stored.release()
+            raise
+    else:
+        attachment = serializer.save(user=user)
+        resource = attachment._meta.get_field(field).get_prep_value(
+            getattr(attachment, field)
+        )
+        with transaction.atomic():
+            stored, created = StoredObject.register(content_hash, kind, resource, size)
+            if not created:
+                # a concurrent upload of the same content won the race
+                storage = get_upload_storage()
+                transaction.on_commit(lambda: storage.delete(resource))
+                setattr(attachment, field, stored.resource)
+            attachment.stored_object = stored
+            attachment.save(update_fields=[field, "stored_object"])
+
+    attachment.refresh_from_db()
+    return attachment
+
+
+def discard_expired_sessions():
+    """
+    Delete unfinished sessions past their expiry along with their temp files.
+    """
+    expired = UploadSession.objects.filter(expires_at__lte=timezone.now()).exclude(
+        status=UploadStatus.COMPLETED
+    )
+    for session in expired.iterator():
+        path = chunk_path(session)
+        if path.exists():
+            os.remove(path)
+    return expired.delete()[0]
@@ -7,12 +7,39 @@ urlpatterns = [
     path("messages/create/", viewset.chat_create, name="chat-message-create"),
     path("messages/<int:id>/delete/", viewset.msg_delete, name="chat-message-delete"),
     path("messages/<int:id>/update/", viewset.msg_update, name="chat-message-update"),
+    path("groups/", viewset.group_list, name="chat-group-list"),
     path("groups/create/", viewset.group_create, name="chat-group-create"),
     path(
         "groups/<str:group_name>/update/",
         viewset.group_update,
         name="chat-group-update",
     ),
+    path(
+        "groups/<str:group_name>/read/",
+        viewset.group_mark_read,
+        name="chat-group-read",
+    ),
+    path(
+        "groups/<str:group_name>/history/",
+        viewset.group_history,
+        name="chat-group-history",
+    ),
     path("upload_file/", viewset.upload_file, name="upload-file"),
     path("upload_image/", viewset.upload_image, name="upload-image"),
+    path("uploads/", viewset.upload_session_create, name="upload-session-create"),
+    path(
+        "uploads/<uuid:token>/",
+        viewset.upload_session_detail,
+        name="upload-session-detail",
+    ),
+    path(
+        "uploads/<uuid:token>/chunk/",
+        viewset.upload_session_chunk,
+        name="upload-session-chunk",
+    ),
+    path(
+        "uploads/<uuid:token>/complete/",
+        viewset.upload_session_complete,
+        name="upload-session-complete",
+    ),
 ]
@@ -0,0 +1,215 @@
+"""
+Info:
+ Copyright (c) Supportix. All rights reserved.
+ Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+
+Header sniffing for attachment uploads. Uploads are checked against the magic
+numbers of their extension, image dimensions are read from the header and
+size limits are enforced while the body is still arriving.
+
+Functions:
+- image_dimensions(header): Returns (width, height) read from an image header, or None.
+- check_header(kind, file_name, header): Returns an error message if the header does not match, else None.
+- read_header(fileobj): Returns the first SNIFF_BYTES of a file without moving its position.
+
+Classes:
+- AttachmentSniffingHandler: Upload handler that rejects a bad upload within its first chunk.
+"""
+
+import hashlib
+import re
+import struct
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+from core.constants import UploadKind
+from core.dumps import (
+    FileAttachmentExt,
+    FileAttachmentSize,
+    ImageAttachmentExt,
+    ImageAttachmentMaxDimension,
+    ImageAttachmentSize,
+)
+
+# Bytes needed to identify every supported format and read most headers.
+SNIFF_BYTES = 64 * 1024
+
+SIGNATURES = {
+    ".pdf": (b"%PDF-",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".gif": (b"GIF87a", b"GIF89a"),
+    ".bmp": (b"BM",),
+    ".tif": (b"II*\x00", b"MM\x00*"),
+    ".tiff": (b"II*\x00", b"MM\x00*"),
+    ".ico": (b"\x00\x00\x01\x00",),
+}
+
+UPLOAD_RULES = {
+    UploadKind.FILE: (FileAttachmentExt, FileAttachmentSize),
+    UploadKind.IMAGE: (ImageAttachmentExt, ImageAttachmentSize),
+}
+
+
+def _matches_signature(suffix, header):
+    if suffix == ".webp":
+        return header[:4] == b"RIFF" and header[8:12] == b"WEBP"
+    if suffix == ".heic":
+        return header[4:8] == b"ftyp" and header[8:12] in (
+            b"heic",
+            b"heix",
+            b"mif1",
+            b"msf1",
+        )
+    if suffix == ".svg":
+        text = header[:1024].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+        return text.startswith(b"<?xml") or text.startswith(b"<svg")
+    # an extension without a known signature cannot be verified, so reject it
+    signatures = SIGNATURES.get(suffix)
+    return bool(signatures) and header.startswith(signatures)
+
+
+def _jpeg_dimensions(header):
+    offset = 2
+    while offset + 9 <= len(header):
+        if header[offset] != 0xFF:
+            return None
+        marker = header[offset + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        (length,) = struct.unpack(">H", header[offset + 2 : offset + 4])
+        # SOF0..SOF15 except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", header[offset + 5 : offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def image_dimensions(header):
+    """
+    Return (width, height) from the first bytes of an image, or None if the
+    format is not parsed or the header is too short.
+    """
+    if header.startswith(b"\x89PNG\r\n\x1a\n") and len(header) >= 24:
+        return struct.unpack(">II", header[16:24])
+    if header[:6] in (b"GIF87a", b"GIF89a") and len(header) >= 10:
+        return struct.unpack("<HH", header[6:10])
+    if header.startswith(b"BM") and len(header) >= 26:
+        width, height = struct.unpack("<ii", header[18:26])
+        return width, abs(height)
+    if header.startswith(b"\xff\xd8\xff"):
+        return _jpeg_dimensions(header)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP" and len(header) >= 30:
+        chunk = header[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", header[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(header[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            width = int.from_bytes(header[24:27], "little") + 1
+            height = int.from_bytes(header[27:30], "little") + 1
+            return width, height
+    return None
+
+
+def check_header(kind, file_name, header):
+    """
+    Return an error message if `header` does not look like a valid `kind`
+    attachment named `file_name`, otherwise None.
+    """
+    extensions, _ = UPLOAD_RULES[kind]
+    suffix = re.search(r"\.[^.]*$", file_name.lower() if file_name else "")
+    suffix = suffix.group(0) if suffix else ""
+    if suffix not in extensions:
+        return f"Your file has a {file_name} extension, please use one of {extensions}."
+    if not _matches_signature(suffix, header):
+        return f"The content of {file_name} does not match its {suffix} extension."
+
+    if kind == UploadKind.IMAGE:
+        dimensions = image_dimensions(header)
+        if dimensions and max(dimensions) > ImageAttachmentMaxDimension:
+            return (
+                f"Your image is {dimensions[0]}x{dimensions[1]} pixels, maximum "
+                f"allowed is {ImageAttachmentMaxDimension} per side."
+            )
+    return None
+
+
+def read_header(fileobj):
+    position = fileobj.tell()
+    header = fileobj.read(SNIFF_BYTES)
+    fileobj.seek(position)
+    return header
+
+
+class AttachmentSniffingHandler(FileUploadHandler):
+    """
+    Upload handler that validates `field_name` while it is being received.
+
+    It must run before the handlers that store the data. The first chunk is
+    checked against the magic numbers of the file's extension and the size
+    limit is enforced as bytes arrive. A bad upload stops the request without
+    reading the rest of the body, and the reason is kept in `self.error`.
+    The SHA-256 of the accepted file is computed on the way through and
+    exposed as `content_hash`.
+    """
+
+    def __init__(self, field_name, kind, request=None):
+        super().__init__(request)
+        self.field_name = field_name
+        self.kind = kind
+        self.error = None
+        self.active = False
+        self.content_hash = None
+        self.received = 0
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        _, max_size = UPLOAD_RULES[self.kind]
+        # leave room for the multipart framing around the file
+        if content_length and content_length > max_size + SNIFF_BYTES:
+            self.error = f"Your file is larger than the maximum of {max_size} bytes."
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.active = field_name == self.field_name
+        self.received = 0
+        self.sniffed = False
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        _, max_size = UPLOAD_RULES[self.kind]
+        self.received += len(raw_data)
+        if self.received > max_size:
+            self.reject(f"Your file is larger than the maximum of {max_size} bytes.")
+
+        if not self.sniffed:
+            self.sniffed = True
+            error = check_header(self.kind, self.file_name, raw_data[:SNIFF_BYTES])
+            if error:
+                self.reject(error)
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.active:
+            self.content_hash = self.digest.hexdigest()
+            self.active = False
+        return None
+
+    def reject(self, error):
+        self.error = error
+        raise StopUpload(connection_reset=True)
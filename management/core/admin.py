@@ -14,6 +14,7 @@ Classes:
 - AgentAdmin: Admin for the Agent model with display, filter, and search options.
 - DepartmentAdmin: Admin for the Department model with display and search options.
 - TicketAdmin: Admin for the Ticket model with display, filter, and search options.
+- AutomationRuleAdmin: Admin for declarative automation rules, validated on save.
 
 Copyright (c) Supportix. All rights reserved.
 Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
@@ -22,7 +23,7 @@ Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from core.models import Agent, Customer, Department, Ticket, User
+from core.models import Agent, AutomationRule, Customer, Department, Ticket, User
 
 
 @admin.register(User)
@@ -72,3 +73,10 @@ class TicketAdmin(admin.ModelAdmin):
     )
     list_filter = ("status", "created_at")
     search_fields = ("ticket_id", "customer__user__username", "agent__user__username")
+
+
+@admin.register(AutomationRule)
+class AutomationRuleAdmin(admin.ModelAdmin):
+    list_display = ("name", "action", "value", "order", "is_active")
+    list_filter = ("action", "is_active")
+    search_fields = ("name",)
@@ -0,0 +1,122 @@
+"""
+Billing endpoints for the signed-in user.
+
+The summary is read from BillingSummary, which the Stripe webhook consumer
+keeps up to date, so it is a single-row lookup. The history is paged with a
+keyset on (created_at, id) over the matching PaymentDetails index, so every
+page costs the same however far back it is.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.decorators import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.models import BillingSummary, PaymentDetails
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+HISTORY_FIELDS = (
+    "id",
+    "amount",
+    "payment_verified",
+    "stripe_payment_intent_id",
+    "created_at",
+)
+
+
+class BillingSummaryView(APIView):
+    """
+    API endpoint for the signed-in user's billing summary.
+
+    Request Method: GET
+
+    URL: /app/payments/summary/
+
+    Responses:
+    - 200 OK: Total paid, number of verified payments and the last payment.
+    - 401 Unauthorized: Authentication failed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        summary = BillingSummary.objects.filter(user=request.user).first()
+        return Response(
+            {
+                "total_paid": summary.total_paid if summary else "0.00",
+                "verified_count": summary.verified_count if summary else 0,
+                "last_payment_at": summary.last_payment_at if summary else None,
+                "last_payment_amount": (
+                    summary.last_payment_amount if summary else None
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+billing_summary = BillingSummaryView.as_view()
+
+
+class PaymentHistoryView(APIView):
+    """
+    API endpoint to page backwards through the signed-in user's payments.
+
+    Request Method: GET
+
+    URL: /app/payments/history/?before=<payment id>&limit=<int>
+
+    Responses:
+    - 200 OK: Up to `limit` payments older than `before`, newest first, and
+      the `next` cursor (None on the last page).
+    - 400 Bad Request: Invalid `before` or `limit`.
+    - 401 Unauthorized: Authentication failed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        try:
+            limit = int(request.query_params.get("limit", HISTORY_PAGE_SIZE))
+            before = request.query_params.get("before")
+            before = int(before) if before else None
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= HISTORY_MAX_PAGE_SIZE:
+            return Response(
+                {"error": "Invalid `before` or `limit` parameter."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        payments = PaymentDetails.objects.filter(user=request.user)
+        if before:
+            cursor = payments.filter(pk=before).values("created_at").first()
+            if cursor is None:
+                return Response(
+                    {"error": "Invalid `before` or `limit` parameter."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            payments = payments.filter(
+                Q(created_at__lt=cursor["created_at"])
+                | Q(created_at=cursor["created_at"], id__lt=before)
+            )
+
+        rows = list(
+            payments.order_by("-created_at", "-id").values(*HISTORY_FIELDS)[: limit + 1]
+        )
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        return Response(
+            {
+                "results": rows,
+                "next": rows[-1]["id"] if has_next else None,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+payment_history = PaymentHistoryView.as_view()
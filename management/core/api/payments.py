@@ -1,20 +1,23 @@
+import json
 import logging
 import uuid
 
 import stripe
+from django.conf import settings
+from django.db import transaction
 from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.decorators import APIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
 import core.validators as validators
-from core.models import PaymentDetails, User
-from main.settings import STRIPE_SECRET_KEY, STRIPE_WEBHOOK_SECRET
+from core import stripe_client
+from core.tasks import process_stripe_events
+from core.webhooks import record_event
 
 logger = logging.getLogger(__name__)
 
-stripe.api_key = STRIPE_SECRET_KEY
-
 
 # Note: Stripe is not available in Nepal.
 # Therefore, real-world testing is not possible.
@@ -79,7 +82,7 @@ class CreatePaymentIntentView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            intent = stripe.PaymentIntent.create(
+            intent = stripe_client.create_payment_intent(
                 amount=amount_cents,
                 currency=currency,
                 description=description,
@@ -103,9 +106,10 @@ stripe_payment = CreatePaymentIntentView.as_view()
 
 class StripeWebhookView(APIView):
     """
-    API endpoint for handling Stripe webhook events.
-    This endpoint receives webhook events from Stripe, such as payment intent success or failure,
-    and updates the corresponding payment records in the database.
+    API endpoint for receiving Stripe webhook events.
+    This endpoint verifies the event signature, stores the raw event in the
+    StripeEvent inbox and returns immediately; the payment records are updated
+    by the `process_stripe_events` Celery task.
 
     Request Method:
         POST
@@ -124,13 +128,15 @@ class StripeWebhookView(APIView):
         - payment_intent.payment_failed
 
     Behavior:
-        - On 'payment_intent.succeeded': Updates or creates a PaymentDetails record for the user and marks the payment as verified.
-        - On 'payment_intent.payment_failed': Logs a warning for the failed payment.
+        - Each event is stored once, keyed by its Stripe event id, so retried
+          deliveries are acknowledged without being applied again.
+        - See core.webhooks for how stored events are applied.
+        - A broker outage does not fail the delivery: the stored event is
+          picked up by the periodic `process_stripe_events` run instead.
 
     Responses:
-        200 OK: Webhook processed successfully.
+        200 OK: Event stored (or already stored).
         400 Bad Request: Invalid payload or signature verification failed.
-        404 Not Found: User associated with the payment intent does not exist.
     """
 
     authentication_classes = []
@@ -140,39 +146,51 @@ class StripeWebhookView(APIView):
         payload = request.body
         sig_header = request.META.get("HTTP_STRIPE_SIGNATURE", "")
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, STRIPE_WEBHOOK_SECRET
+            stripe.Webhook.construct_event(
+                payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
             )
+            event = json.loads(payload)
         except (ValueError, stripe.error.SignatureVerificationError):
             return HttpResponse(status=400)
 
-        obj = event["data"]["object"]
-        intent_id = getattr(obj, "id", obj.get("id"))
-        amount_cents = getattr(obj, "amount", obj.get("amount"))
-        metadata = getattr(obj, "metadata", obj.get("metadata", {}))
-
-        if event["type"] == "payment_intent.succeeded":
-            user_id = metadata.get("user_id")
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                return HttpResponse(status=404)
-
-            amount = amount_cents / 100
-            PaymentDetails.objects.update_or_create(
-                stripe_payment_intent_id=intent_id,
-                defaults={
-                    "user": user,
-                    "amount": amount,
-                    "payment_verified": True,
-                },
-            )
-            logger.info("Payment Success")
-
-        elif event["type"] == "payment_intent.payment_failed":
-            # TODO: some db logic can be perform btw: Unbound error
-            logger.warning("Payment Failed")
+        _, created = record_event(event)
+        if created:
+            transaction.on_commit(self.schedule_processing)
         return HttpResponse(status=200)
 
+    @staticmethod
+    def schedule_processing():
+        try:
+            process_stripe_events.delay()
+        except Exception as e:
+            # the event is stored, so the periodic drain still applies it
+            logger.warning(f"Could not schedule Stripe event processing: {e}")
+
 
 stripe_payment_event = StripeWebhookView.as_view()
+
+
+class StripeMetricsView(APIView):
+    """
+    API endpoint for the latency and error counts of the Stripe calls made by
+    the serving process (see core.stripe_client.LatencyMetrics). Celery
+    workers log their own counts after each currency refresh.
+
+    Request Method:
+        GET
+
+    Request URL:
+        /stripe/metrics/
+
+    Responses:
+        200 OK: Count, errors, average and max seconds per Stripe operation.
+        403 Forbidden: Only staff can read Stripe metrics.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(stripe_client.metrics.snapshot(), status=status.HTTP_200_OK)
+
+
+stripe_metrics = StripeMetricsView.as_view()
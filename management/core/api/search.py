@@ -0,0 +1,115 @@
+"""
+Full-text search over tickets and chat messages.
+
+Both `Ticket.search_vector` and `GroupMessage.search_vector` are kept up to
+date by database triggers and indexed with GIN, so a search is a single
+index scan ranked with `ts_rank`. Pagination fetches one extra row instead of
+running a COUNT(*) so latency does not grow with the size of the match set.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from rest_framework import status
+from rest_framework.decorators import APIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from chat.models import GroupMessage
+from core.models import Ticket
+
+SEARCH_CONFIG = "english"
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+def search_tickets(user, query):
+    tickets = Ticket.objects.all()
+    if user.is_customer():
+        tickets = tickets.filter(customer__user=user)
+    return (
+        tickets.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-created_at")
+        .values("ticket_id", "issue_title", "status", "created_at", "rank")
+    )
+
+
+def search_messages(user, query):
+    return (
+        GroupMessage.objects.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-created")
+        .values(
+            "id", "group__group_name", "author__username", "body", "created", "rank"
+        )
+    )
+
+
+SEARCH_SOURCES = {
+    "tickets": search_tickets,
+    "messages": search_messages,
+}
+
+
+class SearchView(APIView):
+    """
+    API endpoint for ranked full-text search.
+
+    Request Method: GET
+
+    URL: /app/search/?q=<text>&type=<tickets|messages>&page=<int>&page_size=<int>
+
+    Customers only see their own tickets; chat messages are visible to every
+    authenticated user, matching `/chat/messages/`.
+
+    Responses:
+    - 200 OK: Ranked results for the requested page.
+    - 400 Bad Request: Missing query, unknown type or invalid paging.
+    - 401 Unauthorized: Authentication failed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        text = request.query_params.get("q", "").strip()
+        source = request.query_params.get("type", "tickets")
+        if not text or source not in SEARCH_SOURCES:
+            return Response(
+                {
+                    "error": f"`q` is required and `type` must be one of {list(SEARCH_SOURCES)}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            page = int(request.query_params.get("page", 1))
+            page_size = int(request.query_params.get("page_size", SEARCH_PAGE_SIZE))
+        except ValueError:
+            page, page_size = 0, 0
+        if page < 1 or not 0 < page_size <= SEARCH_MAX_PAGE_SIZE:
+            return Response(
+                {"error": "Invalid `page` or `page_size`."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        offset = (page - 1) * page_size
+        rows = list(
+            SEARCH_SOURCES[source](request.user, query)[offset : offset + page_size + 1]
+        )
+
+        return Response(
+            {
+                "type": source,
+                "page": page,
+                "has_next": len(rows) > page_size,
+                "results": rows[:page_size],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+search_view = SearchView.as_view()
@@ -12,24 +12,43 @@ import logging
 from datetime import datetime
 
 from django.db import transaction
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.utils.timezone import now
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.decorators import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from core import dumps, validators
+from core import dumps, profile_cache, ticket_events, validators, wait_estimator
 from core.constants import Status
 from core.models import Agent, Customer, Ticket
 from core.permissions import CanEditOwnOrAdmin
 from core.serializer import RegisterSerializer, TicketCreateSerializer
-from core.tasks import process_ticket_queue
+from core.ticket_queue import (
+    queue_metrics,
+    queue_position,
+    schedule_run,
+    ticket_tier,
+)
+from main.db_router import primary_reads
 
 logger = logging.getLogger(__name__)
 
+# let clients keep the body but revalidate it with If-None-Match every time
+NO_CACHE = {"Cache-Control": "private, no-cache"}
+
+
+def customer_etag(request, pk, **kwargs):
+    return profile_cache.etag(profile_cache.CUSTOMER, pk)
+
+
+def agent_etag(request, pk, **kwargs):
+    return profile_cache.etag(profile_cache.AGENT, pk)
+
 
 # TODO: OauthApply auth : google, github, microsoft
 
@@ -137,22 +156,19 @@ class CustomerDetailView(APIView):
     Request Method: GET
 
     URL: /app/customer/<int:pk>/detail/
+
+    Responses carry an ETag; sending it back in If-None-Match returns
+    304 Not Modified until the customer or its user changes.
     """
 
     permission_classes = [IsAuthenticated | CanEditOwnOrAdmin]
 
+    @method_decorator(condition(etag_func=customer_etag))
     def get(self, request, pk, format=None):
-        customer = get_object_or_404(Customer, id=pk)
-        return Response(
-            {
-                "id": customer.id,
-                "username": customer.user.username,
-                "full_name": f"{customer.user.first_name} {customer.user.last_name}".strip(),
-                "is_paid": customer.is_paid,
-                "raise_issue": customer.solved_issues,
-            },
-            status=status.HTTP_200_OK,
-        )
+        data = profile_cache.customer_detail(pk)
+        if data is None:
+            raise Http404
+        return Response(data, status=status.HTTP_200_OK, headers=NO_CACHE)
 
 
 customer_detail = CustomerDetailView.as_view()
@@ -165,26 +181,102 @@ class AgentDetailView(APIView):
     Request Method: GET
 
     URL: /app/agent/<int:pk>/detail/
+
+    Responses carry an ETag; sending it back in If-None-Match returns
+    304 Not Modified until the agent, its user or its department changes.
     """
 
     permission_classes = [IsAuthenticated | CanEditOwnOrAdmin]
 
+    @method_decorator(condition(etag_func=agent_etag))
     def get(self, request, pk, format=None):
-        agent = get_object_or_404(Agent, id=pk)
+        data = profile_cache.agent_detail(pk)
+        if data is None:
+            raise Http404
+        return Response(data, status=status.HTTP_200_OK, headers=NO_CACHE)
+
+
+agent_detail = AgentDetailView.as_view()
+
+
+class BulkDetailView(APIView):
+    """
+    Base for endpoints returning many profiles of `model` in one query.
+
+    Query parameters:
+    - usernames: comma separated, at most BULK_DETAIL_MAX_USERNAMES.
+    - fields: optional, comma separated subset of `model.DETAIL_FIELDS`.
+    """
+
+    permission_classes = [IsAuthenticated]
+    model = None
+
+    @staticmethod
+    def split(value):
+        return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+    def get(self, request, format=None):
+        usernames = self.split(request.query_params.get("usernames"))
+        fields = self.split(request.query_params.get("fields")) or None
+        if not usernames or len(usernames) > dumps.BULK_DETAIL_MAX_USERNAMES:
+            return Response(
+                {
+                    "error": "Provide between 1 and "
+                    f"{dumps.BULK_DETAIL_MAX_USERNAMES} usernames."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            results = self.model.get_details_many(usernames, fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
             {
-                "id": agent.id,
-                "username": agent.user.username,
-                "full_name": f"{agent.user.first_name} {agent.user.last_name}".strip(),
-                "department": agent.department.name,
-                "is_available": agent.is_available,
-                "served_customers": agent.current_customers,
+                "results": results,
+                "missing": [name for name in usernames if name not in results],
             },
             status=status.HTTP_200_OK,
         )
 
 
-agent_detail = AgentDetailView.as_view()
+class CustomerBulkDetailView(BulkDetailView):
+    """
+    API endpoint for extracting many customers at once.
+
+    Request Method: GET
+
+    URL: /app/customers/details/?usernames=<a,b,...>&fields=<f1,f2,...>
+
+    Responses:
+    - 200 OK: `results` keyed by username and the `missing` usernames.
+    - 400 Bad Request: No or too many usernames, or an unknown field.
+    - 401 Unauthorized: Authentication failed.
+    """
+
+    model = Customer
+
+
+customer_bulk_detail = CustomerBulkDetailView.as_view()
+
+
+class AgentBulkDetailView(BulkDetailView):
+    """
+    API endpoint for extracting many agents at once, e.g. for dashboards.
+
+    Request Method: GET
+
+    URL: /app/agents/details/?usernames=<a,b,...>&fields=<f1,f2,...>
+
+    Responses:
+    - 200 OK: `results` keyed by username and the `missing` usernames.
+    - 400 Bad Request: No or too many usernames, or an unknown field.
+    - 401 Unauthorized: Authentication failed.
+    """
+
+    model = Agent
+
+
+agent_bulk_detail = AgentBulkDetailView.as_view()
 
 
 class TicketCreateView(APIView):
@@ -236,12 +328,112 @@ class TicketCreateView(APIView):
 ticket_create = TicketCreateView.as_view()
 
 
-class TicketAssignview(APIView):
+class TicketStatusView(APIView):
     """
-    API endpoint to assign a ticket to an available agent.
+    API endpoint to read a ticket's assignment and queue position.
+
+    Takes no locks and changes nothing, so it can be polled and served
+    from read replicas; ws/tickets/<id>/ pushes the same data instead.
 
     Request Method: GET
-    URL: /app/ticket/`str:id`/assign/
+    URL: /app/ticket/`str:id`/status
+
+    Path Parameter:
+    - id: Ticket ID.
+
+    Responses:
+    - 200 OK: Customer, agent, status and, while waiting, the position within
+      its priority tier and estimated wait in seconds (None until assignments
+      have been seen).
+    - 401/403: Not authenticated, or not the ticket's customer, agent or staff.
+    - 404 Not Found: Ticket with the given ID does not exist.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, id, format=None):
+        ticket = (
+            Ticket.objects.filter(ticket_id=id)
+            .values(
+                "status",
+                "created_at",
+                "customer__user_id",
+                "customer__user__username",
+                "customer__is_paid",
+                "agent__user_id",
+                "agent__user__username",
+            )
+            .first()
+        )
+        if not ticket:
+            return Response(
+                {"Error": "Invalid ticket id"}, status=status.HTTP_404_NOT_FOUND
+            )
+        if not ticket_events.can_follow(
+            request.user, ticket["customer__user_id"], ticket["agent__user_id"]
+        ):
+            return Response(
+                {"error": "You may not follow this ticket."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        position = tier = None
+        if ticket["status"] == Status.WAITING:
+            tier = ticket_tier(ticket["created_at"], ticket["customer__is_paid"])
+            position = queue_position(
+                id, ticket["created_at"], ticket["customer__is_paid"]
+            )
+        return Response(
+            {
+                "ticket_id": id,
+                "customer": ticket["customer__user__username"],
+                "is_paid": ticket["customer__is_paid"],
+                "agent": ticket["agent__user__username"],
+                "status": ticket["status"],
+                "queue_position": position,
+                "estimated_wait_seconds": wait_estimator.estimate_wait(position, tier),
+            },
+            status=status.HTTP_200_OK,
+            headers={
+                "Cache-Control": f"private, max-age={dumps.TICKET_STATUS_MAX_AGE}"
+            },
+        )
+
+
+ticket_status = TicketStatusView.as_view()
+
+
+class QueueMetricsView(APIView):
+    """
+    API endpoint for the waiting-ticket queue metrics per priority tier.
+
+    Request Method: GET
+    URL: /app/queue/metrics/
+
+    Responses:
+    - 200 OK: Depth, oldest wait and assignment waits of the paid and free tiers.
+    - 403 Forbidden: Only staff can read queue metrics.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(queue_metrics(), status=status.HTTP_200_OK)
+
+
+queue_metrics_view = QueueMetricsView.as_view()
+
+
+class TicketAssignview(APIView):
+    """
+    API endpoint to assign a ticket to an available agent, or queue it.
+
+    Idempotent: an assigned ticket is returned as is, and a ticket that is
+    already queued is neither re-queued nor re-announced to the queue worker.
+    Use GET /app/ticket/`str:id`/status to follow the ticket.
+
+    Request Method: POST
+    URL: /app/ticket/`str:id`/assign
 
     Path Parameter:
     - id: Ticket ID to be assigned.
@@ -251,37 +443,48 @@ class TicketAssignview(APIView):
         - Ticket successfully assigned to an agent.
         - If the ticket is already assigned, returns the current assignment details.
     - 202 Accepted:
-        - Ticket is queued due to no available agents. Returns the queue position.
-    - 400 Bad Request: Invalid ticket ID or no available agent.
+        - Ticket is queued due to no available agents. Returns its position
+          within its priority tier and the estimated wait in seconds.
     - 404 Not Found: Ticket with the given ID does not exist.
     """
 
-    def get(self, request, id, format=None):
+    @staticmethod
+    def assigned(id, ticket):
+        return Response(
+            {
+                "ticket_id": f"{id}",
+                "customer": f"{ticket.customer.user.username}",
+                "is_paid": f"{ticket.customer.is_paid}",
+                "agent": f"{ticket.agent.user.username}",
+                "status": f"{ticket.status}",
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def post(self, request, id, format=None):
         with transaction.atomic():
-            ticket = Ticket.objects.select_for_update().filter(ticket_id=id).first()
-            agent = (
-                Agent.objects.select_for_update()
-                .filter(is_available=True, max_customers__gt=0)
+            ticket = (
+                Ticket.objects.select_for_update(of=("self",))
+                .select_related("customer__user", "agent__user")
+                .filter(ticket_id=id)
                 .first()
             )
-
             if not ticket:
                 return Response(
                     {"Error": "Invalid ticket id"}, status=status.HTTP_404_NOT_FOUND
                 )
 
             if ticket.status == Status.ASSIGNED:
-                return Response(
-                    {
-                        "ticket_id": f"{id}",
-                        "customer": f"{ticket.customer.user.username}",
-                        "is_paid": f"{ticket.customer.is_paid}",
-                        "agent": f"{ticket.agent.user.username}",
-                        "status": f"{ticket.status}",
-                    },
-                    status=status.HTTP_200_OK,
-                )
+                return self.assigned(id, ticket)
 
+            # only lock an agent when there is something to assign, and skip
+            # agents another request is already assigning
+            agent = (
+                Agent.objects.select_for_update(skip_locked=True, of=("self",))
+                .select_related("user")
+                .filter(is_available=True, max_customers__gt=0)
+                .first()
+            )
             if agent and agent.has_capacity:
                 ticket.agent = agent
                 ticket.status = Status.ASSIGNED
@@ -290,31 +493,19 @@ class TicketAssignview(APIView):
                 agent.max_customers -= 1
                 agent.current_customers += 1
                 agent.save()
+                return self.assigned(id, ticket)
 
-                return Response(
-                    {
-                        "ticket_id": f"{id}",
-                        "customer": f"{ticket.customer.user.username}",
-                        "is_paid": f"{ticket.customer.is_paid}",
-                        "agent": f"{ticket.agent.user.username}",
-                        "status": f"{ticket.status}",
-                    },
-                    status=status.HTTP_200_OK,
-                )
             if ticket.queued_at is None:
                 ticket.status = Status.WAITING
                 ticket.queued_at = timezone.now()
                 ticket.save()
-                process_ticket_queue.delay()
-            else:
+                transaction.on_commit(schedule_run)
+            elif ticket.status != Status.WAITING:
                 ticket.status = Status.WAITING
                 ticket.save()
 
-            position = (
-                Ticket.objects.filter(
-                    status=Status.WAITING, created_at__lt=ticket.created_at
-                ).count()
-            ) + 1
+            tier = ticket_tier(ticket.created_at, ticket.customer.is_paid)
+            position = queue_position(id, ticket.created_at, ticket.customer.is_paid)
 
             return Response(
                 {
@@ -324,6 +515,9 @@ class TicketAssignview(APIView):
                     "agent": ticket.agent.user.username if ticket.agent else None,
                     "status": ticket.status,
                     "queue_position": position,
+                    "estimated_wait_seconds": wait_estimator.estimate_wait(
+                        position, tier
+                    ),
                 },
                 status=status.HTTP_202_ACCEPTED,
             )
@@ -383,4 +577,4 @@ class TicketReopen(APIView):
             )
 
 
-ticket_reopen = TicketReopen.as_view()
+ticket_reopen = primary_reads(TicketReopen.as_view())
@@ -6,17 +6,86 @@ and provides methods to check if the rule should be applied and to apply the rul
 The AutoClose class ensures that tickets in a "WAITING" status for a defined number of
 days are closed automatically, helping to manage ticket lifecycles efficiently.
 
+Closing is set-based: `close_stale` picks stale tickets from a partial index
+and closes a whole batch with one UPDATE ... RETURNING whose data-modifying
+CTEs insert the StatusChange, AutoEscalate and TicketEvent rows in the same
+statement. `apply` runs the same statement for its single ticket.
+
 Copyright (c) Supportix. All rights reserved.
 Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
 """
 
+import logging
 from datetime import timedelta
 
+from django.db import connection, transaction
 from django.utils import timezone
 
+from core import ticket_events
 from core.automation.base_rule import BaseRule
-from core.constants import Status
-from core.models import AutoEscalate, Ticket
+from core.constants import Status, StatusCode
+from core.dumps import AUTO_CLOSE_BATCH_SIZE
+from core.models import AutoEscalate, StatusChange, Ticket, TicketEvent
+
+logger = logging.getLogger(__name__)
+
+CLOSE_SQL = f"""
+WITH stale AS (
+    SELECT id FROM {Ticket._meta.db_table}
+    WHERE status = %(waiting)s AND updated_at < %(cutoff)s {{ticket_filter}}
+    ORDER BY updated_at
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+), closed AS (
+    UPDATE {Ticket._meta.db_table} AS ticket
+    SET status = %(closed)s, updated_at = %(now)s
+    FROM stale
+    WHERE ticket.id = stale.id
+    RETURNING ticket.id, ticket.ticket_id, ticket.agent_id
+), status_changes AS (
+    INSERT INTO {StatusChange._meta.db_table}
+        (ticket_id, new_status, updated_at, new_queued_at, new_agent_id)
+    SELECT id, %(closed)s, %(now)s, %(now)s, agent_id FROM closed
+    RETURNING id, ticket_id
+), escalations AS (
+    INSERT INTO {AutoEscalate._meta.db_table} (ticket_id, status_change_id)
+    SELECT ticket_id, id FROM status_changes
+), events AS (
+    INSERT INTO {TicketEvent._meta.db_table}
+        (ticket_id, status, previous_status, agent_id, created_at)
+    SELECT id, %(closed_code)s, %(waiting_code)s, agent_id, %(now)s FROM closed
+)
+SELECT ticket_id FROM closed
+"""
+
+
+def _close(cutoff, limit, ticket_id=None):
+    """
+    Close up to `limit` WAITING tickets last updated before `cutoff` and
+    return their ticket_ids. Rows locked by other transactions are skipped.
+    """
+    params = {
+        "waiting": Status.WAITING,
+        "closed": Status.CLOSED,
+        "waiting_code": StatusCode.WAITING,
+        "closed_code": StatusCode.CLOSED,
+        "cutoff": cutoff,
+        "now": timezone.now(),
+        "limit": limit,
+    }
+    ticket_filter = ""
+    if ticket_id is not None:
+        ticket_filter = "AND ticket_id = %(ticket_id)s"
+        params["ticket_id"] = ticket_id
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(CLOSE_SQL.format(ticket_filter=ticket_filter), params)
+            closed = [row[0] for row in cursor.fetchall()]
+        if closed:
+            # every closed ticket was waiting, so one message tells all queue
+            # subscribers, including the closed tickets' own, to catch up
+            ticket_events.publish_queue_refresh()
+    return closed
 
 
 class AutoClose(BaseRule):
@@ -24,44 +93,52 @@ class AutoClose(BaseRule):
         super().__init__(ticket_id, **kwargs)
         self.inactive_days = kwargs.get("inactive_days", 90)
 
-    def should_apply(self):
-        try:
-            ticket = Ticket.objects.get(ticket_id=self.ticket_id)
-        except Ticket.DoesNotExist:
-            return False
+    @property
+    def cutoff(self):
+        return timezone.now() - timedelta(days=self.inactive_days)
 
-        return (
-            ticket.status == Status.WAITING
-            and ticket.updated_at < timezone.now() - timedelta(days=self.inactive_days)
-        )
+    def should_apply(self):
+        return Ticket.objects.filter(
+            ticket_id=self.ticket_id, status=Status.WAITING, updated_at__lt=self.cutoff
+        ).exists()
 
     def apply(self):
         try:
-            ticket = Ticket.objects.get(ticket_id=self.ticket_id)
-            if not self.should_apply():
+            if _close(self.cutoff, 1, ticket_id=self.ticket_id):
+                return {
+                    "operation": "apply",
+                    "status": "success",
+                    "details": f"Ticket {self.ticket_id} escalated.",
+                }
+            if not Ticket.objects.filter(ticket_id=self.ticket_id).exists():
                 return {
                     "operation": "apply",
                     "status": "failed",
-                    "reason": "condition doesnot meet",
+                    "reason": "Ticket not found",
                 }
-            kwargs = {
-                "ticket_id": ticket,
-                "new_status": Status.CLOSED,
-            }
-            if ticket.agent:
-                kwargs["new_agent"] = ticket.agent
-
-            result = AutoEscalate.escalate_changes(**kwargs)
-            return {
-                "operation": "apply",
-                "status": "success" if result["success"] else "failed",
-                "details": result["message"],
-            }
-        except Ticket.DoesNotExist:
             return {
                 "operation": "apply",
                 "status": "failed",
-                "reason": "Ticket not found",
+                "reason": "condition doesnot meet",
             }
         except Exception as e:
             return {"operation": "apply", "status": "failed", "reason": str(e)}
+
+    @classmethod
+    def close_stale(cls, inactive_days=90, batch_size=AUTO_CLOSE_BATCH_SIZE):
+        """
+        Close every WAITING ticket not updated for `inactive_days`, one short
+        transaction per `batch_size` tickets. Returns the number closed.
+        """
+        cutoff = timezone.now() - timedelta(days=inactive_days)
+        total = 0
+        while True:
+            closed = len(_close(cutoff, batch_size))
+            total += closed
+            if closed < batch_size:
+                break
+        if total:
+            logger.info(
+                f"Auto-closed {total} tickets inactive for {inactive_days} days."
+            )
+        return total
@@ -0,0 +1,230 @@
+"""
+Declarative automation rules.
+
+An AutomationRule is stored data, not code: its conditions are compiled
+into a Django Q filter and its action runs in bulk against every matching
+ticket, so adding a rule needs no deploy and no per-ticket Python loop.
+
+Conditions are JSON, nested freely:
+
+    {"all": [condition, ...]}     every condition holds
+    {"any": [condition, ...]}     at least one holds
+    {"not": condition}
+    {"field": "status", "op": "eq", "value": "waiting"}
+
+For example, close waiting tickets of free customers untouched for a week:
+
+    {"all": [
+        {"field": "status", "op": "eq", "value": "waiting"},
+        {"field": "customer_is_paid", "op": "eq", "value": false},
+        {"field": "updated_at", "op": "older_than", "value": 604800}
+    ]}
+
+Only the fields in FIELDS can be used, each with the ops FIELD_OPS allows
+for its type. `older_than` and `newer_than` take seconds and make a rule
+time-based: such rules are checked against all tickets, as indexed range
+queries, while the others only look at the tickets changed since the last
+rule run. Tickets already in the rule's target state never match, so
+rules can run repeatedly.
+
+Setting a tag leaves updated_at alone: tagging is not activity, so it
+neither resets the inactivity clock AutoClose and `older_than` rules rely
+on nor marks the ticket as changed for the next run.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+
+from core.constants import RuleAction, Status
+from core.dumps import ESCALATION_BATCH_SIZE
+from core.models import AutoEscalate, AutomationRule, Ticket
+
+logger = logging.getLogger(__name__)
+
+# condition field -> Ticket lookup
+FIELDS = {
+    "status": "status",
+    "tag": "tag",
+    "issue_title": "issue_title",
+    "issue_desc": "issue_desc",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "queued_at": "queued_at",
+    "agent": "agent_id",
+    "department": "agent__department_id",
+    "customer_is_paid": "customer__is_paid",
+}
+
+# op -> lookup, negated
+OPS = {
+    "eq": ("exact", False),
+    "ne": ("exact", True),
+    "in": ("in", False),
+    "lt": ("lt", False),
+    "lte": ("lte", False),
+    "gt": ("gt", False),
+    "gte": ("gte", False),
+    "contains": ("icontains", False),
+    "isnull": ("isnull", False),
+}
+# op -> lookup against now - value seconds
+AGE_OPS = {"older_than": "lt", "newer_than": "gte"}
+
+TEXT_OPS = {"eq", "ne", "in", "contains", "isnull"}
+DATE_OPS = {"eq", "ne", "lt", "lte", "gt", "gte", "isnull", *AGE_OPS}
+ID_OPS = {"eq", "ne", "in", "isnull"}
+# condition field -> ops valid for its type
+FIELD_OPS = {
+    "status": TEXT_OPS,
+    "tag": TEXT_OPS,
+    "issue_title": TEXT_OPS,
+    "issue_desc": TEXT_OPS,
+    "created_at": DATE_OPS,
+    "updated_at": DATE_OPS,
+    "queued_at": DATE_OPS,
+    "agent": ID_OPS,
+    "department": ID_OPS,
+    "customer_is_paid": {"eq", "ne"},
+}
+
+
+class RuleError(ValueError):
+    """A rule that cannot be compiled."""
+
+
+def compile_conditions(conditions, now=None):
+    """
+    Compile `conditions` into a Q filter on Ticket. Returns (q, time_based),
+    time_based being True when the filter depends on the current time.
+    """
+    now = now or timezone.now()
+    if not isinstance(conditions, dict):
+        raise RuleError(f"Condition must be an object, got {conditions!r}.")
+
+    if "all" in conditions or "any" in conditions:
+        key = "all" if "all" in conditions else "any"
+        parts = conditions[key]
+        if not isinstance(parts, list) or not parts:
+            raise RuleError(f"'{key}' needs a non-empty list of conditions.")
+        q, time_based = Q(), False
+        for part in parts:
+            part_q, part_time_based = compile_conditions(part, now)
+            q = (q & part_q) if key == "all" else (q | part_q)
+            time_based = time_based or part_time_based
+        return q, time_based
+
+    if "not" in conditions:
+        q, time_based = compile_conditions(conditions["not"], now)
+        return ~q, time_based
+
+    field, op = conditions.get("field"), conditions.get("op")
+    if field not in FIELDS:
+        raise RuleError(f"Unknown field {field!r}.")
+    if "value" not in conditions:
+        raise RuleError(f"Condition on {field!r} has no value.")
+    value = conditions["value"]
+    if op not in OPS and op not in AGE_OPS:
+        raise RuleError(f"Unknown op {op!r}.")
+    if op not in FIELD_OPS[field]:
+        raise RuleError(f"{op!r} does not apply to {field!r}.")
+
+    if op in AGE_OPS:
+        if not isinstance(value, (int, float)) or value < 0:
+            raise RuleError(f"{op!r} takes a number of seconds.")
+        cutoff = now - timedelta(seconds=value)
+        return Q(**{f"{FIELDS[field]}__{AGE_OPS[op]}": cutoff}), True
+
+    lookup, negated = OPS[op]
+    if op == "in" and not isinstance(value, list):
+        raise RuleError("'in' takes a list of values.")
+    if op == "isnull" and not isinstance(value, bool):
+        raise RuleError("'isnull' takes true or false.")
+    q = Q(**{f"{FIELDS[field]}__{lookup}": value})
+    return (~q if negated else q), False
+
+
+def compile_rule(rule, now=None):
+    """
+    Compile `rule` into (q, time_based). The filter excludes tickets the
+    action would not change.
+    """
+    q, time_based = compile_conditions(rule.conditions, now)
+    if rule.action == RuleAction.SET_STATUS:
+        if rule.value not in Status.values:
+            raise RuleError(f"Invalid status {rule.value!r}.")
+        q &= ~Q(status=rule.value)
+    elif rule.action == RuleAction.SET_TAG:
+        q &= Q(tag__isnull=True) | ~Q(tag=rule.value)
+    else:
+        raise RuleError(f"Unknown action {rule.action!r}.")
+    return q, time_based
+
+
+def validate_rule(rule):
+    """
+    Compile `rule` and build its SQL, so values the fields cannot take fail
+    here rather than on every run. Raises RuleError.
+    """
+    q, _ = compile_rule(rule)
+    try:
+        str(Ticket.objects.filter(q).query)
+    except (ValueError, TypeError, ValidationError) as e:
+        raise RuleError(f"Invalid value: {e}")
+
+
+def set_status(tickets, status):
+    changed = 0
+    while ticket_ids := list(
+        tickets.order_by("id").values_list("ticket_id", flat=True)[
+            :ESCALATION_BATCH_SIZE
+        ]
+    ):
+        results = AutoEscalate.escalate_many(
+            [(ticket_id, status, None) for ticket_id in ticket_ids]
+        )
+        succeeded = sum(result["success"] for result in results)
+        changed += succeeded
+        if not succeeded:
+            break
+    return changed
+
+
+def apply_rule(rule, tickets=None, now=None):
+    """
+    Apply `rule` to every matching ticket in `tickets`, all tickets by
+    default. Returns the number of tickets changed.
+    """
+    q, _ = compile_rule(rule, now)
+    tickets = (Ticket.objects.all() if tickets is None else tickets).filter(q)
+    if rule.action == RuleAction.SET_STATUS:
+        return set_status(tickets, rule.value)
+    return tickets.update(tag=rule.value)
+
+
+def run_rules(changed=None):
+    """
+    Apply every active rule in order. Rules that do not depend on the time
+    only look at `changed`, a queryset of the tickets changed since the
+    last run, or at all tickets when it is None.
+    """
+    now = timezone.now()
+    results = []
+    for rule in AutomationRule.objects.filter(is_active=True):
+        try:
+            _, time_based = compile_rule(rule, now)
+            tickets = None if time_based else changed
+            count = apply_rule(rule, tickets, now)
+        except Exception as e:
+            logger.exception(f"Failed to apply rule {rule.name}: {str(e)}")
+            continue
+        if count:
+            logger.info(f"Rule {rule.name} changed {count} tickets.")
+            results.append({"rule": rule.name, "details": {"changed": count}})
+    return results
@@ -17,7 +17,7 @@ Copyright (c) Supportix. All rights reserved.
 Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
 """
 
-from core.models import Ticket, Department, Agent
+from core.models import AutoEscalate, Ticket, Department, Agent
 from core.automation.base_rule import BaseRule
 from core.constants import Status
 from django.db import models
@@ -83,16 +83,24 @@ class Department_merge(BaseRule):
         )
 
         target_agent = Agent.objects.filter(department_id=underload_dept_id).first()
+        if target_agent is None:
+            logger.info(f"No agent in Dept {underload_dept_id} to reassign to.")
+            return
 
         tickets_qs = Ticket.objects.filter(
             status=Status.WAITING, agent__department_id=overload_dept_id
         ).order_by("created_at")
         # extract only id not a tuple
-        ticket_ids = list(tickets_qs.values_list("id", flat=True)[:num_to_move])
+        ticket_ids = list(tickets_qs.values_list("ticket_id", flat=True)[:num_to_move])
 
         if not ticket_ids:
             logger.info("No tickets to reassign.")
             return
 
-        updated = Ticket.objects.filter(id__in=ticket_ids).update(agent=target_agent)
+        # escalate_many logs, pushes and counts every reassignment, which a
+        # queryset update would skip
+        results = AutoEscalate.escalate_many(
+            [(ticket_id, Status.WAITING, target_agent) for ticket_id in ticket_ids]
+        )
+        updated = sum(result["success"] for result in results)
         logger.info(f"Successfully reassigned {updated} tickets.")
@@ -42,8 +42,9 @@ class TagByContent(BaseRule):
                 if not tags:
                     return {"message": "[TagByContent] No tags generated by LLM."}
 
-                ticket.tag = ", ".join(tags)
-                ticket.save()
+                # tagging is not activity, so leave updated_at and with it the
+                # AutoClose inactivity clock alone
+                Ticket.objects.filter(pk=ticket.pk).update(tag=", ".join(tags))
 
                 return {"success": f"[TagByContent] Tags applied: {tags}"}
 
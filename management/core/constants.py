@@ -92,3 +92,81 @@ class ChannelType(models.TextChoices):
     DISCORD = "discord", "Discord"
     SMS = "sms", "SMS"
     WHATSAPP = "whatsapp", "WhatsApp"
+
+
+class UploadKind(models.TextChoices):
+    """Kinds of attachment that can be uploaded through an upload session.
+
+    * FILE: Document attachment stored as a FileAttachment (e.g. `.pdf`).
+    * IMAGE: Picture attachment stored as an ImageAttachment.
+    """
+
+    FILE = "file", "File"
+    IMAGE = "image", "Image"
+
+
+class UploadStatus(models.TextChoices):
+    """Lifecycle of an upload session.
+
+    * PENDING: Session issued, no bytes received yet.
+    * UPLOADING: Chunks are being received by the server.
+    * COMPLETED: The attachment has been recorded.
+    """
+
+    PENDING = "pending", "Pending"
+    UPLOADING = "uploading", "Uploading"
+    COMPLETED = "completed", "Completed"
+
+
+class WebhookStatus(models.TextChoices):
+    """Processing state of a stored Stripe webhook event.
+
+    * PENDING: Received and verified, waiting for the consumer.
+    * PROCESSED: Applied to the payment records.
+    * FAILED: Gave up after STRIPE_EVENT_MAX_ATTEMPTS attempts.
+    """
+
+    PENDING = "pending", "Pending"
+    PROCESSED = "processed", "Processed"
+    FAILED = "failed", "Failed"
+
+
+class QueueTier(models.TextChoices):
+    """Priority tiers of the waiting-ticket queue.
+
+    * PAID: Tickets of paying customers, and tickets that waited longer
+      than QUEUE_AGING_SECONDS.
+    * FREE: Every other waiting ticket.
+    """
+
+    PAID = "paid", "Paid"
+    FREE = "free", "Free"
+
+
+class StatusCode(models.IntegerChoices):
+    """Compact integer codes of Status, used by the ticket event log.
+
+    Codes are stored, so existing ones must never be renumbered.
+    """
+
+    WAITING = 1, "Waiting"
+    ASSIGNED = 2, "Assigned"
+    PROGRESS = 3, "Progress"
+    COMPLETED = 4, "Completed"
+    CLOSED = 5, "Closed"
+
+    @classmethod
+    def of(cls, status):
+        return cls[Status(status).name]
+
+
+class RuleAction(models.TextChoices):
+    """Bulk actions of declarative automation rules.
+
+    * SET_STATUS: Move matching tickets to the status in the rule's value,
+      with the usual escalation audit rows.
+    * SET_TAG: Set the tag of matching tickets to the rule's value.
+    """
+
+    SET_STATUS = "set_status", "Set status"
+    SET_TAG = "set_tag", "Set tag"
@@ -0,0 +1,145 @@
+"""
+Supported Stripe currencies, cached in two tiers.
+
+Reads are served from a process-local copy first and from the shared Redis
+cache second; Stripe is never called on the request path. When the Redis
+value is stale or missing, a single background refresh is scheduled (guarded
+by a cache lock so concurrent misses do not stampede Stripe) and the caller
+is answered with the stale value or, on a cold cache, the bundled list below.
+If Redis itself is unreachable the process-local copy is served even when
+expired, and the bundled list when there is none.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+
+from core import stripe_client
+from core.dumps import (
+    CURRENCY_CACHE_TIMEOUT,
+    CURRENCY_FRESH_SECONDS,
+    CURRENCY_LOCAL_SECONDS,
+    CURRENCY_REFRESH_LOCK_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+CURRENCY_CACHE_KEY = "stripe_supported_currencies"
+CURRENCY_LOCK_KEY = "stripe_supported_currencies:refreshing"
+
+# Stripe presentment currencies, used until the first refresh completes.
+STATIC_CURRENCIES = (
+    "AED", "AFN", "ALL", "AMD", "ANG", "AOA", "ARS", "AUD", "AWG", "AZN",
+    "BAM", "BBD", "BDT", "BGN", "BHD", "BIF", "BMD", "BND", "BOB", "BRL",
+    "BSD", "BWP", "BYN", "BZD", "CAD", "CDF", "CHF", "CLP", "CNY", "COP",
+    "CRC", "CVE", "CZK", "DJF", "DKK", "DOP", "DZD", "EGP", "ETB", "EUR",
+    "FJD", "FKP", "GBP", "GEL", "GIP", "GMD", "GNF", "GTQ", "GYD", "HKD",
+    "HNL", "HTG", "HUF", "IDR", "ILS", "INR", "ISK", "JMD", "JOD", "JPY",
+    "KES", "KGS", "KHR", "KMF", "KRW", "KWD", "KYD", "KZT", "LAK", "LBP",
+    "LKR", "LRD", "LSL", "MAD", "MDL", "MGA", "MKD", "MMK", "MNT", "MOP",
+    "MUR", "MVR", "MWK", "MXN", "MYR", "MZN", "NAD", "NGN", "NIO", "NOK",
+    "NPR", "NZD", "OMR", "PAB", "PEN", "PGK", "PHP", "PKR", "PLN", "PYG",
+    "QAR", "RON", "RSD", "RUB", "RWF", "SAR", "SBD", "SCR", "SEK", "SGD",
+    "SHP", "SLE", "SOS", "SRD", "STD", "SZL", "THB", "TJS", "TND", "TOP",
+    "TRY", "TTD", "TWD", "TZS", "UAH", "UGX", "USD", "UYU", "UZS", "VND",
+    "VUV", "WST", "XAF", "XCD", "XOF", "XPF", "YER", "ZAR", "ZMW",
+)  # fmt: skip
+
+# (expires_at, currencies) for this process, read without touching Redis.
+_local = {}
+
+
+def _remember(currencies):
+    _local["value"] = (time.monotonic() + CURRENCY_LOCAL_SECONDS, currencies)
+
+
+def fetch_supported_currencies():
+    """
+    Page through Stripe's CountrySpec list and return every currency it can
+    accept, sorted and upper-cased. This is slow and only runs in the
+    background refresh.
+    """
+    currency_set = set()
+    for spec in stripe_client.list_country_specs():
+        currency_set.update(c.upper() for c in spec.supported_payment_currencies)
+    return sorted(currency_set)
+
+
+def refresh_supported_currencies():
+    """
+    Fetch the currency list from Stripe and publish it to both cache tiers.
+    The refresh lock is released whether or not the fetch succeeds.
+    """
+    try:
+        currencies = fetch_supported_currencies()
+        if not currencies:
+            raise ValueError("Stripe returned no supported currencies.")
+        cache.set(
+            CURRENCY_CACHE_KEY,
+            {"currencies": currencies, "fetched_at": time.time()},
+            timeout=CURRENCY_CACHE_TIMEOUT,
+        )
+        _remember(currencies)
+        logger.info(f"Refreshed {len(currencies)} supported currencies.")
+        return currencies
+    finally:
+        cache.delete(CURRENCY_LOCK_KEY)
+
+
+def schedule_refresh():
+    """
+    Queue one background refresh. Returns False when a refresh is already
+    in flight.
+    """
+    try:
+        if not cache.add(CURRENCY_LOCK_KEY, 1, timeout=CURRENCY_REFRESH_LOCK_SECONDS):
+            return False
+    except Exception as e:
+        # the beat refresh runs once Redis is back
+        logger.warning(f"Could not schedule currency refresh: {e}")
+        return False
+
+    from core.tasks import refresh_currencies
+
+    try:
+        refresh_currencies.delay()
+    except Exception as e:
+        cache.delete(CURRENCY_LOCK_KEY)
+        logger.warning(f"Could not schedule currency refresh: {e}")
+        return False
+    return True
+
+
+def get_supported_currencies():
+    """
+    Returns a sorted list of all currencies Stripe can accept, without ever
+    waiting on Stripe.
+    """
+    entry = _local.get("value")
+    if entry and entry[0] > time.monotonic():
+        return list(entry[1])
+
+    try:
+        cached = cache.get(CURRENCY_CACHE_KEY)
+    except Exception as e:
+        # Redis is down: keep this process's last value, even expired, or
+        # the bundled list, and look again after CURRENCY_LOCAL_SECONDS
+        logger.warning(f"Currency cache unavailable: {e}")
+        currencies = entry[1] if entry else list(STATIC_CURRENCIES)
+        _remember(currencies)
+        return list(currencies)
+
+    if cached is None:
+        schedule_refresh()
+        currencies = list(STATIC_CURRENCIES)
+    else:
+        if time.time() - cached["fetched_at"] > CURRENCY_FRESH_SECONDS:
+            schedule_refresh()
+        currencies = cached["currencies"]
+
+    _remember(currencies)
+    return list(currencies)
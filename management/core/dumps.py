@@ -29,6 +29,47 @@ ImageAttachmentExt = [
 FileAttachmentExt = [".pdf"]
 FileAttachmentSize = 20 * 1024 * 1024  #20 mb
 ImageAttachmentSize = 5 * 1024 * 1024 # 5 mb
+ImageAttachmentMaxDimension = 8192  # pixels per side
 OVERLOAD_THRESHOLD = 50
 UNDERUTILIZED_THRESHOLD = 10
 BATCH_SIZE = 100
+MESSAGE_PREVIEW_LENGTH = 100
+CHAT_HOT_RETENTION_DAYS = 90
+CHAT_ARCHIVE_BATCH_SIZE = 5000
+UPLOAD_SESSION_TTL_MINUTES = 30
+UPLOAD_STREAM_CHUNK_SIZE = 64 * 1024
+UPLOAD_SESSION_LOCK_SECONDS = 10 * 60  # longest a chunk write or completion may take
+ImageThumbnailSize = 320  # pixels, longest side
+ImageWebpMaxSize = 1280  # pixels, longest side
+ImageWebpQuality = 80
+CURRENCY_LOCAL_SECONDS = 60  # process-local copy
+CURRENCY_FRESH_SECONDS = 60 * 60  # refresh from Stripe after an hour
+CURRENCY_CACHE_TIMEOUT = 7 * 24 * 60 * 60  # keep serving stale data meanwhile
+CURRENCY_REFRESH_LOCK_SECONDS = 5 * 60
+STRIPE_EVENT_BATCH_SIZE = 100
+STRIPE_EVENT_MAX_ATTEMPTS = 5
+STRIPE_TIMEOUT_SECONDS = 10  # read timeout per attempt
+STRIPE_CONNECT_TIMEOUT_SECONDS = 3
+STRIPE_MAX_NETWORK_RETRIES = 2
+STRIPE_POOL_SIZE = 10  # keep-alive connections per process
+STRIPE_SLOW_CALL_SECONDS = 2
+REPLICA_MAX_LAG_SECONDS = 5  # stop reading from a replica further behind
+REPLICA_LAG_CHECK_SECONDS = 2
+REPLICA_STICKY_SECONDS = 10  # read from the primary after a client wrote
+PROFILE_CACHE_TIMEOUT = 5 * 60
+BULK_DETAIL_MAX_USERNAMES = 200
+TICKET_STATUS_MAX_AGE = 2  # seconds a client may reuse a ticket status
+QUEUE_DEBOUNCE_SECONDS = 2  # enqueues within this window share one queue run
+QUEUE_PENDING_TIMEOUT = 60  # forget a scheduled run that never started
+QUEUE_RUN_LOCK_SECONDS = 5 * 60
+# share of assignments each queue tier gets while both are waiting
+QUEUE_TIER_WEIGHTS = {"paid": 3, "free": 1}
+QUEUE_AGING_SECONDS = 10 * 60  # free tickets waiting longer are served as paid
+QUEUE_WAIT_SAMPLES = 1000  # recent waits kept per tier for the percentiles
+ETA_RATE_DECAY_SECONDS = 30 * 60  # assignment rate is averaged over ~30 minutes
+QUEUE_SLA_SECONDS = 15 * 60  # alert when queued tickets would wait longer
+TICKET_EVENT_BATCH_SIZE = 500
+ESCALATION_BATCH_SIZE = 500
+AUTO_CLOSE_INACTIVE_DAYS = 1
+AUTO_CLOSE_BATCH_SIZE = 5000  # tickets closed per statement and transaction
+RULES_WATERMARK_OVERLAP = 5 * 60  # seconds re-checked before the last rule run
@@ -0,0 +1,82 @@
+"""
+Measure request latency with and without database connection reuse.
+
+Requests are replayed in-process against `/health/` (or `--path`) with the
+same connection handling as a real request: stale connections are closed
+when a request starts and finishes. The baseline run sets CONN_MAX_AGE=0,
+so every request opens a new Postgres connection. The second run uses the
+configured settings.
+
+    python manage.py bench_db_connections --requests 500
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+
+
+class Command(BaseCommand):
+    help = "Compare request latency with and without database connection reuse."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--path", default="/health/")
+
+    def run(self, client, path, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            close_old_connections()
+            response = client.get(path, HTTP_HOST=self.host)
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                raise CommandError(f"{path} returned {response.status_code}.")
+        timings.sort()
+        return {
+            "mean": statistics.fmean(timings),
+            "p50": timings[len(timings) // 2],
+            "p95": timings[int(len(timings) * 0.95) - 1],
+        }
+
+    def handle(self, *args, **options):
+        if "pool" in connection.settings_dict.get("OPTIONS", {}):
+            raise CommandError(
+                "The psycopg pool cannot be switched off at runtime; run the "
+                "benchmark once with DB_POOL=psycopg and once with DB_CONN_MAX_AGE=0."
+            )
+        self.host = next(
+            (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+            "localhost",
+        )
+        client = Client()
+        configured = connection.settings_dict["CONN_MAX_AGE"]
+        count = options["requests"]
+        path = options["path"]
+
+        results = []
+        try:
+            for label, max_age in (
+                ("new connection per request", 0),
+                (f"CONN_MAX_AGE={configured} ({settings.DB_POOL})", configured),
+            ):
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                self.run(client, path, min(count, 10))  # warm up
+                results.append((label, self.run(client, path, count)))
+        finally:
+            connection.settings_dict["CONN_MAX_AGE"] = configured
+
+        self.stdout.write(f"{count} requests to {path}, latency in ms")
+        for label, stats in results:
+            self.stdout.write(
+                f"  {label:<40} mean {stats['mean']:7.2f}  "
+                f"p50 {stats['p50']:7.2f}  p95 {stats['p95']:7.2f}"
+            )
@@ -0,0 +1,126 @@
+"""
+Simulate the waiting-ticket queue at saturation and report waits per tier.
+
+Tickets arrive every second (Poisson, `--load` tickets per agent slot on
+average, `--paid-share` of them from paying customers) and one agent slot
+frees up per second. The same arrivals are replayed against plain FIFO,
+strict priority, and the weighted fair queuing with aging that
+core.ticket_queue uses, so the policies can be compared side by side.
+Nothing touches the database.
+
+    python manage.py bench_ticket_queue --seconds 20000 --load 1.0
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import math
+import random
+from collections import deque
+
+from django.core.management.base import BaseCommand
+
+from core.constants import QueueTier
+from core.dumps import QUEUE_AGING_SECONDS, QUEUE_TIER_WEIGHTS
+from core.ticket_queue import TierScheduler, percentile
+
+PAID, FREE = QueueTier.PAID, QueueTier.FREE
+
+
+def poisson(rng, rate):
+    # Knuth's method, fine for the small per-second rates simulated here
+    limit, count, product = math.exp(-rate), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def fifo(queues, aged, scheduler, now):
+    candidates = [queue for queue in (queues[PAID], queues[FREE]) if queue]
+    return min(candidates, key=lambda queue: queue[0])
+
+
+def strict_priority(queues, aged, scheduler, now):
+    return queues[PAID] or queues[FREE]
+
+
+def weighted_fair(queues, aged, scheduler, now):
+    # aged free tickets join the paid tier, oldest first
+    free = queues[FREE]
+    while free and now - free[0] >= QUEUE_AGING_SECONDS:
+        aged.append(free.popleft())
+
+    paid_tier = [queue for queue in (queues[PAID], aged) if queue]
+    ready = ([PAID] if paid_tier else []) + ([FREE] if free else [])
+    if scheduler.pick(ready) == FREE:
+        return free
+    return min(paid_tier, key=lambda queue: queue[0])
+
+
+POLICIES = {
+    "fifo": fifo,
+    "strict priority": strict_priority,
+    "weighted fair + aging": weighted_fair,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare per-tier queue waits of ticket assignment policies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=int, default=20000)
+        parser.add_argument(
+            "--load", type=float, default=1.0, help="Arrivals per agent slot."
+        )
+        parser.add_argument("--paid-share", type=float, default=0.3)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def simulate(self, policy, arrivals):
+        queues = {PAID: deque(), FREE: deque()}
+        aged = deque()
+        tiers = {}  # arrival time -> tier, arrival times are unique
+        waits = {PAID: [], FREE: []}
+        scheduler = TierScheduler(QUEUE_TIER_WEIGHTS)
+        for now, tickets in enumerate(arrivals):
+            for n, tier in enumerate(tickets):
+                arrived = now + n / len(tickets)
+                tiers[arrived] = tier
+                queues[tier].append(arrived)
+            if queues[PAID] or queues[FREE] or aged:
+                arrived = policy(queues, aged, scheduler, now).popleft()
+                waits[tiers.pop(arrived)].append(now - arrived)
+        left = {tier: len(queue) for tier, queue in queues.items()}
+        left[FREE] += len(aged)
+        return waits, left
+
+    @staticmethod
+    def percentile(values, fraction):
+        value = percentile(values, fraction)
+        return float("nan") if value is None else value
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        arrivals = [
+            [
+                PAID if rng.random() < options["paid_share"] else FREE
+                for _ in range(poisson(rng, options["load"]))
+            ]
+            for _ in range(options["seconds"])
+        ]
+
+        self.stdout.write(
+            f"{options['seconds']}s at load {options['load']}, "
+            f"{options['paid_share']:.0%} paid, weights {QUEUE_TIER_WEIGHTS}, "
+            f"aging after {QUEUE_AGING_SECONDS}s; waits in seconds"
+        )
+        for label, policy in POLICIES.items():
+            waits, left = self.simulate(policy, arrivals)
+            self.stdout.write(f"  {label}")
+            for tier in (PAID, FREE):
+                self.stdout.write(
+                    f"    {tier:<5} served {len(waits[tier]):6d}  "
+                    f"p50 {self.percentile(waits[tier], 0.5):8.1f}  "
+                    f"p99 {self.percentile(waits[tier], 0.99):8.1f}  "
+                    f"still waiting {left[tier]:5d}"
+                )
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:15
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_TRIGGER_SQL = """
+CREATE FUNCTION core_ticket_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.issue_title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.issue_desc, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_ticket_search_vector_update
+BEFORE INSERT OR UPDATE OF issue_title, issue_desc ON core_ticket
+FOR EACH ROW EXECUTE FUNCTION core_ticket_search_vector_update();
+
+UPDATE core_ticket SET issue_title = issue_title;
+"""
+
+DROP_SEARCH_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS core_ticket_search_vector_update ON core_ticket;
+DROP FUNCTION IF EXISTS core_ticket_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_paymentdetails"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="core_ticket_search__815179_gin"
+            ),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, DROP_SEARCH_TRIGGER_SQL),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def backfill_billing_summaries(apps, schema_editor):
+    BillingSummary = apps.get_model("core", "BillingSummary")
+    PaymentDetails = apps.get_model("core", "PaymentDetails")
+    verified = PaymentDetails.objects.filter(payment_verified=True)
+    totals = verified.values("user_id").annotate(
+        total=Sum("amount"), count=Count("id"), last=Max("created_at")
+    )
+    summaries = []
+    for row in totals:
+        last = verified.filter(user_id=row["user_id"]).order_by("-created_at").first()
+        summaries.append(
+            BillingSummary(
+                user_id=row["user_id"],
+                total_paid=row["total"],
+                verified_count=row["count"],
+                last_payment_at=row["last"],
+                last_payment_amount=last.amount,
+            )
+        )
+    BillingSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_stripeevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillingSummary",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="billing_summary",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "total_paid",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("verified_count", models.PositiveIntegerField(default=0)),
+                ("last_payment_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "last_payment_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="paymentdetails",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="core_paymen_user_id_2d73aa_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_billing_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_billingsummary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["status", "created_at"], name="core_ticket_status_9c2a43_idx"
+            ),
+        ),
+    ]
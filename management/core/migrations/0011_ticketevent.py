@@ -0,0 +1,146 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:04
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# one event per existing ticket, so the current state covers every ticket
+BACKFILL_EVENTS = """
+INSERT INTO core_ticketevent (ticket_id, status, agent_id, created_at)
+SELECT id,
+       CASE status
+           WHEN 'waiting' THEN 1
+           WHEN 'assigned' THEN 2
+           WHEN 'progress' THEN 3
+           WHEN 'completed' THEN 4
+           WHEN 'closed' THEN 5
+       END,
+       agent_id,
+       COALESCE(updated_at, created_at)
+FROM core_ticket
+ORDER BY COALESCE(updated_at, created_at)
+"""
+
+CREATE_CURRENT_STATE = """
+CREATE MATERIALIZED VIEW core_ticket_current_state AS
+SELECT DISTINCT ON (ticket_id)
+       ticket_id,
+       status,
+       agent_id,
+       created_at AS changed_at,
+       count(*) OVER (PARTITION BY ticket_id) AS transitions
+FROM core_ticketevent
+ORDER BY ticket_id, id DESC;
+-- REFRESH ... CONCURRENTLY needs a unique index
+CREATE UNIQUE INDEX core_ticket_current_state_ticket
+    ON core_ticket_current_state (ticket_id);
+CREATE INDEX core_ticket_current_state_status
+    ON core_ticket_current_state (status);
+"""
+
+DROP_CURRENT_STATE = "DROP MATERIALIZED VIEW IF EXISTS core_ticket_current_state;"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_ticket_status_created_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketCurrentState",
+            fields=[
+                (
+                    "ticket",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="core.ticket",
+                    ),
+                ),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Waiting"),
+                            (2, "Assigned"),
+                            (3, "Progress"),
+                            (4, "Completed"),
+                            (5, "Closed"),
+                        ]
+                    ),
+                ),
+                ("changed_at", models.DateTimeField()),
+                ("transitions", models.PositiveIntegerField()),
+            ],
+            options={
+                "db_table": "core_ticket_current_state",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="TicketEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Waiting"),
+                            (2, "Assigned"),
+                            (3, "Progress"),
+                            (4, "Completed"),
+                            (5, "Closed"),
+                        ]
+                    ),
+                ),
+                (
+                    "previous_status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Waiting"),
+                            (2, "Assigned"),
+                            (3, "Progress"),
+                            (4, "Completed"),
+                            (5, "Closed"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "agent",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="core.agent",
+                    ),
+                ),
+                (
+                    "ticket",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="events",
+                        to="core.ticket",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.BrinIndex(
+                        fields=["created_at"], name="core_ticket_created_ddf820_brin"
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_EVENTS, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_CURRENT_STATE, DROP_CURRENT_STATE),
+    ]
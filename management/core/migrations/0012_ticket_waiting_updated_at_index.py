@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_ticketevent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("status", "waiting")),
+                fields=["updated_at"],
+                name="ticket_waiting_updated_at_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_ticket_waiting_updated_at_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["updated_at"], name="core_ticket_updated_109a6f_idx"
+            ),
+        ),
+    ]
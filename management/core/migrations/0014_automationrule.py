@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_ticket_updated_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AutomationRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("order", models.PositiveSmallIntegerField(default=0)),
+                ("conditions", models.JSONField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("set_status", "Set status"), ("set_tag", "Set tag")],
+                        max_length=20,
+                    ),
+                ),
+                ("value", models.CharField(max_length=100)),
+            ],
+            options={
+                "ordering": ["order", "id"],
+            },
+        ),
+    ]
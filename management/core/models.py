@@ -20,12 +20,59 @@ Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Trim
 from django.forms import model_to_dict
 from django.utils import timezone
 
-from core.constants import Role, Status
-from core.dumps import CONTEXT_403
+from core.constants import Role, RuleAction, Status, StatusCode, WebhookStatus
+from core.dumps import CONTEXT_403, ESCALATION_BATCH_SIZE
+
+
+def _details(queryset, detail_fields, fields=None):
+    """
+    (username, details) of every profile in `queryset`, in one joined query.
+    `detail_fields` maps each output field to a model lookup or an
+    expression; only the requested `fields` (all by default) are selected.
+    """
+    fields = list(detail_fields) if fields is None else list(fields)
+    unknown = set(fields) - set(detail_fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+
+    # annotation names may not clash with model fields, hence the prefix
+    expressions = {"detail_key": F("user__username")}
+    for name in fields:
+        lookup = detail_fields[name]
+        expressions[f"detail_{name}"] = F(lookup) if isinstance(lookup, str) else lookup
+
+    return [
+        (row["detail_key"], {name: row[f"detail_{name}"] for name in fields})
+        for row in queryset.values(**expressions)
+    ]
+
+
+def _bulk_details(queryset, detail_fields, usernames, fields=None):
+    """Details of the profiles of `usernames`, keyed by username."""
+    return dict(
+        _details(
+            queryset.filter(user__username__in=set(usernames)), detail_fields, fields
+        )
+    )
+
+
+def _detail(queryset, detail_fields, pk):
+    """Details of the profile `pk`, or None if it does not exist."""
+    rows = _details(queryset.filter(pk=pk), detail_fields)
+    return rows[0][1] if rows else None
+
+
+def _full_name():
+    return Trim(Concat("user__first_name", Value(" "), "user__last_name"))
 
 
 class User(AbstractUser):
@@ -66,6 +113,15 @@ class Customer(models.Model):
     solved_issues = models.PositiveIntegerField(default=0)
     is_paid = models.BooleanField(default=False)
 
+    # shared by the bulk and the cached single-profile endpoints
+    DETAIL_FIELDS = {
+        "id": "id",
+        "username": "user__username",
+        "full_name": _full_name(),
+        "is_paid": "is_paid",
+        "raise_issue": "solved_issues",
+    }
+
     @classmethod
     def get_details(cls, username):
         try:
@@ -77,6 +133,19 @@ class Customer(models.Model):
         except cls.DoesNotExist:
             return None
 
+    @classmethod
+    def get_details_many(cls, usernames, fields=None):
+        """
+        Details of many customers in one query, keyed by username. Unknown
+        usernames are left out; unknown `fields` raise ValueError.
+        """
+        return _bulk_details(cls.objects.all(), cls.DETAIL_FIELDS, usernames, fields)
+
+    @classmethod
+    def detail(cls, pk):
+        """Details of the customer `pk`, or None if it does not exist."""
+        return _detail(cls.objects.all(), cls.DETAIL_FIELDS, pk)
+
     def save(self, *args, **kwargs):
         if not self.user.is_customer():
             raise ValueError(
@@ -103,6 +172,16 @@ class Agent(models.Model):
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # shared by the bulk and the cached single-profile endpoints
+    DETAIL_FIELDS = {
+        "id": "id",
+        "username": "user__username",
+        "full_name": _full_name(),
+        "department": "department__name",
+        "is_available": "is_available",
+        "served_customers": "current_customers",
+    }
+
     @property
     def has_capacity(self) -> property:
         return self.current_customers < self.max_customers
@@ -127,6 +206,19 @@ class Agent(models.Model):
         except cls.DoesNotExist:
             return {"error": "Agent not found."}
 
+    @classmethod
+    def get_details_many(cls, usernames, fields=None):
+        """
+        Details of many agents in one query, keyed by username. Unknown
+        usernames are left out; unknown `fields` raise ValueError.
+        """
+        return _bulk_details(cls.objects.all(), cls.DETAIL_FIELDS, usernames, fields)
+
+    @classmethod
+    def detail(cls, pk):
+        """Details of the agent `pk`, or None if it does not exist."""
+        return _detail(cls.objects.all(), cls.DETAIL_FIELDS, pk)
+
     def save(self, *args, **kwargs):
         if not self.user.is_agent():
             raise ValueError("Only users with role='agent' can have an Agent profile.")
@@ -153,6 +245,23 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, blank=True)
     queued_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by a database trigger, see migration 0007.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"]),
+            # queue order and queue positions
+            models.Index(fields=["status", "created_at"]),
+            # tickets changed since the last rule run
+            models.Index(fields=["updated_at"]),
+            # stale waiting tickets for AutoClose
+            models.Index(
+                fields=["updated_at"],
+                name="ticket_waiting_updated_at_idx",
+                condition=models.Q(status=Status.WAITING),
+            ),
+        ]
 
     @classmethod
     def get_ticket_details(cls, ticket_id):
@@ -165,6 +274,18 @@ class Ticket(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
+    def remember_state(self):
+        """
+        Baseline the post_save hooks in core.signals compare against to tell
+        a status or agent change from any other save. Reads __dict__ so
+        deferred fields are not loaded just for this.
+        """
+        self._saved_state = (self.__dict__.get("status"), self.__dict__.get("agent_id"))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_state()
+
     def __str__(self):
         return self.ticket_id or f"TID-{self.pk}"
 
@@ -198,27 +319,160 @@ class AutoEscalate(models.Model):
     @classmethod
     def escalate_changes(cls, ticket_id, new_status, new_agent=None):
         try:
-            ticket = Ticket.objects.get(ticket_id=ticket_id)
-            status_change = StatusChange.objects.create(
-                ticket=ticket,
-                new_status=new_status,
-                new_agent=new_agent,
-                new_queued_at=timezone.now(),  # this line need refactor: should be none or other option: need investigation
-            )
-            cls.objects.create(ticket=ticket, status_change=status_change)
-            ticket.status = new_status
-            if new_agent:
-                ticket.agent = new_agent
-            ticket.save()
-            return {"success": True, "message": f"Ticket {ticket_id} escalated."}
-        except Ticket.DoesNotExist:
-            return {
-                "success": False,
-                "message": f"Ticket series {ticket_id} not found.",
-            }
+            return cls.escalate_many([(ticket_id, new_status, new_agent)])[0]
         except Exception as e:
             return {"success": False, "message": f"Error during escalation: {str(e)}"}
 
+    @classmethod
+    def escalate_many(cls, changes):
+        """
+        Apply many (ticket_id, new_status, new_agent) changes in one short
+        transaction: the tickets are locked with one query, StatusChange and
+        AutoEscalate rows are bulk inserted and the tickets bulk updated.
+
+        Returns one result per change, in order. Unknown tickets and invalid
+        statuses fail on their own; database errors abort the whole batch.
+        """
+        from core import ticket_log
+        from core.signals import ticket_changed
+
+        changes = [
+            (getattr(ticket_id, "ticket_id", ticket_id), new_status, new_agent)
+            for ticket_id, new_status, new_agent in changes
+        ]
+        now = timezone.now()
+        results, status_changes = [], []
+        with transaction.atomic(), ticket_log.buffered():
+            tickets = Ticket.objects.select_for_update().in_bulk(
+                {ticket_id for ticket_id, _, _ in changes}, field_name="ticket_id"
+            )
+            for ticket_id, new_status, new_agent in changes:
+                ticket = tickets.get(ticket_id)
+                if ticket is None:
+                    results.append(
+                        {
+                            "success": False,
+                            "message": f"Ticket series {ticket_id} not found.",
+                        }
+                    )
+                    continue
+                if new_status not in Status.values:
+                    results.append(
+                        {
+                            "success": False,
+                            "message": f"Invalid status {new_status} for {ticket_id}.",
+                        }
+                    )
+                    continue
+
+                status_changes.append(
+                    StatusChange(
+                        ticket=ticket,
+                        new_status=new_status,
+                        new_agent=new_agent,
+                        new_queued_at=now,  # this line need refactor: should be none or other option: need investigation
+                    )
+                )
+                ticket.status = new_status
+                if new_agent:
+                    ticket.agent = new_agent
+                ticket.updated_at = now
+                results.append(
+                    {"success": True, "message": f"Ticket {ticket_id} escalated."}
+                )
+
+            StatusChange.objects.bulk_create(
+                status_changes, batch_size=ESCALATION_BATCH_SIZE
+            )
+            cls.objects.bulk_create(
+                [
+                    cls(ticket=change.ticket, status_change=change)
+                    for change in status_changes
+                ],
+                batch_size=ESCALATION_BATCH_SIZE,
+            )
+            changed = list(
+                {change.ticket.pk: change.ticket for change in status_changes}.values()
+            )
+            Ticket.objects.bulk_update(
+                changed,
+                ["status", "agent", "updated_at"],
+                batch_size=ESCALATION_BATCH_SIZE,
+            )
+            # bulk_update sends no post_save, so run its side effects here
+            for ticket in changed:
+                previous_status, previous_agent_id = ticket._saved_state
+                if (previous_status, previous_agent_id) != (
+                    ticket.status,
+                    ticket.agent_id,
+                ):
+                    ticket_changed(ticket, previous_status)
+                ticket.remember_state()
+        return results
+
+
+class TicketEvent(models.Model):
+    """
+    Append-only log of ticket status and agent changes, written by a
+    post_save hook for every transition (see core.ticket_log). Statuses are
+    stored as StatusCode and rows are never updated or deleted, so the
+    ticket and agent references carry no constraint and outlive them.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="events",
+    )
+    status = models.PositiveSmallIntegerField(choices=StatusCode.choices)
+    previous_status = models.PositiveSmallIntegerField(
+        choices=StatusCode.choices, null=True
+    )
+    agent = models.ForeignKey(
+        Agent,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # rows arrive in time order, so a BRIN index stays tiny
+        indexes = [BrinIndex(fields=["created_at"])]
+
+
+class TicketCurrentState(models.Model):
+    """
+    Latest logged state of every ticket, a materialized view over
+    TicketEvent for analytics (see migration 0011). Refreshed by the
+    refresh_ticket_state task, so it lags the live tables a little.
+    """
+
+    ticket = models.OneToOneField(
+        Ticket,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name="+",
+    )
+    status = models.PositiveSmallIntegerField(choices=StatusCode.choices)
+    agent = models.ForeignKey(
+        Agent,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    changed_at = models.DateTimeField()
+    transitions = models.PositiveIntegerField()
+
+    class Meta:
+        managed = False
+        db_table = "core_ticket_current_state"
+
 
 class PaymentDetails(models.Model):
     user = models.ForeignKey(
@@ -234,5 +488,117 @@ class PaymentDetails(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_at", "-id"])]
+
     def __str__(self):
         return f"{self.user} : {self.amount} ({'✓' if self.payment_verified else '✗'})"
+
+
+class BillingSummary(models.Model):
+    """
+    Running totals of a user's verified payments, maintained as payments are
+    verified so billing pages never aggregate the payment history.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="billing_summary",
+    )
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    verified_count = models.PositiveIntegerField(default=0)
+    last_payment_at = models.DateTimeField(null=True, blank=True)
+    last_payment_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def record_payment(cls, payment):
+        """
+        Add a newly verified payment to its user's summary and mark the
+        customer as paid, invalidating their cached profile. Must be called
+        once per payment.
+        """
+        cls.objects.get_or_create(user_id=payment.user_id)
+        summary = cls.objects.filter(user_id=payment.user_id)
+        summary.update(
+            total_paid=F("total_paid") + payment.amount,
+            verified_count=F("verified_count") + 1,
+            updated_at=timezone.now(),
+        )
+        summary.filter(
+            Q(last_payment_at__isnull=True) | Q(last_payment_at__lte=payment.created_at)
+        ).update(last_payment_at=payment.created_at, last_payment_amount=payment.amount)
+        from core import profile_cache
+
+        # a queryset update sends no post_save, so bump the profile here
+        customers = Customer.objects.filter(user_id=payment.user_id, is_paid=False)
+        customer_ids = list(customers.values_list("id", flat=True))
+        if customer_ids:
+            customers.update(is_paid=True)
+            profile_cache.bump(profile_cache.CUSTOMER, customer_ids)
+
+    def __str__(self):
+        return f"{self.user}: {self.total_paid} over {self.verified_count} payments"
+
+
+class StripeEvent(models.Model):
+    """
+    Inbox of verified Stripe webhook events.
+
+    The webhook view only stores the raw event and returns; the unique
+    `event_id` makes Stripe's retries no-ops. Events are applied later, in
+    `created` order, by `core.webhooks.process_pending_events`.
+    """
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payment_intent_id = models.CharField(max_length=255, blank=True, db_index=True)
+    payload = models.JSONField()
+    created = models.DateTimeField(help_text="When Stripe created the event.")
+    status = models.CharField(
+        max_length=10, choices=WebhookStatus.choices, default=WebhookStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created", "id"])]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
+class AutomationRule(models.Model):
+    """
+    A declarative automation rule: `conditions` on ticket fields and one
+    bulk `action`. Rules are compiled into a Q filter and applied to the
+    whole matching queryset at once, see core.automation.declarative for
+    the condition format.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    is_active = models.BooleanField(default=True)
+    order = models.PositiveSmallIntegerField(default=0)
+    conditions = models.JSONField()
+    action = models.CharField(max_length=20, choices=RuleAction.choices)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ["order", "id"]
+
+    def clean(self):
+        from core.automation.declarative import RuleError, validate_rule
+
+        try:
+            validate_rule(self)
+        except RuleError as e:
+            raise ValidationError(str(e))
+
+    def __str__(self):
+        return self.name
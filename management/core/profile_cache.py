@@ -0,0 +1,89 @@
+"""
+Versioned cache for customer and agent detail payloads.
+
+Every profile has a version number in the cache. The payload is stored
+under a key that includes that version, and the ETag is derived from it.
+A save of the profile, its user or its department bumps the version once
+the transaction commits, so stale payloads are never read again and are
+left to expire. A client presenting the current ETag is answered without
+touching the database.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.dumps import PROFILE_CACHE_TIMEOUT
+from core.models import Agent, Customer
+
+CUSTOMER = "customer"
+AGENT = "agent"
+
+# versions never expire on their own, so they always outlive the payloads
+# cached under them (PROFILE_CACHE_TIMEOUT); they are only ever bumped
+VERSION_TIMEOUT = None
+
+
+def version_key(kind, pk):
+    return f"profile:{kind}:{pk}:version"
+
+
+def get_version(kind, pk):
+    """
+    Current version of a profile. A missing version (never set, or evicted)
+    starts from the clock so it cannot repeat an ETag handed out earlier.
+    """
+    key = version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump(kind, pks):
+    """
+    Invalidate the cached payloads of `pks` after the current transaction
+    commits, so a concurrent reader cannot cache the pre-commit state under
+    the new version.
+    """
+    keys = [version_key(kind, pk) for pk in pks]
+    if not keys:
+        return
+
+    def _bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+
+    transaction.on_commit(_bump)
+
+
+def etag(kind, pk):
+    return f"{kind}-{pk}-{get_version(kind, pk)}"
+
+
+def _cached(kind, pk, load):
+    key = f"profile:{kind}:{pk}:{get_version(kind, pk)}"
+    data = cache.get(key)
+    if data is None:
+        data = load(pk)
+        if data is not None:
+            cache.set(key, data, timeout=PROFILE_CACHE_TIMEOUT)
+    return data
+
+
+def customer_detail(pk):
+    """Detail payload of a customer, or None if it does not exist."""
+    return _cached(CUSTOMER, pk, Customer.detail)
+
+
+def agent_detail(pk):
+    """Detail payload of an agent, or None if it does not exist."""
+    return _cached(AGENT, pk, Agent.detail)
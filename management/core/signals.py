@@ -0,0 +1,87 @@
+"""
+Signal receivers for the core app.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core import profile_cache, ticket_events, ticket_log, wait_estimator
+from core.constants import Status
+from core.models import Agent, Customer, Department, Ticket, User
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer(sender, instance, **kwargs):
+    profile_cache.bump(profile_cache.CUSTOMER, [instance.pk])
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def invalidate_agent(sender, instance, **kwargs):
+    profile_cache.bump(profile_cache.AGENT, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profiles(sender, instance, created, update_fields=None, **kwargs):
+    # a new user has no profile yet, and logins only touch last_login
+    if created or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    profile_cache.bump(
+        profile_cache.CUSTOMER,
+        Customer.objects.filter(user=instance).values_list("id", flat=True),
+    )
+    profile_cache.bump(
+        profile_cache.AGENT,
+        Agent.objects.filter(user=instance).values_list("id", flat=True),
+    )
+
+
+@receiver(post_save, sender=Department)
+def invalidate_department_agents(sender, instance, created, **kwargs):
+    if created:
+        return
+    profile_cache.bump(
+        profile_cache.AGENT,
+        Agent.objects.filter(department=instance).values_list("id", flat=True),
+    )
+
+
+@receiver(post_init, sender=Ticket)
+def remember_ticket_state(sender, instance, **kwargs):
+    instance.remember_state()
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket_change(sender, instance, created, **kwargs):
+    previous_status, previous_agent_id = instance._saved_state
+    instance.remember_state()
+    if created:
+        previous_status = None
+    elif (previous_status, previous_agent_id) == instance._saved_state:
+        return
+    ticket_changed(instance, previous_status)
+
+
+def ticket_changed(ticket, previous_status):
+    """
+    Side effects of a saved change of a ticket's status or agent. Run by the
+    post_save hook, and directly by bulk updates, which send no signals.
+    """
+    ticket_log.append(ticket, previous_status)
+    ticket_events.publish(ticket, previous_status)
+    if (
+        ticket.status == Status.ASSIGNED
+        and previous_status != Status.ASSIGNED
+        and ticket.agent_id
+    ):
+        wait_estimator.record_assignment_on_commit(ticket)
+
+
+@receiver(post_delete, sender=Ticket)
+def publish_ticket_removal(sender, instance, **kwargs):
+    if instance.ticket_id and instance.status == Status.WAITING:
+        ticket_events.publish_queue_left(instance)
@@ -0,0 +1,204 @@
+"""
+Shared Stripe client.
+
+Every Stripe call goes through one StripeClient per process. That client
+uses a pooled keep-alive `requests` session and a timeout on every call.
+Retries are bounded, and only idempotent calls are retried: GETs, and POSTs
+that carry an idempotency key. Latency and error counts are recorded per
+operation.
+
+The client is built lazily and rebuilt after a fork, so Celery's prefork
+workers do not share sockets with their parent.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from core.dumps import (
+    STRIPE_CONNECT_TIMEOUT_SECONDS,
+    STRIPE_MAX_NETWORK_RETRIES,
+    STRIPE_POOL_SIZE,
+    STRIPE_SLOW_CALL_SECONDS,
+    STRIPE_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Read timeout for the call in progress; None means STRIPE_TIMEOUT_SECONDS.
+_deadline = ContextVar("stripe_deadline", default=None)
+
+
+class PooledRequestsClient(stripe.RequestsClient):
+    """
+    RequestsClient whose read timeout can be narrowed per call via
+    `_deadline`. The connect timeout always stays short.
+    """
+
+    @property
+    def _timeout(self):
+        return (STRIPE_CONNECT_TIMEOUT_SECONDS, _deadline.get() or self._read_timeout)
+
+    @_timeout.setter
+    def _timeout(self, value):
+        self._read_timeout = value
+
+
+def build_session():
+    session = requests.Session()
+    # the SDK does its own retrying, the adapter must not retry on top of it
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=STRIPE_POOL_SIZE, max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def build_client():
+    base_addresses = {}
+    if settings.STRIPE_API_BASE:
+        base_addresses["api"] = settings.STRIPE_API_BASE
+    return stripe.StripeClient(
+        settings.STRIPE_SECRET_KEY or "",
+        base_addresses=base_addresses,
+        max_network_retries=STRIPE_MAX_NETWORK_RETRIES,
+        http_client=PooledRequestsClient(
+            timeout=STRIPE_TIMEOUT_SECONDS, session=build_session()
+        ),
+    )
+
+
+_client = {}
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return this process's StripeClient, building it on first use.
+    """
+    pid = os.getpid()
+    entry = _client.get("value")
+    if entry is None or entry[0] != pid:
+        with _client_lock:
+            entry = _client.get("value")
+            if entry is None or entry[0] != pid:
+                entry = (pid, build_client())
+                _client["value"] = entry
+    return entry[1]
+
+
+def reset_client():
+    """
+    Drop the cached client, e.g. after the Stripe settings changed.
+    """
+    with _client_lock:
+        _client.pop("value", None)
+
+
+class LatencyMetrics:
+    """
+    Per-operation call counts, error counts and latency of Stripe calls made
+    by this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, operation, seconds, ok):
+        with self._lock:
+            stats = self._stats.setdefault(
+                operation,
+                {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+            )
+            stats["count"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: {
+                    **stats,
+                    "avg_seconds": stats["total_seconds"] / stats["count"],
+                }
+                for operation, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+metrics = LatencyMetrics()
+
+
+def call(operation, request, *, idempotent, timeout=None):
+    """
+    Run `request(client, options)` against the shared client.
+
+    `options` carries the retry budget: STRIPE_MAX_NETWORK_RETRIES for
+    idempotent calls and none otherwise. `timeout` narrows the read timeout
+    of each attempt.
+    """
+    options = {"max_network_retries": STRIPE_MAX_NETWORK_RETRIES if idempotent else 0}
+    token = _deadline.set(timeout)
+    started = time.perf_counter()
+    ok = False
+    try:
+        result = request(get_client(), options)
+        ok = True
+        return result
+    finally:
+        _deadline.reset(token)
+        elapsed = time.perf_counter() - started
+        metrics.record(operation, elapsed, ok)
+        if elapsed > STRIPE_SLOW_CALL_SECONDS:
+            logger.warning(f"Slow Stripe call {operation}: {elapsed:.2f}s")
+
+
+def create_payment_intent(*, idempotency_key, timeout=None, **params):
+    """
+    Create a PaymentIntent. The idempotency key makes the call safe to
+    retry.
+    """
+    return call(
+        "payment_intents.create",
+        lambda client, options: client.payment_intents.create(
+            params=params, options={**options, "idempotency_key": idempotency_key}
+        ),
+        idempotent=True,
+        timeout=timeout,
+    )
+
+
+def list_country_specs(timeout=None):
+    """
+    Yield every CountrySpec, one bounded call per page.
+    """
+    params = {"limit": 100}
+    while True:
+        page = call(
+            "country_specs.list",
+            lambda client, options: client.country_specs.list(
+                params=params, options=options
+            ),
+            idempotent=True,
+            timeout=timeout,
+        )
+        yield from page.data
+        if not page.has_more or not page.data:
+            return
+        params = {"limit": 100, "starting_after": page.data[-1].id}
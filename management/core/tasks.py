@@ -6,44 +6,26 @@ from django.db import transaction
 from django.db.models import F, Q
 from django.utils import timezone
 
-from core.automation.rule_runner import RuleEngine
+from core import stripe_client
+from core.automation.rule_runner import run_changed_rules
 from core.constants import Status
+from core.currencies import refresh_supported_currencies
 from core.models import Agent, Ticket
-from core.dumps import BATCH_SIZE
+from core.ticket_log import refresh_current_state
+from core.ticket_queue import run_exclusively
+from core.wait_estimator import check_sla
+from core.webhooks import process_pending_events
+
 logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True)
 def process_ticket_queue(self):
-    with transaction.atomic():
-        waiting_tickets = (
-            Ticket.objects.select_for_update()
-            .filter(status=Status.WAITING)
-            .order_by("created_at")
-        )
-
-        for ticket in waiting_tickets:
-            agent = (
-                Agent.objects.select_for_update()
-                .filter(is_available=True, max_customers__gt=0)
-                .first()
-            )
-
-            if not agent:
-                print(f"No available agents for ticket {ticket.ticket_id}")
-                break
-
-            ticket.agent = agent
-            ticket.status = Status.ASSIGNED
-            ticket.save()
-
-            agent.current_customers += 1
-            agent.max_customers -= (
-                1  # Todo: remove this from every logic: because it should be constant
-            )
-            agent.save()
-
-            logger.info(f"Ticket {ticket.ticket_id} assigned to {agent.user.username}")
+    """
+    Assign waiting tickets to available agents. Runs from beat every minute
+    and, debounced, whenever tickets are queued (see core.ticket_queue).
+    """
+    return run_exclusively()
 
 
 # need updation
@@ -99,23 +81,43 @@ def delete_completed_tickets(self):
 @shared_task(bind=True)
 def apply_rules_to_all_tickets(self):
     """
-    Celery task to apply RuleEngine to all tickets in the database in batches.
+    Celery task to apply the automation rules to the tickets changed since
+    the last run (see core.automation.rule_runner.run_changed_rules).
     """
-    total_tickets = Ticket.objects.count()
-    results = []
+    return run_changed_rules()
 
-    for start in range(0, total_tickets, BATCH_SIZE):
-        end = start + BATCH_SIZE
-        ticket_batch = Ticket.objects.all()[start:end]
 
-        for ticket in ticket_batch:
-            try:
-                engine = RuleEngine(ticket.ticket_id)
-                result = engine.run()
-                results.append({"ticket_id": ticket.ticket_id, "result": result})
-                logger.info(f"Rules applied to ticket {ticket.ticket_id}: {result}")
-            except Exception as e:
-                logger.exception(
-                    f"Failed to apply rules to ticket {ticket.ticket_id}: {str(e)}"
-                )
-    return results
+@shared_task(bind=True)
+def refresh_currencies(self):
+    """
+    Refresh the cached list of Stripe supported currencies, then log the
+    Stripe call metrics of this worker.
+    """
+    try:
+        return refresh_supported_currencies()
+    finally:
+        logger.info(f"Stripe call metrics: {stripe_client.metrics.snapshot()}")
+
+
+@shared_task(bind=True)
+def process_stripe_events(self):
+    """
+    Apply pending Stripe webhook events from the inbox.
+    """
+    return process_pending_events()
+
+
+@shared_task(bind=True)
+def check_queue_sla(self):
+    """
+    Alert when queued tickets are projected to wait longer than the SLA.
+    """
+    return check_sla()
+
+
+@shared_task(bind=True)
+def refresh_ticket_state(self):
+    """
+    Refresh the materialized current state of tickets used for analytics.
+    """
+    refresh_current_state()
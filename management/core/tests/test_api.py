@@ -21,8 +21,10 @@ from django.utils.timezone import make_aware
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core import wait_estimator
 from core.constants import Status
 from core.models import Agent, Customer, Department, PaymentDetails, Ticket, User
+from core.webhooks import process_pending_events
 
 
 @override_settings(STRIPE_SECRET_KEY="sk_test_123", STRIPE_WEBHOOK_SECRET="whsec_test")
@@ -239,7 +241,7 @@ class ApiViewsTest(TestCase):
         """Test ticket assignment when an agent is available."""
         self.client.force_authenticate(user=self.customer_user)
 
-        response = self.client.get(self.ticket_assign_url)
+        response = self.client.post(self.ticket_assign_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         self.ticket.refresh_from_db()
@@ -256,7 +258,7 @@ class ApiViewsTest(TestCase):
         Agent.objects.update(is_available=False, current_customers=F("max_customers"))
 
         self.client.force_authenticate(user=self.customer_user)
-        response = self.client.get(self.ticket_assign_url)
+        response = self.client.post(self.ticket_assign_url)
 
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
 
@@ -275,7 +277,7 @@ class ApiViewsTest(TestCase):
         Agent.objects.update(is_available=False, current_customers=F("max_customers"))
 
         self.client.force_authenticate(user=self.customer_user)
-        first_response = self.client.get(self.ticket_assign_url)
+        first_response = self.client.post(self.ticket_assign_url)
         self.assertEqual(first_response.status_code, status.HTTP_202_ACCEPTED)
 
         self.ticket.refresh_from_db()
@@ -290,7 +292,7 @@ class ApiViewsTest(TestCase):
         )
 
         second_url = reverse("ticket_assign", kwargs={"id": second_ticket.ticket_id})
-        second_response = self.client.get(second_url)
+        second_response = self.client.post(second_url)
 
         self.assertEqual(second_response.status_code, status.HTTP_202_ACCEPTED)
 
@@ -306,9 +308,79 @@ class ApiViewsTest(TestCase):
         self.client.force_authenticate(user=self.customer_user)
 
         invalid_url = reverse("ticket_assign", kwargs={"id": "INVALID001"})
-        response = self.client.get(invalid_url)
+        response = self.client.post(invalid_url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_ticket_status_is_read_only(self):
+        """Reading a ticket's status neither assigns nor queues it."""
+        self.client.force_authenticate(user=self.customer_user)
+        url = reverse("ticket_status", kwargs={"id": self.ticket.ticket_id})
+        wait_estimator.record_assignment(self.department.id)
+
+        # the ticket, its position and whether the other tier is waiting
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Status.WAITING)
+        self.assertEqual(response.data["queue_position"], 1)
+        self.assertIsNone(response.data["agent"])
+        self.assertIn("max-age", response["Cache-Control"])
+
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.queued_at)
+        self.assertIsNone(self.ticket.agent)
+
+        response = self.client.get(reverse("ticket_status", kwargs={"id": "NOPE"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ticket_status_is_private(self):
+        """Only the ticket's customer, its agent and staff can read its status."""
+        url = reverse("ticket_status", kwargs={"id": self.ticket.ticket_id})
+        response = self.client.get(url)
+        self.assertIn(
+            response.status_code,
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN),
+        )
+        self.assertNotIn("customer", response.data)
+
+        stranger = User.objects.create_user(
+            username="stranger", password="testpass", role="customer"
+        )
+        self.client.force_authenticate(user=stranger)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotIn("customer", response.data)
+
+        self.ticket.agent = self.agent
+        self.ticket.save()
+        self.client.force_authenticate(user=self.agent_user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_ticket_assign_is_idempotent(self):
+        """Repeated assign requests queue the ticket and notify the worker once."""
+        Agent.objects.update(is_available=False, current_customers=F("max_customers"))
+        self.client.force_authenticate(user=self.customer_user)
+
+        with patch("core.api.viewset.schedule_run") as mock_schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = self.client.post(self.ticket_assign_url)
+            self.ticket.refresh_from_db()
+            queued_at = self.ticket.queued_at
+
+            with self.captureOnCommitCallbacks(execute=True):
+                second = self.client.post(self.ticket_assign_url)
+
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.data, first.data)
+        mock_schedule.assert_called_once()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.queued_at, queued_at)
+
+        self.assertEqual(
+            self.client.get(self.ticket_assign_url).status_code,
+            status.HTTP_405_METHOD_NOT_ALLOWED,
+        )
+
     def test_ticket_reopen(self):
         """Test ticket reopen with valid ticket ID."""
         self.ticket.status = Status.CLOSED
@@ -329,7 +401,7 @@ class ApiViewsTest(TestCase):
     # Stripe Payment logic are tested on customers only -> because we are trying
     # to use some diff payment gateway for agents and admin.
     @patch("core.api.payments.validators.get_supported_currencies")
-    @patch("stripe.PaymentIntent.create")
+    @patch("core.stripe_client.create_payment_intent")
     def test_create_payment_intent_success(
         self, mock_pi_create, mock_get_supported_currencies
     ):
@@ -384,18 +456,23 @@ class ApiViewsTest(TestCase):
             "metadata": {"user_id": str(self.customer_user.id)},
         }
         fake_event = {
+            "id": "evt_webhook_123",
             "type": "payment_intent.succeeded",
+            "created": 1743300000,
             "data": {"object": fake_intent},
         }
         mock_construct.return_value = fake_event
 
         url = reverse("stripe_event")
-        payload = json.dumps({"dummy": "data"})
+        payload = json.dumps(fake_event)
         headers = {"HTTP_STRIPE_SIGNATURE": "testsig"}
         response = self.client.post(
             url, payload, content_type="application/json", **headers
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # the webhook only stores the event; the consumer applies it
+        self.assertFalse(PaymentDetails.objects.exists())
+        process_pending_events()
         payment = PaymentDetails.objects.get(stripe_payment_intent_id=intent_id)
         self.assertTrue(payment.payment_verified)
         self.assertEqual(payment.amount, Decimal(amount_cents / 100))
@@ -418,19 +495,22 @@ class ApiViewsTest(TestCase):
     def test_webhook_payment_failed_logs(self, mock_construct):
         fake_intent = {"id": "pi_fail_789"}
         fake_event = {
+            "id": "evt_fail_789",
             "type": "payment_intent.payment_failed",
+            "created": 1743300000,
             "data": {"object": fake_intent},
         }
         mock_construct.return_value = fake_event
 
         url = reverse("stripe_event")
-        payload = json.dumps({})
+        payload = json.dumps(fake_event)
         headers = {"HTTP_STRIPE_SIGNATURE": "testsig"}
         response = self.client.post(
             url, payload, content_type="application/json", **headers
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        process_pending_events()
         self.assertFalse(
             PaymentDetails.objects.filter(
                 stripe_payment_intent_id="pi_fail_789"
@@ -5,7 +5,18 @@ from django.utils import timezone
 
 from core.automation.auto_close import AutoClose
 from core.automation.rule_runner import RuleEngine
-from core.models import Agent, Customer, Department, Status, Ticket, User
+from core.constants import StatusCode
+from core.models import (
+    Agent,
+    AutoEscalate,
+    Customer,
+    Department,
+    Status,
+    StatusChange,
+    Ticket,
+    TicketEvent,
+    User,
+)
 
 
 class AutoCloseRuleTestCase(TestCase):
@@ -66,3 +77,70 @@ class AutoCloseRuleTestCase(TestCase):
 
         self.assertEqual(result["status"], "success")
         self.assertIn("escalated", result["details"].lower())
+
+    def test_autoclose_rule_skips_recent_and_missing_tickets(self):
+        Ticket.objects.filter(pk=self.ticket.pk).update(updated_at=timezone.now())
+
+        result = AutoClose(ticket_id=self.ticket.ticket_id, inactive_days=1).apply()
+        self.assertEqual(result["reason"], "condition doesnot meet")
+        result = AutoClose(ticket_id="TID-MISSING", inactive_days=1).apply()
+        self.assertEqual(result["reason"], "Ticket not found")
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, Status.WAITING)
+
+    def test_close_stale_closes_in_batches_with_audit_rows(self):
+        stale = timezone.now() - timedelta(days=2)
+        for n in range(4):
+            Ticket.objects.create(
+                ticket_id=f"TID-STALE{n}",
+                customer=self.customer,
+                issue_title="Stale",
+                issue_desc="Description",
+                status=Status.WAITING,
+            )
+        Ticket.objects.filter(ticket_id__startswith="TID-STALE").update(
+            updated_at=stale
+        )
+        fresh = Ticket.objects.create(
+            ticket_id="TID-FRESH",
+            customer=self.customer,
+            issue_title="Fresh",
+            issue_desc="Description",
+            status=Status.WAITING,
+        )
+        assigned = Ticket.objects.create(
+            ticket_id="TID-ASSIGNED",
+            customer=self.customer,
+            agent=self.agent,
+            issue_title="Assigned",
+            issue_desc="Description",
+            status=Status.ASSIGNED,
+        )
+        Ticket.objects.filter(pk=assigned.pk).update(updated_at=stale)
+
+        with self.captureOnCommitCallbacks():
+            closed = AutoClose.close_stale(inactive_days=1, batch_size=2)
+
+        self.assertEqual(closed, 5)
+        closed_ids = set(
+            Ticket.objects.filter(status=Status.CLOSED).values_list("pk", flat=True)
+        )
+        self.assertEqual(len(closed_ids), 5)
+        self.assertNotIn(fresh.pk, closed_ids)
+        self.assertNotIn(assigned.pk, closed_ids)
+
+        changes = StatusChange.objects.filter(ticket__in=closed_ids)
+        self.assertEqual(changes.filter(new_status=Status.CLOSED).count(), 5)
+        self.assertEqual(changes.get(ticket=self.ticket).new_agent, self.agent)
+        self.assertEqual(
+            AutoEscalate.objects.filter(status_change__in=changes).count(), 5
+        )
+        events = TicketEvent.objects.filter(
+            ticket__in=closed_ids,
+            status=StatusCode.CLOSED,
+            previous_status=StatusCode.WAITING,
+        )
+        self.assertEqual(events.count(), 5)
+
+        self.assertEqual(AutoClose.close_stale(inactive_days=1), 0)
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import BillingSummary, Customer, PaymentDetails, User
+from core.webhooks import process_pending_events, record_event
+
+
+def succeeded_event(event_id, intent_id, amount, user_id):
+    return {
+        "id": event_id,
+        "type": "payment_intent.succeeded",
+        "created": 1743300000,
+        "data": {
+            "object": {
+                "id": intent_id,
+                "object": "payment_intent",
+                "amount": amount,
+                "metadata": {"user_id": str(user_id)},
+            }
+        },
+    }
+
+
+class BillingSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="payer", password="testpass", role="customer"
+        )
+        self.customer = Customer.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_webhook_payments_maintain_summary(self):
+        record_event(succeeded_event("evt_1", "pi_1", 2500, self.user.id))
+        record_event(succeeded_event("evt_2", "pi_2", 1000, self.user.id))
+        # a second success event for an already verified intent
+        record_event(succeeded_event("evt_3", "pi_1", 2500, self.user.id))
+        process_pending_events()
+
+        summary = BillingSummary.objects.get(user=self.user)
+        self.assertEqual(summary.total_paid, Decimal("35.00"))
+        self.assertEqual(summary.verified_count, 2)
+        self.assertEqual(summary.last_payment_amount, Decimal("10.00"))
+        self.customer.refresh_from_db()
+        self.assertTrue(self.customer.is_paid)
+
+        response = self.client.get(reverse("billing_summary"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_paid"], Decimal("35.00"))
+        self.assertEqual(response.data["verified_count"], 2)
+
+    def test_summary_without_payments(self):
+        response = self.client.get(reverse("billing_summary"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["verified_count"], 0)
+        self.assertIsNone(response.data["last_payment_at"])
+
+    def test_history_is_paged_newest_first(self):
+        other = User.objects.create_user(username="other", password="testpass")
+        PaymentDetails.objects.create(user=other, amount=99)
+        now = timezone.now()
+        ids = []
+        for n in range(5):
+            payment = PaymentDetails.objects.create(user=self.user, amount=n + 1)
+            PaymentDetails.objects.filter(pk=payment.pk).update(
+                created_at=now - timedelta(days=n)
+            )
+            ids.append(payment.pk)
+
+        url = reverse("payment_history")
+        first = self.client.get(url, {"limit": 2})
+        self.assertEqual([row["id"] for row in first.data["results"]], ids[:2])
+
+        second = self.client.get(url, {"limit": 2, "before": first.data["next"]})
+        third = self.client.get(url, {"limit": 2, "before": second.data["next"]})
+        self.assertEqual([row["id"] for row in second.data["results"]], ids[2:4])
+        self.assertEqual([row["id"] for row in third.data["results"]], ids[4:])
+        self.assertIsNone(third.data["next"])
+
+    def test_history_rejects_bad_paging(self):
+        url = reverse("payment_history")
+        self.assertEqual(
+            self.client.get(url, {"limit": 0}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get(url, {"before": "abc"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
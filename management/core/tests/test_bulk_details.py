@@ -0,0 +1,80 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Agent, Customer, Department, User
+
+
+class BulkDetailTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        billing = Department.objects.create(name="Billing")
+        tech = Department.objects.create(name="Tech")
+        for n in range(5):
+            user = User.objects.create_user(
+                username=f"agent{n}",
+                password="testpass",
+                role="agent",
+                first_name=f"Agent{n}",
+            )
+            Agent.objects.create(user=user, department=billing if n % 2 else tech)
+        self.customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer", last_name="Lovelace"
+        )
+        Customer.objects.create(user=self.customer_user, is_paid=True)
+        self.client.force_authenticate(user=self.customer_user)
+
+    def test_get_details_many_is_one_query(self):
+        usernames = [f"agent{n}" for n in range(5)]
+        with self.assertNumQueries(1):
+            details = Agent.get_details_many(usernames)
+        self.assertEqual(set(details), set(usernames))
+        self.assertEqual(details["agent1"]["department"], "Billing")
+        self.assertEqual(details["agent1"]["full_name"], "Agent1")
+        self.assertEqual(
+            {key: details["agent0"][key] for key in ("username", "department")},
+            {"username": "agent0", "department": "Tech"},
+        )
+
+    def test_get_details_many_selects_fields(self):
+        details = Customer.get_details_many(
+            ["cust", "nobody"], ["full_name", "is_paid"]
+        )
+        self.assertEqual(details, {"cust": {"full_name": "Lovelace", "is_paid": True}})
+
+        with self.assertRaises(ValueError):
+            Agent.get_details_many(["agent0"], ["password"])
+
+    def test_bulk_endpoint(self):
+        response = self.client.get(
+            reverse("agent_bulk_detail"),
+            {"usernames": "agent0, agent3,ghost", "fields": "id,is_available"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["results"]), {"agent0", "agent3"})
+        self.assertEqual(
+            set(response.data["results"]["agent3"]), {"id", "is_available"}
+        )
+        self.assertEqual(response.data["missing"], ["ghost"])
+
+        response = self.client.get(
+            reverse("customer_bulk_detail"), {"usernames": "cust"}
+        )
+        # the same keys as the single-profile endpoint
+        customer = response.data["results"]["cust"]
+        self.assertEqual(customer["raise_issue"], 0)
+        detail = self.client.get(
+            reverse("customer_detail", kwargs={"pk": customer["id"]})
+        )
+        self.assertEqual(detail.data, customer)
+
+    def test_bulk_endpoint_rejects_bad_input(self):
+        url = reverse("agent_bulk_detail")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get(
+                url, {"usernames": "agent0", "fields": "user__password"}
+            ).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
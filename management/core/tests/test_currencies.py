@@ -0,0 +1,91 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core import currencies
+
+
+class SupportedCurrenciesTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        currencies._local.clear()
+        self.addCleanup(currencies._local.clear)
+
+    @patch("core.stripe_client.list_country_specs")
+    @patch("core.tasks.refresh_currencies.delay")
+    def test_cold_cache_serves_bundled_list_and_refreshes_once(
+        self, mock_delay, mock_list
+    ):
+        result = currencies.get_supported_currencies()
+        self.assertIn("USD", result)
+        self.assertEqual(result, sorted(result))
+
+        currencies._local.clear()
+        currencies.get_supported_currencies()
+        mock_delay.assert_called_once()
+        mock_list.assert_not_called()
+
+    @patch("core.tasks.refresh_currencies.delay")
+    def test_fresh_value_is_served_from_process_memory(self, mock_delay):
+        cache.set(
+            currencies.CURRENCY_CACHE_KEY,
+            {"currencies": ["EUR", "USD"], "fetched_at": time.time()},
+        )
+        self.assertEqual(currencies.get_supported_currencies(), ["EUR", "USD"])
+
+        with patch("core.currencies.cache.get") as mock_get:
+            self.assertEqual(currencies.get_supported_currencies(), ["EUR", "USD"])
+        mock_get.assert_not_called()
+        mock_delay.assert_not_called()
+
+    @patch("core.tasks.refresh_currencies.delay")
+    def test_cache_outage_falls_back_to_local_then_bundled_list(self, mock_delay):
+        down = ConnectionError("redis down")
+        currencies._local["value"] = (time.monotonic() - 1, ["EUR", "USD"])
+        with patch("core.currencies.cache.get", side_effect=down), patch(
+            "core.currencies.cache.add", side_effect=down
+        ):
+            self.assertEqual(currencies.get_supported_currencies(), ["EUR", "USD"])
+            currencies._local.clear()
+            self.assertIn("USD", currencies.get_supported_currencies())
+            self.assertFalse(currencies.schedule_refresh())
+        mock_delay.assert_not_called()
+
+    @patch("core.tasks.refresh_currencies.delay")
+    def test_stale_value_is_served_while_revalidating(self, mock_delay):
+        cache.set(
+            currencies.CURRENCY_CACHE_KEY,
+            {"currencies": ["EUR"], "fetched_at": time.time() - 2 * 60 * 60},
+        )
+        self.assertEqual(currencies.get_supported_currencies(), ["EUR"])
+        mock_delay.assert_called_once()
+
+    @patch("core.stripe_client.list_country_specs")
+    def test_refresh_fetches_from_stripe_and_releases_lock(self, mock_list):
+        mock_list.return_value = [
+            SimpleNamespace(supported_payment_currencies=["usd", "eur"]),
+            SimpleNamespace(supported_payment_currencies=["usd", "gbp"]),
+        ]
+        cache.add(currencies.CURRENCY_LOCK_KEY, 1)
+
+        self.assertEqual(
+            currencies.refresh_supported_currencies(), ["EUR", "GBP", "USD"]
+        )
+        self.assertIsNone(cache.get(currencies.CURRENCY_LOCK_KEY))
+        currencies._local.clear()
+        self.assertEqual(currencies.get_supported_currencies(), ["EUR", "GBP", "USD"])
+
+    @patch(
+        "core.stripe_client.list_country_specs", side_effect=Exception("stripe down")
+    )
+    @patch("core.tasks.refresh_currencies.delay")
+    def test_failed_refresh_keeps_serving_and_can_retry(self, mock_delay, mock_list):
+        cache.add(currencies.CURRENCY_LOCK_KEY, 1)
+        with self.assertRaises(Exception):
+            currencies.refresh_supported_currencies()
+        self.assertIsNone(cache.get(currencies.CURRENCY_LOCK_KEY))
+        self.assertIn("USD", currencies.get_supported_currencies())
+        mock_delay.assert_called_once()
@@ -0,0 +1,129 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from core.models import Ticket
+from main import db_router
+from main.db_router import (
+    PIN_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    primary_reads,
+)
+
+REPLICAS = ["replica_1", "replica_2"]
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        db_router._replica_lag.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def serve(self, request, view):
+        """Run `view` inside the middleware and return (response, reads)."""
+        reads = []
+
+        def get_response(request):
+            reads.extend(view())
+            return HttpResponse()
+
+        return ReplicaRoutingMiddleware(get_response)(request), reads
+
+    def read(self):
+        return self.router.db_for_read(Ticket)
+
+    def write(self):
+        return self.router.db_for_write(Ticket)
+
+    @patch("main.db_router.replica_lag", return_value=0)
+    def test_reads_outside_requests_stay_on_primary(self, mock_lag):
+        self.assertEqual(self.read(), "default")
+
+    @patch("main.db_router.replica_lag", return_value=0)
+    def test_request_reads_go_to_replicas_until_it_writes(self, mock_lag):
+        request = self.factory.get("/", HTTP_AUTHORIZATION="Bearer token-1")
+        response, reads = self.serve(
+            request, lambda: [self.read(), self.write(), self.read()]
+        )
+        self.assertIn(reads[0], REPLICAS)
+        self.assertEqual(reads[1:], ["default", "default"])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        # the same client keeps reading from the primary for a while
+        request = self.factory.get("/", HTTP_AUTHORIZATION="Bearer token-1")
+        _, reads = self.serve(request, lambda: [self.read()])
+        self.assertEqual(reads, ["default"])
+
+        # other clients are not affected
+        request = self.factory.get("/", HTTP_AUTHORIZATION="Bearer token-2")
+        _, reads = self.serve(request, lambda: [self.read()])
+        self.assertIn(reads[0], REPLICAS)
+
+    @patch("main.db_router.replica_lag", return_value=0)
+    def test_only_safe_methods_read_from_replicas(self, mock_lag):
+        response, reads = self.serve(self.factory.post("/"), lambda: [self.read()])
+        self.assertEqual(reads, ["default"])
+        # reading the primary alone does not pin the client
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        _, reads = self.serve(self.factory.head("/"), lambda: [self.read()])
+        self.assertIn(reads[0], REPLICAS)
+
+    @patch("main.db_router.replica_lag", return_value=0)
+    def test_views_can_require_primary_reads(self, mock_lag):
+        view = primary_reads(lambda request: HttpResponse())
+        reads = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            reads.append(self.read())
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware(self.factory.get("/"))
+        self.assertEqual(reads, ["default"])
+
+    @patch("main.db_router.replica_lag", return_value=0)
+    def test_pin_cookie_sticks_anonymous_clients(self, mock_lag):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = "1"
+        _, reads = self.serve(request, lambda: [self.read()])
+        self.assertEqual(reads, ["default"])
+
+    @patch("main.db_router.replica_lag", return_value=0)
+    def test_transactions_read_from_primary(self, mock_lag):
+        def view():
+            with transaction.atomic():
+                return [self.read()]
+
+        _, reads = self.serve(self.factory.get("/"), view)
+        self.assertEqual(reads, ["default"])
+
+    def test_lagging_or_unreachable_replicas_are_skipped(self):
+        lags = {"replica_1": 30.0, "replica_2": None}
+        with patch("main.db_router.replica_lag", side_effect=lags.get):
+            _, reads = self.serve(self.factory.get("/"), lambda: [self.read()])
+        self.assertEqual(reads, ["default"])
+
+        lags["replica_2"] = 0.5
+        with patch("main.db_router.replica_lag", side_effect=lags.get):
+            _, reads = self.serve(self.factory.get("/"), lambda: [self.read()])
+        self.assertEqual(reads, ["replica_2"])
+
+    def test_lag_is_measured_once_per_interval(self):
+        with patch("main.db_router.connections") as mock_connections:
+            cursor = mock_connections.__getitem__.return_value.cursor.return_value
+            cursor.__enter__.return_value.fetchone.return_value = (1.5,)
+            self.assertEqual(db_router.replica_lag("replica_1"), 1.5)
+            self.assertEqual(db_router.replica_lag("replica_1"), 1.5)
+        cursor.__enter__.return_value.execute.assert_called_once()
+
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate("default", "core"))
+        self.assertFalse(self.router.allow_migrate("replica_1", "core"))
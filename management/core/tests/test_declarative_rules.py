@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from core.automation.declarative import (
+    RuleError,
+    apply_rule,
+    compile_conditions,
+    run_rules,
+)
+from core.constants import RuleAction, Status, StatusCode
+from core.models import (
+    AutoEscalate,
+    AutomationRule,
+    Customer,
+    StatusChange,
+    Ticket,
+    TicketEvent,
+    User,
+)
+
+
+class DeclarativeRulesTest(TestCase):
+    def setUp(self):
+        paid = Customer.objects.create(
+            user=User.objects.create_user(
+                username="paid", password="testpass", role="customer"
+            ),
+            is_paid=True,
+        )
+        free = Customer.objects.create(
+            user=User.objects.create_user(
+                username="free", password="testpass", role="customer"
+            )
+        )
+        week_ago = timezone.now() - timedelta(days=7)
+        self.tickets = {}
+        for name, customer, title in [
+            ("paid-old", paid, "Printer on fire"),
+            ("free-old", free, "Printer jammed"),
+            ("free-new", free, "Login broken"),
+        ]:
+            self.tickets[name] = Ticket.objects.create(
+                ticket_id=name, customer=customer, issue_title=title
+            )
+        Ticket.objects.filter(ticket_id__endswith="-old").update(updated_at=week_ago)
+
+    def status(self, name):
+        return Ticket.objects.get(ticket_id=name).status
+
+    def test_compiles_nested_conditions(self):
+        q, time_based = compile_conditions(
+            {
+                "any": [
+                    {"field": "customer_is_paid", "op": "eq", "value": True},
+                    {
+                        "not": {
+                            "field": "issue_title",
+                            "op": "contains",
+                            "value": "printer",
+                        }
+                    },
+                ]
+            }
+        )
+        self.assertFalse(time_based)
+        self.assertEqual(
+            set(Ticket.objects.filter(q).values_list("ticket_id", flat=True)),
+            {"paid-old", "free-new"},
+        )
+
+    def test_rejects_invalid_rules(self):
+        for conditions in [
+            {"field": "customer__user__password", "op": "eq", "value": "x"},
+            {"field": "status", "op": "regex", "value": ".*"},
+            {"field": "status", "op": "older_than", "value": 60},
+            {"field": "status", "op": "in", "value": "waiting"},
+            {"field": "agent", "op": "contains", "value": "bob"},
+            {"field": "customer_is_paid", "op": "gt", "value": False},
+            {"field": "tag", "op": "isnull", "value": "yes"},
+            {"all": []},
+            ["status"],
+        ]:
+            with self.assertRaises(RuleError, msg=conditions):
+                compile_conditions(conditions)
+
+        rule = AutomationRule(
+            name="bad",
+            conditions={"field": "status", "op": "eq", "value": "waiting"},
+            action=RuleAction.SET_STATUS,
+            value="archived",
+        )
+        with self.assertRaises(ValidationError):
+            rule.full_clean()
+
+        # compiles, but the agent id is not a number
+        rule.conditions = {"field": "agent", "op": "eq", "value": "bob"}
+        rule.value = Status.CLOSED
+        with self.assertRaises(ValidationError):
+            rule.full_clean()
+
+    def test_set_status_closes_matching_tickets_in_bulk(self):
+        rule = AutomationRule.objects.create(
+            name="close stale free tickets",
+            conditions={
+                "all": [
+                    {"field": "status", "op": "eq", "value": Status.WAITING},
+                    {"field": "customer_is_paid", "op": "eq", "value": False},
+                    {"field": "updated_at", "op": "older_than", "value": 3 * 86400},
+                ]
+            },
+            action=RuleAction.SET_STATUS,
+            value=Status.CLOSED,
+        )
+
+        with self.captureOnCommitCallbacks():
+            self.assertEqual(apply_rule(rule), 1)
+
+        self.assertEqual(self.status("free-old"), Status.CLOSED)
+        self.assertEqual(self.status("paid-old"), Status.WAITING)
+        self.assertEqual(self.status("free-new"), Status.WAITING)
+        ticket = self.tickets["free-old"]
+        change = StatusChange.objects.get(ticket=ticket)
+        self.assertTrue(AutoEscalate.objects.filter(status_change=change).exists())
+        self.assertTrue(
+            TicketEvent.objects.filter(
+                ticket=ticket,
+                status=StatusCode.CLOSED,
+                previous_status=StatusCode.WAITING,
+            ).exists()
+        )
+        # closed tickets no longer match
+        self.assertEqual(apply_rule(rule), 0)
+
+    def test_run_rules_limits_untimed_rules_to_changed_tickets(self):
+        AutomationRule.objects.create(
+            name="tag printers",
+            order=1,
+            conditions={"field": "issue_title", "op": "contains", "value": "printer"},
+            action=RuleAction.SET_TAG,
+            value="hardware",
+        )
+        AutomationRule.objects.create(
+            name="inactive",
+            is_active=False,
+            conditions={"field": "status", "op": "eq", "value": Status.WAITING},
+            action=RuleAction.SET_TAG,
+            value="ignored",
+        )
+
+        changed = Ticket.objects.filter(ticket_id__in=["free-old", "free-new"])
+        updated_at = Ticket.objects.get(ticket_id="free-old").updated_at
+        results = run_rules(changed)
+
+        self.assertEqual(results, [{"rule": "tag printers", "details": {"changed": 1}}])
+        tags = dict(Ticket.objects.values_list("ticket_id", "tag"))
+        self.assertEqual(
+            tags, {"paid-old": None, "free-old": "hardware", "free-new": None}
+        )
+        # tagging is not activity, so the inactivity clock keeps running
+        self.assertEqual(
+            Ticket.objects.get(ticket_id="free-old").updated_at, updated_at
+        )
+        self.assertEqual(
+            run_rules(), [{"rule": "tag printers", "details": {"changed": 1}}]
+        )
+        self.assertEqual(run_rules(), [])
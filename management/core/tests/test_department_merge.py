@@ -3,7 +3,7 @@ from datetime import timedelta
 from django.test import TestCase
 from django.utils import timezone
 
-from core.models import Ticket, Department, Agent, User, Customer
+from core.models import Ticket, TicketEvent, Department, Agent, User, Customer
 from core.automation.department_merge import Department_merge
 from core.constants import Status
 from core.dumps import OVERLOAD_THRESHOLD, UNDERUTILIZED_THRESHOLD
@@ -117,3 +117,17 @@ class DepartmentMergeRuleTest(TestCase):
             expected_to_move,
             "Reassigned tickets should be assigned to the low-load agent",
         )
+
+    def test_reassignments_are_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Department_merge(ticket=None).apply()
+
+        moved = Ticket.objects.filter(agent=self.agent_low).exclude(
+            ticket_id__startswith="TID-GEN"
+        )
+        self.assertTrue(moved.exists())
+        for ticket in moved:
+            self.assertTrue(
+                TicketEvent.objects.filter(ticket=ticket, agent=self.agent_low).exists()
+            )
+            self.assertGreater(ticket.updated_at, ticket.created_at)
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.constants import Status, StatusCode
+from core.models import (
+    Agent,
+    AutoEscalate,
+    Customer,
+    Department,
+    StatusChange,
+    Ticket,
+    TicketEvent,
+    User,
+)
+
+
+class EscalateManyTest(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Support")
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        self.agent = Agent.objects.create(user=agent_user, department=department)
+        customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer"
+        )
+        customer = Customer.objects.create(user=customer_user)
+        for n in range(20):
+            Ticket.objects.create(ticket_id=f"T{n}", customer=customer)
+
+    def test_batch_is_applied_with_a_fixed_number_of_queries(self):
+        changes = [(f"T{n}", Status.CLOSED, None) for n in range(20)]
+        with CaptureQueriesContext(connection) as queries:
+            results = AutoEscalate.escalate_many(changes)
+
+        self.assertTrue(all(result["success"] for result in results))
+        # lock, two inserts, one update, one event insert, savepoint pair
+        self.assertEqual(len(queries), 7)
+        self.assertEqual(Ticket.objects.filter(status=Status.CLOSED).count(), 20)
+        self.assertEqual(StatusChange.objects.count(), 20)
+        self.assertEqual(AutoEscalate.objects.count(), 20)
+        self.assertEqual(
+            TicketEvent.objects.filter(
+                previous_status=StatusCode.WAITING, status=StatusCode.CLOSED
+            ).count(),
+            20,
+        )
+
+    def test_results_are_per_change(self):
+        results = AutoEscalate.escalate_many(
+            [
+                ("T1", Status.ASSIGNED, self.agent),
+                ("missing", Status.CLOSED, None),
+                ("T2", "bogus", None),
+            ]
+        )
+        self.assertEqual(
+            [result["success"] for result in results], [True, False, False]
+        )
+        self.assertIn("not found", results[1]["message"])
+
+        ticket = Ticket.objects.get(ticket_id="T1")
+        self.assertEqual(ticket.status, Status.ASSIGNED)
+        self.assertEqual(ticket.agent, self.agent)
+        self.assertEqual(Ticket.objects.get(ticket_id="T2").status, Status.WAITING)
+        self.assertEqual(StatusChange.objects.count(), 1)
+
+    def test_single_escalation_goes_through_the_batch(self):
+        ticket = Ticket.objects.get(ticket_id="T3")
+        result = AutoEscalate.escalate_changes(ticket, Status.CLOSED)
+        self.assertEqual(result, {"success": True, "message": "Ticket T3 escalated."})
+        self.assertEqual(
+            AutoEscalate.escalate_changes("nope", Status.CLOSED)["success"], False
+        )
@@ -0,0 +1,28 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+
+class HealthCheckTest(TestCase):
+    def test_healthy(self):
+        response = self.client.get(reverse("health"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"database": "ok", "cache": "ok"})
+
+    @patch("core.views.cache.get", side_effect=ConnectionError("redis down"))
+    def test_cache_failure_is_reported(self, mock_get):
+        response = self.client.get(reverse("health"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["cache"], "error")
+
+
+class BenchDbConnectionsTest(TransactionTestCase):
+    def test_reports_both_runs(self):
+        out = StringIO()
+        call_command("bench_db_connections", requests=5, stdout=out)
+        output = out.getvalue()
+        self.assertIn("new connection per request", output)
+        self.assertIn("CONN_MAX_AGE=", output)
@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Agent,
+    BillingSummary,
+    Customer,
+    Department,
+    PaymentDetails,
+    User,
+)
+
+
+class ProfileDetailCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer", first_name="Ada"
+        )
+        self.customer = Customer.objects.create(user=self.customer_user)
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        self.department = Department.objects.create(name="Billing")
+        self.agent = Agent.objects.create(user=agent_user, department=self.department)
+        self.client.force_authenticate(user=self.customer_user)
+        self.customer_url = reverse("customer_detail", kwargs={"pk": self.customer.id})
+        self.agent_url = reverse("agent_detail", kwargs={"pk": self.agent.id})
+
+    def test_detail_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.customer_url)
+        self.assertEqual(response.data["full_name"], "Ada")
+        with self.assertNumQueries(0):
+            self.client.get(self.customer_url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.agent_url)
+        self.assertEqual(response.data["department"], "Billing")
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.client.get(self.customer_url)
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.customer_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(response.content)
+
+    def test_user_save_invalidates_customer(self):
+        etag = self.client.get(self.customer_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer_user.first_name = "Grace"
+            self.customer_user.save()
+
+        response = self.client.get(self.customer_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["full_name"], "Grace")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_department_and_agent_saves_invalidate_agent(self):
+        self.client.get(self.agent_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.name = "Payments"
+            self.department.save()
+        self.assertEqual(self.client.get(self.agent_url).data["department"], "Payments")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agent.is_available = False
+            self.agent.save()
+        self.assertFalse(self.client.get(self.agent_url).data["is_available"])
+
+    def test_recorded_payment_invalidates_customer(self):
+        etag = self.client.get(self.customer_url)["ETag"]
+        payment = PaymentDetails.objects.create(
+            user=self.customer_user,
+            amount=Decimal("10.00"),
+            payment_verified=True,
+            stripe_payment_intent_id="pi_cache",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            BillingSummary.record_payment(payment)
+
+        response = self.client.get(self.customer_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["is_paid"])
+
+    def test_login_does_not_invalidate(self):
+        etag = self.client.get(self.customer_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.customer_user.save(update_fields=["last_login"])
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.client.get(self.customer_url)["ETag"], etag)
+
+    def test_missing_profile_is_not_found(self):
+        response = self.client.get(reverse("customer_detail", kwargs={"pk": 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
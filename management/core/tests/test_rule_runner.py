@@ -1,6 +1,11 @@
 from django.test import TestCase
 from core.models import Department, User, Agent, Customer, Ticket, Status
-from core.automation.rule_runner import RuleEngine
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.automation.rule_runner import RuleEngine, WATERMARK_KEY, run_changed_rules
 from unittest.mock import patch, MagicMock
 
 
@@ -74,3 +79,62 @@ class RuleEngineTest(TestCase):
         self.assertIn({"rule": "AutoClose", "details": "AutoClosed"}, result)
         self.assertIn({"rule": "Department_merge", "details": "Merged"}, result)
         self.assertIn({"rule": "TagByContent", "details": "Ai-WrittenTag"}, result)
+
+
+class RunChangedRulesTest(TestCase):
+    def setUp(self):
+        cache.delete(WATERMARK_KEY)
+        Department.objects.create(name="Support")
+        customer = Customer.objects.create(
+            user=User.objects.create_user(
+                username="cust", password="testpassword123", role="customer"
+            )
+        )
+        self.tickets = [
+            Ticket.objects.create(
+                ticket_id=f"TID-{n}",
+                customer=customer,
+                issue_title="Printer",
+                issue_desc="Broken",
+                status=Status.ASSIGNED,
+            )
+            for n in range(3)
+        ]
+
+    def tearDown(self):
+        cache.delete(WATERMARK_KEY)
+
+    @patch("core.automation.tag_by_content.generate_tags", return_value=["printer"])
+    def test_only_changed_tickets_are_evaluated(self, generate_tags):
+        run_changed_rules()
+        self.assertEqual(generate_tags.call_count, 3)
+        self.assertIsNotNone(cache.get(WATERMARK_KEY))
+
+        # untagged again, but not changed since the last run
+        untouched, changed = self.tickets[:2]
+        Ticket.objects.filter(pk__in=[untouched.pk, changed.pk]).update(
+            tag=None, updated_at=timezone.now() - timedelta(days=1)
+        )
+        changed.refresh_from_db()
+        changed.save()
+        generate_tags.reset_mock()
+
+        results = run_changed_rules()
+
+        generate_tags.assert_called_once()
+        self.assertEqual([result["ticket_id"] for result in results], ["TID-1"])
+        untouched.refresh_from_db()
+        self.assertIsNone(untouched.tag)
+
+    @patch("core.automation.tag_by_content.generate_tags", return_value=[])
+    def test_stale_tickets_are_closed_set_based(self, generate_tags):
+        stale = self.tickets[0]
+        Ticket.objects.filter(pk=stale.pk).update(
+            status=Status.WAITING, updated_at=timezone.now() - timedelta(days=2)
+        )
+        with self.captureOnCommitCallbacks():
+            results = run_changed_rules()
+
+        self.assertIn({"rule": "AutoClose", "details": {"closed": 1}}, results)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Status.CLOSED)
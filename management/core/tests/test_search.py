@@ -0,0 +1,80 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from chat.models import ChatGroup, GroupMessage
+from core.models import Customer, Status, Ticket, User
+
+
+class SearchApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("search")
+
+        self.customer_user = User.objects.create_user(
+            username="testcustomer", password="testpassword123", role="customer"
+        )
+        self.customer = Customer.objects.create(user=self.customer_user)
+        other_user = User.objects.create_user(
+            username="othercustomer", password="testpassword123", role="customer"
+        )
+        other_customer = Customer.objects.create(user=other_user)
+
+        Ticket.objects.create(
+            ticket_id="TID-SEARCH1",
+            customer=self.customer,
+            issue_title="Payment declined",
+            issue_desc="My card payment keeps failing at checkout",
+            status=Status.WAITING,
+        )
+        Ticket.objects.create(
+            ticket_id="TID-SEARCH2",
+            customer=self.customer,
+            issue_title="Login problem",
+            issue_desc="Cannot reset password, payment page unrelated",
+            status=Status.WAITING,
+        )
+        Ticket.objects.create(
+            ticket_id="TID-SEARCH3",
+            customer=other_customer,
+            issue_title="Payment refund",
+            issue_desc="Refund my payment",
+            status=Status.WAITING,
+        )
+
+        group = ChatGroup.objects.create(group_name="support")
+        GroupMessage.objects.create(
+            group=group, author=self.customer_user, body="the invoice was wrong"
+        )
+
+        self.client.force_authenticate(user=self.customer_user)
+
+    def test_ticket_search_ranks_title_matches_first(self):
+        response = self.client.get(self.url, {"q": "payment"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ticket_ids = [row["ticket_id"] for row in response.data["results"]]
+        # customers only see their own tickets; title hits outrank description hits
+        self.assertEqual(ticket_ids, ["TID-SEARCH1", "TID-SEARCH2"])
+
+    def test_ticket_search_pagination(self):
+        response = self.client.get(self.url, {"q": "payment", "page_size": 1})
+        self.assertTrue(response.data["has_next"])
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_search_updates_on_edit(self):
+        ticket = Ticket.objects.get(ticket_id="TID-SEARCH2")
+        ticket.issue_desc = "Cannot reset password"
+        ticket.save()
+        response = self.client.get(self.url, {"q": "payment"})
+        ticket_ids = [row["ticket_id"] for row in response.data["results"]]
+        self.assertEqual(ticket_ids, ["TID-SEARCH1"])
+
+    def test_message_search(self):
+        response = self.client.get(self.url, {"q": "invoices", "type": "messages"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["body"], "the invoice was wrong")
+
+    def test_search_requires_query(self):
+        response = self.client.get(self.url, {"type": "unknown"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
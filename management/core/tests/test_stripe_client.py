@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import stripe
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import stripe_client
+from core.models import User
+
+
+class MockStripeHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for the Stripe API. Responses are taken from the
+    server's `responses` queue as (status, body, delay) and every request is
+    logged with the client port it arrived on.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.server.requests.append(
+            {
+                "method": self.command,
+                "path": self.path,
+                "port": self.client_address[1],
+                "idempotency_key": self.headers.get("Idempotency-Key"),
+            }
+        )
+        code, body, delay = self.server.responses.pop(0)
+        time.sleep(delay)
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client timed out and hung up
+            self.close_connection = True
+
+    do_GET = handle_request
+    do_POST = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+def payment_intent(intent_id):
+    return {
+        "id": intent_id,
+        "object": "payment_intent",
+        "amount": 1000,
+        "currency": "usd",
+        "client_secret": f"{intent_id}_secret",
+    }
+
+
+def country_page(codes, has_more):
+    return {
+        "object": "list",
+        "url": "/v1/country_specs",
+        "has_more": has_more,
+        "data": [
+            {
+                "id": code,
+                "object": "country_spec",
+                "supported_payment_currencies": [currency],
+            }
+            for code, currency in codes
+        ],
+    }
+
+
+SERVER_ERROR = {"error": {"type": "api_error", "message": "boom"}}
+
+
+@patch("stripe._http_client.HTTPClient._sleep_time_seconds", return_value=0)
+class StripeClientTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), MockStripeHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.responses = []
+        settings = override_settings(
+            STRIPE_SECRET_KEY="sk_test_123",
+            STRIPE_API_BASE=f"http://127.0.0.1:{self.server.server_port}",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        stripe_client.reset_client()
+        self.addCleanup(stripe_client.reset_client)
+        stripe_client.metrics.reset()
+
+    def respond(self, *responses):
+        self.server.responses.extend(
+            (code, body, delay) for code, body, delay in responses
+        )
+
+    def test_calls_reuse_one_keep_alive_connection(self, _):
+        self.respond(*[(200, payment_intent(f"pi_{n}"), 0) for n in range(3)])
+        for n in range(3):
+            intent = stripe_client.create_payment_intent(
+                amount=1000, currency="usd", idempotency_key=f"key-{n}"
+            )
+            self.assertEqual(intent.id, f"pi_{n}")
+        self.assertEqual(len({r["port"] for r in self.server.requests}), 1)
+
+    def test_idempotent_call_is_retried_with_same_key(self, _):
+        self.respond((500, SERVER_ERROR, 0), (200, payment_intent("pi_1"), 0))
+        intent = stripe_client.create_payment_intent(
+            amount=1000, currency="usd", idempotency_key="key-1"
+        )
+        self.assertEqual(intent.id, "pi_1")
+        self.assertEqual(
+            [r["idempotency_key"] for r in self.server.requests], ["key-1", "key-1"]
+        )
+
+    def test_non_idempotent_call_is_not_retried(self, _):
+        self.respond((500, SERVER_ERROR, 0), (200, {}, 0))
+        with self.assertRaises(stripe.APIError):
+            stripe_client.call(
+                "customers.create",
+                lambda client, options: client.customers.create(options=options),
+                idempotent=False,
+            )
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_deadline_bounds_each_attempt(self, _):
+        self.respond(*[(200, payment_intent("pi_1"), 1)] * 3)
+        started = time.perf_counter()
+        with self.assertRaises(stripe.APIConnectionError):
+            stripe_client.create_payment_intent(
+                amount=1000, currency="usd", idempotency_key="key-1", timeout=0.2
+            )
+        self.assertLess(time.perf_counter() - started, 1.5)
+        # the first attempt plus STRIPE_MAX_NETWORK_RETRIES
+        self.assertEqual(len(self.server.requests), 3)
+
+        stats = stripe_client.metrics.snapshot()["payment_intents.create"]
+        self.assertEqual(stats["count"], 1)
+        self.assertEqual(stats["errors"], 1)
+
+    def test_country_specs_are_paged_through(self, _):
+        self.respond(
+            (200, country_page([("US", "usd"), ("GB", "gbp")], True), 0),
+            (200, country_page([("JP", "jpy")], False), 0),
+        )
+        specs = list(stripe_client.list_country_specs())
+        self.assertEqual([spec.id for spec in specs], ["US", "GB", "JP"])
+        self.assertIn("starting_after=GB", self.server.requests[1]["path"])
+
+        stats = stripe_client.metrics.snapshot()["country_specs.list"]
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["errors"], 0)
+
+
+class StripeMetricsViewTest(TestCase):
+    def setUp(self):
+        stripe_client.metrics.reset()
+        self.addCleanup(stripe_client.metrics.reset)
+        self.client = APIClient()
+
+    def test_staff_read_the_call_metrics(self):
+        stripe_client.metrics.record("payment_intents.create", 0.5, ok=True)
+        stripe_client.metrics.record("payment_intents.create", 1.5, ok=False)
+        staff = User.objects.create_user(
+            username="staff", password="pass", is_staff=True
+        )
+        self.client.force_authenticate(user=staff)
+
+        response = self.client.get(reverse("stripe_metrics"))
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()["payment_intents.create"]
+        self.assertEqual(stats["count"], 2)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["avg_seconds"], 1.0)
+
+    def test_metrics_are_staff_only(self):
+        user = User.objects.create_user(username="user", password="pass")
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse("stripe_metrics"))
+        self.assertEqual(response.status_code, 403)
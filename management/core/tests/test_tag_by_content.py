@@ -62,11 +62,14 @@ class TagByContentTest(TestCase):
     @patch("core.automation.tag_by_content.generate_tags")
     def test_apply_adds_tags(self, mock_generate_tags):
         mock_generate_tags.return_value = ["billing", "charge"]
+        updated_at = self.ticket.updated_at
         rule = TagByContent(ticket=self.ticket.ticket_id)
         response = rule.apply()
 
         self.ticket.refresh_from_db()
         self.assertEqual(self.ticket.tag, "billing, charge")
+        # tagging does not reset the inactivity clock
+        self.assertEqual(self.ticket.updated_at, updated_at)
         self.assertIn("success", response)
         self.assertIn("billing", response["success"])
 
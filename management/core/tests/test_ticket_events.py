@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from chat.routing import websocket_urlpatterns
+from core.automation.auto_close import AutoClose
+from core.constants import Status
+from core.models import Agent, Customer, Department, Ticket, User
+
+
+class TicketEventsConsumerTest(TransactionTestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Support")
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        self.agent = Agent.objects.create(user=agent_user, department=department)
+        self.customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer"
+        )
+        customer = Customer.objects.create(user=self.customer_user)
+        self.stranger = User.objects.create_user(
+            username="stranger", password="testpass", role="customer"
+        )
+        now = timezone.now()
+        self.tickets = []
+        for n in range(3):
+            ticket = Ticket.objects.create(
+                ticket_id=f"T{n}", customer=customer, issue_title="Help"
+            )
+            Ticket.objects.filter(pk=ticket.pk).update(
+                created_at=now - timedelta(minutes=5 - n)
+            )
+            ticket.refresh_from_db()
+            self.tickets.append(ticket)
+
+    async def connect(self, ticket_id, user):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/tickets/{ticket_id}/"
+        )
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    @staticmethod
+    @sync_to_async
+    def assign(ticket, agent):
+        ticket.agent = agent
+        ticket.status = Status.ASSIGNED
+        ticket.save()
+
+    async def test_pushes_assignment_and_queue_position(self):
+        communicator, connected = await self.connect("T2", self.customer_user)
+        self.assertTrue(connected)
+        state = await communicator.receive_json_from()
+        self.assertEqual(state["status"], Status.WAITING)
+        self.assertEqual(state["queue_position"], 3)
+
+        # an older ticket is assigned, so T2 moves up
+        await self.assign(self.tickets[0], self.agent)
+        state = await communicator.receive_json_from()
+        self.assertEqual(state["queue_position"], 2)
+
+        await self.assign(self.tickets[2], self.agent)
+        state = await communicator.receive_json_from()
+        self.assertEqual(state["status"], Status.ASSIGNED)
+        self.assertEqual(state["agent"], "agent")
+        self.assertIsNone(state["queue_position"])
+
+        # no longer waiting, so queue changes are not pushed
+        await self.assign(self.tickets[1], self.agent)
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_other_tier_does_not_shift_position(self):
+        communicator, _ = await self.connect("T2", self.customer_user)
+        state = await communicator.receive_json_from()
+        self.assertEqual(state["queue_position"], 3)
+        self.assertNotIn("is_paid", state)
+
+        @sync_to_async
+        def paid_ticket_joins():
+            user = User.objects.create_user(
+                username="paid", password="testpass", role="customer"
+            )
+            customer = Customer.objects.create(user=user, is_paid=True)
+            ticket = Ticket.objects.create(
+                ticket_id="P0", customer=customer, status=Status.CLOSED
+            )
+            Ticket.objects.filter(pk=ticket.pk).update(
+                created_at=timezone.now() - timedelta(minutes=8)
+            )
+            ticket.refresh_from_db()
+            ticket.status = Status.WAITING
+            ticket.save()
+
+        await paid_ticket_joins()
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_saves_without_changes_are_not_pushed(self):
+        communicator, _ = await self.connect("T0", self.customer_user)
+        await communicator.receive_json_from()
+        await sync_to_async(self.tickets[0].save)()
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_bulk_close_refreshes_queue_subscribers(self):
+        stale, _ = await self.connect("T0", self.customer_user)
+        await stale.receive_json_from()
+        waiting, _ = await self.connect("T2", self.customer_user)
+        await waiting.receive_json_from()
+
+        await sync_to_async(Ticket.objects.filter(ticket_id="T0").update)(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        await sync_to_async(AutoClose.close_stale)(inactive_days=1)
+
+        state = await stale.receive_json_from()
+        self.assertEqual(state["status"], Status.CLOSED)
+        self.assertIsNone(state["queue_position"])
+        state = await waiting.receive_json_from()
+        self.assertEqual(state["queue_position"], 2)
+        await stale.disconnect()
+        await waiting.disconnect()
+
+    async def test_rejects_other_users_and_unknown_tickets(self):
+        _, connected = await self.connect("T0", self.stranger)
+        self.assertFalse(connected)
+        _, connected = await self.connect("missing", self.customer_user)
+        self.assertFalse(connected)
@@ -0,0 +1,99 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import ticket_log
+from core.constants import Status, StatusCode
+from core.models import (
+    Agent,
+    AutoEscalate,
+    Customer,
+    Department,
+    Ticket,
+    TicketCurrentState,
+    TicketEvent,
+    User,
+)
+from core.ticket_queue import assign_waiting_tickets
+
+
+class TicketEventLogTest(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Support")
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        self.agent = Agent.objects.create(user=agent_user, department=department)
+        customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer"
+        )
+        self.customer = Customer.objects.create(user=customer_user)
+
+    def events(self, ticket):
+        return list(
+            TicketEvent.objects.filter(ticket=ticket)
+            .order_by("id")
+            .values_list("previous_status", "status", "agent_id")
+        )
+
+    def test_every_transition_is_logged(self):
+        ticket = Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        ticket.issue_title = "No status change"
+        ticket.save()
+        AutoEscalate.escalate_changes("T1", Status.ASSIGNED, self.agent)
+        ticket.refresh_from_db()
+        ticket.status = Status.CLOSED
+        ticket.save()
+
+        self.assertEqual(
+            self.events(ticket),
+            [
+                (None, StatusCode.WAITING, None),
+                (StatusCode.WAITING, StatusCode.ASSIGNED, self.agent.id),
+                (StatusCode.ASSIGNED, StatusCode.CLOSED, self.agent.id),
+            ],
+        )
+
+    def test_queue_run_writes_events_in_bulk(self):
+        self.agent.max_customers = 10
+        self.agent.save()
+        for n in range(5):
+            Ticket.objects.create(ticket_id=f"T{n}", customer=self.customer)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(assign_waiting_tickets(), 5)
+        inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "core_ticketevent"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            TicketEvent.objects.filter(status=StatusCode.ASSIGNED).count(), 5
+        )
+
+    def test_buffer_is_dropped_on_error(self):
+        ticket = Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        with self.assertRaises(RuntimeError):
+            with ticket_log.buffered():
+                ticket_log.append(ticket, Status.WAITING)
+                raise RuntimeError
+        self.assertEqual(TicketEvent.objects.filter(ticket=ticket).count(), 1)
+
+    def test_current_state_view(self):
+        ticket = Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        ticket.agent = self.agent
+        ticket.status = Status.ASSIGNED
+        ticket.save()
+        Ticket.objects.create(ticket_id="T2", customer=self.customer)
+
+        with connection.cursor() as cursor:
+            # CONCURRENTLY cannot run inside the test transaction
+            cursor.execute("REFRESH MATERIALIZED VIEW core_ticket_current_state")
+        state = TicketCurrentState.objects.get(ticket=ticket)
+        self.assertEqual(state.status, StatusCode.ASSIGNED)
+        self.assertEqual(state.agent_id, self.agent.id)
+        self.assertEqual(state.transitions, 2)
+        self.assertEqual(
+            TicketCurrentState.objects.filter(status=StatusCode.WAITING).count(), 1
+        )
@@ -0,0 +1,179 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core import ticket_queue
+from core.constants import QueueTier, Status
+from core.models import Agent, Customer, Department, Ticket, User
+from core.tasks import process_ticket_queue
+
+
+class TicketQueueTriggerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        department = Department.objects.create(name="Support")
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        Agent.objects.create(user=agent_user, department=department)
+        customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer"
+        )
+        self.customer = Customer.objects.create(user=customer_user)
+
+    @patch("core.tasks.process_ticket_queue.apply_async")
+    def test_burst_of_enqueues_schedules_one_run(self, mock_apply):
+        results = [ticket_queue.schedule_run() for _ in range(1000)]
+        self.assertEqual(results.count(True), 1)
+        mock_apply.assert_called_once_with(
+            countdown=ticket_queue.QUEUE_DEBOUNCE_SECONDS
+        )
+
+        # once the run starts, new enqueues schedule the next one
+        process_ticket_queue.apply()
+        self.assertTrue(ticket_queue.schedule_run())
+        self.assertEqual(mock_apply.call_count, 2)
+
+    def test_run_assigns_waiting_tickets(self):
+        Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        self.assertEqual(process_ticket_queue.apply().get(), 1)
+        self.assertEqual(Ticket.objects.get().status, Status.ASSIGNED)
+
+    @patch("core.tasks.process_ticket_queue.apply_async")
+    def test_concurrent_run_is_deferred(self, mock_apply):
+        Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        # a run is pending and another one is in progress
+        cache.add(ticket_queue.PENDING_KEY, 1)
+        cache.add(ticket_queue.RUN_LOCK_KEY, 1)
+
+        self.assertIsNone(process_ticket_queue.apply().get())
+        self.assertEqual(Ticket.objects.get().status, Status.WAITING)
+        mock_apply.assert_called_once()
+
+    @patch("core.tasks.process_ticket_queue.apply_async", side_effect=OSError)
+    def test_broker_failure_does_not_block_later_triggers(self, mock_apply):
+        self.assertFalse(ticket_queue.schedule_run())
+        self.assertFalse(ticket_queue.schedule_run())
+        self.assertEqual(mock_apply.call_count, 2)
+
+
+class TierSchedulerTest(SimpleTestCase):
+    weights = {QueueTier.PAID: 3, QueueTier.FREE: 1}
+
+    def picks(self, scheduler, count, ready=tuple(QueueTier.values)):
+        return [scheduler.pick(list(ready)) for _ in range(count)]
+
+    def test_tiers_are_served_by_weight(self):
+        picks = self.picks(ticket_queue.TierScheduler(self.weights), 400)
+        self.assertEqual(picks.count(QueueTier.PAID), 300)
+        self.assertEqual(picks.count(QueueTier.FREE), 100)
+
+    def test_idle_tier_does_not_bank_turns(self):
+        scheduler = ticket_queue.TierScheduler(self.weights)
+        self.picks(scheduler, 100, ready=[QueueTier.PAID])
+        picks = self.picks(scheduler, 8)
+        self.assertEqual(picks.count(QueueTier.FREE), 2)
+
+    def test_state_round_trips(self):
+        scheduler = ticket_queue.TierScheduler(self.weights)
+        self.picks(scheduler, 3)
+        restored = ticket_queue.TierScheduler(self.weights, scheduler.state())
+        self.assertEqual(self.picks(restored, 5), self.picks(scheduler, 5))
+
+
+class PriorityAssignmentTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        department = Department.objects.create(name="Support")
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        self.agent = Agent.objects.create(
+            user=agent_user, department=department, max_customers=1
+        )
+        self.free = self.customer("free", is_paid=False)
+        self.paid = self.customer("paid", is_paid=True)
+
+    def customer(self, username, is_paid):
+        user = User.objects.create_user(
+            username=username, password="testpass", role="customer"
+        )
+        return Customer.objects.create(user=user, is_paid=is_paid)
+
+    def waiting(self, ticket_id, customer, waited):
+        ticket = Ticket.objects.create(ticket_id=ticket_id, customer=customer)
+        Ticket.objects.filter(pk=ticket.pk).update(
+            created_at=timezone.now() - timedelta(seconds=waited)
+        )
+        return ticket
+
+    def assigned(self):
+        return list(
+            Ticket.objects.filter(status=Status.ASSIGNED).values_list(
+                "ticket_id", flat=True
+            )
+        )
+
+    def test_paid_ticket_goes_before_older_free_ticket(self):
+        self.waiting("FREE1", self.free, waited=60)
+        self.waiting("PAID1", self.paid, waited=5)
+        self.assertEqual(ticket_queue.assign_waiting_tickets(), 1)
+        self.assertEqual(self.assigned(), ["PAID1"])
+
+    def test_aged_free_ticket_is_promoted(self):
+        self.waiting("FREE1", self.free, waited=ticket_queue.QUEUE_AGING_SECONDS + 1)
+        self.waiting("PAID1", self.paid, waited=5)
+        ticket_queue.assign_waiting_tickets()
+        self.assertEqual(self.assigned(), ["FREE1"])
+
+    def test_metrics_per_tier(self):
+        self.waiting("FREE1", self.free, waited=60)
+        self.waiting("FREE2", self.free, waited=30)
+        self.waiting("PAID1", self.paid, waited=5)
+        ticket_queue.assign_waiting_tickets()
+
+        metrics = ticket_queue.queue_metrics()
+        self.assertEqual(metrics[QueueTier.FREE]["depth"], 2)
+        self.assertGreaterEqual(metrics[QueueTier.FREE]["oldest_wait_seconds"], 60)
+        self.assertEqual(metrics[QueueTier.PAID]["depth"], 0)
+        self.assertEqual(metrics[QueueTier.PAID]["assigned"], 1)
+        self.assertGreaterEqual(metrics[QueueTier.PAID]["avg_wait_seconds"], 5)
+        self.assertIsNone(metrics[QueueTier.FREE]["avg_wait_seconds"])
+        self.assertIsNone(metrics[QueueTier.FREE]["p99_wait_seconds"])
+
+    def test_waits_run_from_queued_at(self):
+        self.agent.max_customers = 3
+        self.agent.save()
+        now = timezone.now()
+        for n, queued in enumerate((10, 20, 300)):
+            ticket = self.waiting(f"PAID{n}", self.paid, waited=3600 + n)
+            Ticket.objects.filter(pk=ticket.pk).update(
+                queued_at=now - timedelta(seconds=queued)
+            )
+        self.assertEqual(ticket_queue.assign_waiting_tickets(), 3)
+
+        paid = ticket_queue.queue_metrics()[QueueTier.PAID]
+        self.assertAlmostEqual(paid["p50_wait_seconds"], 20, delta=5)
+        self.assertAlmostEqual(paid["p99_wait_seconds"], 300, delta=5)
+        self.assertAlmostEqual(paid["max_wait_seconds"], 300, delta=5)
+
+    def test_position_is_counted_within_tier(self):
+        for n in range(3):
+            self.waiting(f"FREE{n}", self.free, waited=60 - n)
+        self.waiting("PAID1", self.paid, waited=5)
+        paid = Ticket.objects.get(ticket_id="PAID1")
+        newest_free = Ticket.objects.get(ticket_id="FREE2")
+        self.assertEqual(ticket_queue.queue_position("PAID1", paid.created_at, True), 1)
+        self.assertEqual(
+            ticket_queue.queue_position("FREE2", newest_free.created_at, False), 3
+        )
+
+        # an aged free ticket is ahead of the paid one in the paid tier
+        self.waiting("AGED", self.free, waited=ticket_queue.QUEUE_AGING_SECONDS + 1)
+        self.assertEqual(ticket_queue.queue_position("PAID1", paid.created_at, True), 2)
+        self.assertEqual(
+            ticket_queue.queue_position("FREE2", newest_free.created_at, False), 3
+        )
@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import wait_estimator
+from core.constants import QueueTier, Status
+from core.dumps import QUEUE_TIER_WEIGHTS
+from core.models import Agent, Customer, Department, Ticket, User
+
+TAU = wait_estimator.ETA_RATE_DECAY_SECONDS
+
+
+class WaitEstimatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="Support")
+        agent_user = User.objects.create_user(
+            username="agent", password="testpass", role="agent"
+        )
+        self.agent = Agent.objects.create(user=agent_user, department=self.department)
+        customer_user = User.objects.create_user(
+            username="cust", password="testpass", role="customer"
+        )
+        self.customer = Customer.objects.create(user=customer_user)
+
+    def test_rate_is_decayed_incrementally(self):
+        self.assertIsNone(wait_estimator.estimate_wait(3))
+        with patch("core.wait_estimator.time.time", return_value=1000.0):
+            for _ in range(6):
+                wait_estimator.record_assignment(self.department.id)
+            self.assertAlmostEqual(wait_estimator.service_rate(), 6 / TAU)
+            self.assertAlmostEqual(
+                wait_estimator.service_rate(self.department.id), 6 / TAU
+            )
+            self.assertEqual(wait_estimator.estimate_wait(3), round(3 * TAU / 6))
+
+        # one decay period later the rate has dropped by e
+        with patch("core.wait_estimator.time.time", return_value=1000.0 + TAU):
+            self.assertAlmostEqual(wait_estimator.service_rate() * TAU * 2.71828, 6, 3)
+
+    def test_assignments_are_recorded_on_commit(self):
+        ticket = Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.agent = self.agent
+            ticket.status = Status.ASSIGNED
+            ticket.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.issue_title = "Still assigned"
+            ticket.save()
+        self.assertAlmostEqual(wait_estimator.service_rate() * TAU, 1, 3)
+
+    def test_status_includes_estimate(self):
+        Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        for _ in range(4):
+            wait_estimator.record_assignment(self.department.id)
+        client = APIClient()
+        client.force_authenticate(user=self.customer.user)
+        response = client.get(reverse("ticket_status", kwargs={"id": "T1"}))
+        self.assertAlmostEqual(
+            response.data["estimated_wait_seconds"], TAU / 4, delta=1
+        )
+
+    def test_estimate_uses_the_tier_share(self):
+        for _ in range(4):
+            wait_estimator.record_assignment(self.department.id)
+        Ticket.objects.create(ticket_id="F1", customer=self.customer)
+        self.assertAlmostEqual(
+            wait_estimator.estimate_wait(1, QueueTier.FREE), TAU / 4, delta=1
+        )
+
+        paid_user = User.objects.create_user(
+            username="paid", password="testpass", role="customer"
+        )
+        paid = Customer.objects.create(user=paid_user, is_paid=True)
+        Ticket.objects.create(ticket_id="P1", customer=paid)
+        weights = QUEUE_TIER_WEIGHTS
+        total = sum(weights.values())
+        # both tiers wait, so each only gets its weighted part of the agents
+        self.assertAlmostEqual(
+            wait_estimator.estimate_wait(1, QueueTier.FREE),
+            TAU / 4 * total / weights[QueueTier.FREE],
+            delta=1,
+        )
+        self.assertAlmostEqual(
+            wait_estimator.estimate_wait(1, QueueTier.PAID),
+            TAU / 4 * total / weights[QueueTier.PAID],
+            delta=1,
+        )
+
+    def test_seeds_from_event_log(self):
+        ticket = Ticket.objects.create(ticket_id="T1", customer=self.customer)
+        for status in (Status.ASSIGNED, Status.WAITING, Status.ASSIGNED):
+            ticket.status = status
+            ticket.agent = self.agent if status == Status.ASSIGNED else None
+            ticket.save()
+        cache.clear()
+        wait_estimator.seed_from_history()
+        self.assertAlmostEqual(wait_estimator.service_rate() * TAU, 2, 2)
+
+    def test_sla_alert(self):
+        for n in range(3):
+            Ticket.objects.create(ticket_id=f"T{n}", customer=self.customer)
+        with self.assertLogs("core.wait_estimator", level="WARNING"):
+            result = wait_estimator.check_sla()
+        self.assertTrue(result["breached"])
+        self.assertIsNone(result["projected_wait_seconds"])
+
+        for _ in range(60):
+            wait_estimator.record_assignment(self.department.id)
+        result = wait_estimator.check_sla()
+        self.assertFalse(result["breached"])
+        self.assertEqual(result["projected_wait_seconds"], round(3 * TAU / 60))
+        self.assertAlmostEqual(
+            result["departments"][self.department.id], 60 * 60 / TAU, 2
+        )
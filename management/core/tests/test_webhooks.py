@@ -0,0 +1,187 @@
+import json
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+import stripe
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.constants import WebhookStatus
+from core.models import PaymentDetails, StripeEvent, User
+from core.webhooks import process_pending_events
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+def make_event(event_id, event_type, intent, created):
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": event_type,
+        "created": created,
+        "data": {"object": intent},
+    }
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class StripeWebhookInboxTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("stripe_event")
+        self.user = User.objects.create_user(
+            username="payer", password="testpass", role="customer"
+        )
+
+    def intent(self, intent_id, amount=2500, user_id=None):
+        return {
+            "id": intent_id,
+            "object": "payment_intent",
+            "amount": amount,
+            "metadata": {"user_id": str(user_id or self.user.id)},
+        }
+
+    def deliver(self, event, secret=WEBHOOK_SECRET, broker_error=None):
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = stripe.WebhookSignature._compute_signature(
+            f"{timestamp}.{payload}", secret
+        )
+        with patch(
+            "core.api.payments.process_stripe_events.delay", side_effect=broker_error
+        ) as mock_delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    self.url,
+                    payload,
+                    content_type="application/json",
+                    HTTP_STRIPE_SIGNATURE=f"t={timestamp},v1={signature}",
+                )
+        return response, mock_delay
+
+    def test_event_is_acknowledged_when_the_broker_is_down(self):
+        event = make_event(
+            "evt_down", "payment_intent.succeeded", self.intent("pi_down"), 1743300000
+        )
+        response, mock_delay = self.deliver(
+            event, broker_error=ConnectionError("broker down")
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_delay.assert_called_once()
+        self.assertEqual(
+            StripeEvent.objects.get(event_id="evt_down").status,
+            WebhookStatus.PENDING,
+        )
+
+    def test_signed_event_is_stored_and_consumer_is_triggered(self):
+        event = make_event(
+            "evt_1", "payment_intent.succeeded", self.intent("pi_1"), 1743300000
+        )
+        response, mock_delay = self.deliver(event)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_delay.assert_called_once()
+        stored = StripeEvent.objects.get(event_id="evt_1")
+        self.assertEqual(stored.payment_intent_id, "pi_1")
+        self.assertEqual(stored.status, WebhookStatus.PENDING)
+        self.assertFalse(PaymentDetails.objects.exists())
+
+        self.assertEqual(process_pending_events(), 1)
+        payment = PaymentDetails.objects.get(stripe_payment_intent_id="pi_1")
+        self.assertEqual(payment.amount, Decimal("25.00"))
+        self.assertTrue(payment.payment_verified)
+
+    def test_bad_signature_is_rejected(self):
+        event = make_event(
+            "evt_1", "payment_intent.succeeded", self.intent("pi_1"), 1743300000
+        )
+        response, _ = self.deliver(event, secret="whsec_other")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_redelivered_event_is_applied_once(self):
+        event = make_event(
+            "evt_1", "payment_intent.succeeded", self.intent("pi_1"), 1743300000
+        )
+        self.deliver(event)
+        process_pending_events()
+        PaymentDetails.objects.update(amount=Decimal("1.00"))
+
+        response, mock_delay = self.deliver(event)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_delay.assert_not_called()
+        self.assertEqual(process_pending_events(), 0)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.assertEqual(PaymentDetails.objects.get().amount, Decimal("1.00"))
+
+    def test_failed_event_holds_back_later_events_of_same_intent(self):
+        self.deliver(
+            make_event(
+                "evt_1",
+                "payment_intent.succeeded",
+                self.intent("pi_1", user_id=999999),
+                1743300000,
+            )
+        )
+        self.deliver(
+            make_event(
+                "evt_2",
+                "payment_intent.payment_failed",
+                self.intent("pi_1"),
+                1743300010,
+            )
+        )
+        self.deliver(
+            make_event(
+                "evt_3", "payment_intent.succeeded", self.intent("pi_2"), 1743300020
+            )
+        )
+
+        process_pending_events()
+        statuses = dict(StripeEvent.objects.values_list("event_id", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                "evt_1": WebhookStatus.PENDING,
+                "evt_2": WebhookStatus.PENDING,
+                "evt_3": WebhookStatus.PROCESSED,
+            },
+        )
+        self.assertEqual(StripeEvent.objects.get(event_id="evt_1").attempts, 1)
+        self.assertEqual(StripeEvent.objects.get(event_id="evt_2").attempts, 0)
+
+        # once the first event is given up on, the intent is unblocked
+        StripeEvent.objects.filter(event_id="evt_1").update(attempts=4)
+        process_pending_events()
+        statuses = dict(StripeEvent.objects.values_list("event_id", "status"))
+        self.assertEqual(statuses["evt_1"], WebhookStatus.FAILED)
+        self.assertEqual(statuses["evt_2"], WebhookStatus.PROCESSED)
+
+    def test_consumer_is_single_flight(self):
+        self.deliver(
+            make_event(
+                "evt_1", "payment_intent.succeeded", self.intent("pi_1"), 1743300000
+            )
+        )
+        cache.add("stripe_events:consumer", 1)
+        self.assertIsNone(process_pending_events())
+        cache.delete("stripe_events:consumer")
+        self.assertEqual(process_pending_events(), 1)
+
+    def test_events_are_processed_in_batches(self):
+        for n in range(5):
+            self.deliver(
+                make_event(
+                    f"evt_{n}",
+                    "payment_intent.succeeded",
+                    self.intent(f"pi_{n}"),
+                    1743300000 + n,
+                )
+            )
+        self.assertEqual(process_pending_events(batch_size=2), 5)
+        self.assertEqual(PaymentDetails.objects.count(), 5)
@@ -0,0 +1,169 @@
+"""
+Real-time ticket events over the channel layer.
+
+Every saved change of a ticket's status or agent is pushed, once the
+transaction commits, to the `ticket.<id>` group that the ticket's
+WebSocket subscribers listen on. Tickets entering or leaving the waiting
+queue are also announced on a single QUEUE_GROUP, with the ticket's
+created_at and payment flag, so every subscriber still waiting can shift
+its own position within its tier by one without asking the database.
+Bulk changes that move many tickets at once send a single queue refresh
+instead, on which subscribers re-read their state.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+import re
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from core.constants import Status
+from core.models import Agent, Customer, Ticket
+from core.ticket_queue import queue_position
+
+logger = logging.getLogger(__name__)
+
+QUEUE_GROUP = "ticket_queue"
+
+
+def ticket_group(ticket_id):
+    # group names are limited to ASCII alphanumerics, hyphens, underscores
+    # and periods
+    return "ticket." + re.sub(r"[^\w.-]", "_", ticket_id, flags=re.ASCII)[:80]
+
+
+def can_follow(user, customer_user_id, agent_user_id):
+    """Only a ticket's customer, its agent and staff may follow it."""
+    return (
+        user.id in (customer_user_id, agent_user_id) or user.is_staff or user.is_admin()
+    )
+
+
+def snapshot(ticket_id, user):
+    """
+    Current state of a ticket as sent to a new subscriber, or None when the
+    ticket does not exist or `user` may not follow it.
+    """
+    ticket = (
+        Ticket.objects.filter(ticket_id=ticket_id)
+        .values(
+            "ticket_id",
+            "status",
+            "created_at",
+            "customer__is_paid",
+            "customer__user_id",
+            "agent__user_id",
+            "agent__user__username",
+        )
+        .first()
+    )
+    if ticket is None:
+        return None
+    if not can_follow(user, ticket["customer__user_id"], ticket["agent__user_id"]):
+        return None
+    return {
+        "ticket_id": ticket["ticket_id"],
+        "status": ticket["status"],
+        "agent": ticket["agent__user__username"],
+        "created_at": ticket["created_at"].timestamp(),
+        "is_paid": ticket["customer__is_paid"],
+        "queue_position": (
+            queue_position(ticket_id, ticket["created_at"], ticket["customer__is_paid"])
+            if ticket["status"] == Status.WAITING
+            else None
+        ),
+    }
+
+
+def send(group, message):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(group, message)
+    except Exception as e:
+        # a lost push only delays the client until its next snapshot
+        logger.warning(f"Could not publish to {group}: {e}")
+
+
+def queue_message(left, ticket_id, created_at, is_paid):
+    return {
+        "type": "queue.left" if left else "queue.joined",
+        "ticket_id": ticket_id,
+        "created_at": created_at.timestamp(),
+        "is_paid": is_paid,
+    }
+
+
+def customer_is_paid(customer_id):
+    return bool(
+        Customer.objects.filter(pk=customer_id)
+        .values_list("is_paid", flat=True)
+        .first()
+    )
+
+
+def publish(ticket, previous_status):
+    """
+    Push the new state of `ticket` after the current transaction commits.
+    `previous_status` is None for a new ticket or an unknown previous state.
+    """
+    ticket_id = ticket.ticket_id
+    if not ticket_id:
+        return
+    status, agent_id, created_at = ticket.status, ticket.agent_id, ticket.created_at
+    customer_id = ticket.customer_id
+
+    def _publish():
+        was_waiting = previous_status == Status.WAITING
+        queue_changed = was_waiting != (status == Status.WAITING)
+        is_paid = (
+            customer_is_paid(customer_id)
+            if queue_changed or status == Status.WAITING
+            else None
+        )
+        event = {
+            "ticket_id": ticket_id,
+            "status": status,
+            "agent": (
+                Agent.objects.filter(pk=agent_id)
+                .values_list("user__username", flat=True)
+                .first()
+                if agent_id
+                else None
+            ),
+            "queue_position": (
+                queue_position(ticket_id, created_at, is_paid)
+                if status == Status.WAITING
+                else None
+            ),
+        }
+        send(ticket_group(ticket_id), {"type": "ticket.event", "event": event})
+
+        if queue_changed:
+            send(
+                QUEUE_GROUP, queue_message(was_waiting, ticket_id, created_at, is_paid)
+            )
+
+    transaction.on_commit(_publish)
+
+
+def publish_queue_left(ticket):
+    """Announce that a waiting ticket left the queue without a status change."""
+    ticket_id, created_at = ticket.ticket_id, ticket.created_at
+    customer_id = ticket.customer_id
+
+    def _publish():
+        is_paid = customer_is_paid(customer_id)
+        send(QUEUE_GROUP, queue_message(True, ticket_id, created_at, is_paid))
+
+    transaction.on_commit(_publish)
+
+
+def publish_queue_refresh():
+    """Ask every queue subscriber to re-read its state after a bulk change."""
+    transaction.on_commit(lambda: send(QUEUE_GROUP, {"type": "queue.refresh"}))
@@ -0,0 +1,78 @@
+"""
+Ticket event log.
+
+Every change of a ticket's status or agent is appended to TicketEvent by
+the Ticket post_save hook, inside the same transaction as the change, so
+the log commits and rolls back with it. Code that changes many tickets at
+once wraps the work in `buffered()`: events are then collected and written
+with a single bulk_create when the block ends instead of one INSERT per
+ticket.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+from django.utils import timezone
+
+from core.constants import StatusCode
+from core.dumps import TICKET_EVENT_BATCH_SIZE
+from core.models import TicketEvent
+
+_buffer = ContextVar("ticket_log_buffer", default=None)
+
+
+def event_for(ticket, previous_status=None, at=None):
+    return TicketEvent(
+        ticket_id=ticket.pk,
+        status=StatusCode.of(ticket.status),
+        previous_status=(
+            StatusCode.of(previous_status) if previous_status is not None else None
+        ),
+        agent_id=ticket.agent_id,
+        created_at=at or timezone.now(),
+    )
+
+
+def append(ticket, previous_status=None):
+    """Log the current status and agent of `ticket`."""
+    event = event_for(ticket, previous_status)
+    events = _buffer.get()
+    if events is None:
+        event.save()
+    else:
+        events.append(event)
+
+
+def write(events):
+    TicketEvent.objects.bulk_create(events, batch_size=TICKET_EVENT_BATCH_SIZE)
+
+
+@contextmanager
+def buffered():
+    """
+    Collect the events appended inside the block and write them in bulk when
+    it exits without an error. Nested blocks share the outer buffer.
+    """
+    if _buffer.get() is not None:
+        yield
+        return
+    events = []
+    token = _buffer.set(events)
+    try:
+        yield
+    finally:
+        _buffer.reset(token)
+    if events:
+        write(events)
+
+
+def refresh_current_state():
+    """Refresh the core_ticket_current_state materialized view."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "REFRESH MATERIALIZED VIEW CONCURRENTLY core_ticket_current_state"
+        )
@@ -0,0 +1,295 @@
+"""
+Waiting-ticket queue processing.
+
+Queueing a ticket only asks for a queue run through `schedule_run`. The
+first request sets a pending flag and schedules one run
+QUEUE_DEBOUNCE_SECONDS later; any further requests before that run starts
+are absorbed by the flag, so a burst of enqueues costs a single scan. Runs
+are single-flight: a run that finds another in progress re-arms the
+trigger instead of competing for the same row locks.
+
+Waiting tickets are split into priority tiers (QueueTier). Agents are
+handed out between tiers by weighted fair queuing with QUEUE_TIER_WEIGHTS,
+so paid customers get most assignments while free ones still get their
+share, and tickets waiting longer than QUEUE_AGING_SECONDS are promoted
+to the paid tier so nothing starves. Within a tier tickets are served in
+created_at order, and `queue_position` counts positions the same way.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+import math
+from collections import deque
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core import ticket_log
+from core.constants import QueueTier, Status
+from core.dumps import (
+    QUEUE_AGING_SECONDS,
+    QUEUE_DEBOUNCE_SECONDS,
+    QUEUE_PENDING_TIMEOUT,
+    QUEUE_RUN_LOCK_SECONDS,
+    QUEUE_TIER_WEIGHTS,
+    QUEUE_WAIT_SAMPLES,
+)
+from core.models import Agent, Ticket
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "ticket_queue:pending"
+RUN_LOCK_KEY = "ticket_queue:running"
+SCHEDULER_KEY = "ticket_queue:scheduler"
+METRICS_KEY = "ticket_queue:metrics"
+
+
+def tier_for(is_paid, waited_seconds):
+    if is_paid or waited_seconds >= QUEUE_AGING_SECONDS:
+        return QueueTier.PAID
+    return QueueTier.FREE
+
+
+def ticket_tier(created_at, is_paid, now=None):
+    """Tier of a waiting ticket created at `created_at`."""
+    now = now or timezone.now()
+    return tier_for(is_paid, (now - created_at).total_seconds())
+
+
+def tier_filter(tier, now=None):
+    """Q matching the tickets that `tier_for` puts in `tier`."""
+    aged = (now or timezone.now()) - timedelta(seconds=QUEUE_AGING_SECONDS)
+    if tier == QueueTier.PAID:
+        return Q(customer__is_paid=True) | Q(created_at__lte=aged)
+    return Q(customer__is_paid=False, created_at__gt=aged)
+
+
+def queue_position(ticket_id, created_at, is_paid, now=None):
+    """
+    Position of a waiting ticket within its tier, counting the older waiting
+    tickets that `tier_for` puts in the same tier.
+    """
+    now = now or timezone.now()
+    same_tier = tier_filter(ticket_tier(created_at, is_paid, now), now)
+    return (
+        Ticket.objects.filter(
+            same_tier, status=Status.WAITING, created_at__lt=created_at
+        )
+        .exclude(ticket_id=ticket_id)
+        .count()
+        + 1
+    )
+
+
+def tier_share(tier, now=None):
+    """
+    Share of all assignments that waiting `tier` gets: its weight over the
+    weights of the tiers with waiting tickets.
+    """
+    now = now or timezone.now()
+    weights = {
+        other: weight
+        for other, weight in QUEUE_TIER_WEIGHTS.items()
+        if other == tier
+        or Ticket.objects.filter(
+            tier_filter(other, now), status=Status.WAITING
+        ).exists()
+    }
+    return weights[tier] / sum(weights.values())
+
+
+class TierScheduler:
+    """
+    Weighted fair queuing between tiers. Each tier has a virtual time that
+    advances by 1 / weight whenever it is served, and the waiting tier with
+    the smallest virtual time goes next. A tier that was empty restarts at
+    the current virtual time, so it cannot bank turns while idle.
+
+    Virtual times are kept as integers in units of 1 / lcm(weights), so
+    ties stay exact however long the scheduler runs.
+    """
+
+    def __init__(self, weights=None, state=None):
+        self.weights = weights or QUEUE_TIER_WEIGHTS
+        self.scale = math.lcm(*self.weights.values())
+        if not state or state.get("weights") != self.weights:
+            # virtual times are meaningless under other weights
+            state = {}
+        self.clock = state.get("clock", 0)
+        self.passes = dict(state.get("passes", {}))
+
+    def pick(self, ready):
+        for tier in ready:
+            self.passes[tier] = max(self.passes.get(tier, 0), self.clock)
+        tier = min(ready, key=lambda tier: (self.passes[tier], -self.weights[tier]))
+        self.clock = self.passes[tier]
+        self.passes[tier] += self.scale // self.weights[tier]
+        return tier
+
+    def state(self):
+        return {"weights": self.weights, "clock": self.clock, "passes": self.passes}
+
+
+def schedule_run():
+    """
+    Ask for a queue run. Returns False when one is already pending.
+    """
+    if not cache.add(PENDING_KEY, 1, timeout=QUEUE_PENDING_TIMEOUT):
+        return False
+
+    from core.tasks import process_ticket_queue
+
+    try:
+        process_ticket_queue.apply_async(countdown=QUEUE_DEBOUNCE_SECONDS)
+    except Exception as e:
+        # the per-minute beat run still picks the ticket up
+        cache.delete(PENDING_KEY)
+        logger.warning(f"Could not schedule ticket queue run: {e}")
+        return False
+    return True
+
+
+def run_exclusively():
+    """
+    Assign waiting tickets unless another run is in progress, in which case
+    a new run is scheduled for after it. Returns the number of tickets
+    assigned, or None when the run was deferred.
+    """
+    if not cache.add(RUN_LOCK_KEY, 1, timeout=QUEUE_RUN_LOCK_SECONDS):
+        cache.delete(PENDING_KEY)
+        schedule_run()
+        return None
+    try:
+        # enqueues from now on need a run after this one
+        cache.delete(PENDING_KEY)
+        return assign_waiting_tickets()
+    finally:
+        cache.delete(RUN_LOCK_KEY)
+
+
+def assign_waiting_tickets():
+    now = timezone.now()
+    assigned = 0
+    waits = {}
+    # the buffer exits first, so its events are written in this transaction
+    with transaction.atomic(), ticket_log.buffered():
+        waiting_tickets = (
+            Ticket.objects.select_for_update(of=("self",))
+            .select_related("customer")
+            .filter(status=Status.WAITING)
+            .order_by("created_at")
+        )
+        queues = {tier: deque() for tier in QueueTier.values}
+        for ticket in waiting_tickets:
+            waited = (now - ticket.created_at).total_seconds()
+            queues[tier_for(ticket.customer.is_paid, waited)].append(ticket)
+
+        # runs are single-flight, so the shared scheduler state is not raced
+        scheduler = TierScheduler(state=cache.get(SCHEDULER_KEY))
+        while ready := [tier for tier, queue in queues.items() if queue]:
+            agent = (
+                Agent.objects.select_for_update()
+                .filter(is_available=True, max_customers__gt=0)
+                .first()
+            )
+
+            if not agent:
+                logger.info(
+                    f"No available agents for ticket {queues[ready[0]][0].ticket_id}"
+                )
+                break
+
+            tier = scheduler.pick(ready)
+            ticket = queues[tier].popleft()
+            ticket.agent = agent
+            ticket.status = Status.ASSIGNED
+            ticket.save()
+
+            agent.current_customers += 1
+            agent.max_customers -= (
+                1  # Todo: remove this from every logic: because it should be constant
+            )
+            agent.save()
+            assigned += 1
+            customer_tier = (
+                QueueTier.PAID if ticket.customer.is_paid else QueueTier.FREE
+            )
+            waits.setdefault(customer_tier, []).append(
+                (now - (ticket.queued_at or ticket.created_at)).total_seconds()
+            )
+
+            logger.info(
+                f"Ticket {ticket.ticket_id} ({tier}) assigned to {agent.user.username}"
+            )
+        cache.set(SCHEDULER_KEY, scheduler.state(), timeout=None)
+    record_waits(waits)
+    return assigned
+
+
+def record_waits(waits):
+    """
+    Add the queue waits of assigned tickets to the per-tier totals, keeping
+    the last QUEUE_WAIT_SAMPLES waits of each tier for the percentiles.
+    """
+    if not waits:
+        return
+    totals = cache.get(METRICS_KEY) or {}
+    for tier, seconds in waits.items():
+        stats = totals.setdefault(
+            tier, {"assigned": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        )
+        stats["assigned"] += len(seconds)
+        stats["total_wait_seconds"] += sum(seconds)
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], *seconds)
+        stats["samples"] = (stats.get("samples", []) + seconds)[-QUEUE_WAIT_SAMPLES:]
+    cache.set(METRICS_KEY, totals, timeout=None)
+
+
+def percentile(values, fraction):
+    """The `fraction` percentile of `values` by nearest rank, None if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def queue_metrics():
+    """
+    Per-tier queue depth and age of the oldest waiting ticket, plus the wait
+    of tickets assigned so far, keyed by the customer's tier. Waits run from
+    when the ticket was queued; p50 and p99 cover the recent assignments.
+    """
+    now = timezone.now()
+    paid = Q(customer__is_paid=True)
+    queued = Coalesce("queued_at", "created_at")
+    row = Ticket.objects.filter(status=Status.WAITING).aggregate(
+        paid_depth=Count("id", filter=paid),
+        free_depth=Count("id", filter=~paid),
+        paid_oldest=Min(queued, filter=paid),
+        free_oldest=Min(queued, filter=~paid),
+    )
+    totals = cache.get(METRICS_KEY) or {}
+    metrics = {}
+    for tier in QueueTier.values:
+        oldest = row[f"{tier}_oldest"]
+        stats = totals.get(tier, {})
+        assigned = stats.get("assigned", 0)
+        samples = stats.get("samples", [])
+        metrics[tier] = {
+            "depth": row[f"{tier}_depth"],
+            "oldest_wait_seconds": (now - oldest).total_seconds() if oldest else 0,
+            "assigned": assigned,
+            "avg_wait_seconds": (
+                stats["total_wait_seconds"] / assigned if assigned else None
+            ),
+            "p50_wait_seconds": percentile(samples, 0.5),
+            "p99_wait_seconds": percentile(samples, 0.99),
+            "max_wait_seconds": stats.get("max_wait_seconds"),
+        }
+    return metrics
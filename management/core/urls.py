@@ -1,13 +1,25 @@
 from django.urls import path
 
-from core.api import payments, viewset
+from core.api import billing, payments, search, viewset
 
 urlpatterns = [
     path("customer/<int:pk>/detail/", viewset.customer_detail, name="customer_detail"),
     path("agent/<int:pk>/detail/", viewset.agent_detail, name="agent_detail"),
+    path(
+        "customers/details/",
+        viewset.customer_bulk_detail,
+        name="customer_bulk_detail",
+    ),
+    path("agents/details/", viewset.agent_bulk_detail, name="agent_bulk_detail"),
     path("ticket/create/", viewset.ticket_create, name="ticket_create"),
     path("ticket/<str:id>/assign", viewset.ticket_assign, name="ticket_assign"),
+    path("ticket/<str:id>/status", viewset.ticket_status, name="ticket_status"),
+    path("queue/metrics/", viewset.queue_metrics_view, name="queue_metrics"),
     path("ticket/<str:id>/reopen", viewset.ticket_reopen, name="ticket_reopen"),
     path("api/stripe/webhooks/", payments.stripe_payment_event, name="stripe_event"),
     path("stripe/payments/intents/", payments.stripe_payment, name="stripe_payment"),
+    path("stripe/metrics/", payments.stripe_metrics, name="stripe_metrics"),
+    path("search/", search.search_view, name="search"),
+    path("payments/summary/", billing.billing_summary, name="billing_summary"),
+    path("payments/history/", billing.payment_history, name="payment_history"),
 ]
@@ -1,7 +1,13 @@
-from django.shortcuts import render
+import logging
+
 from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from django.shortcuts import render
 from rest_framework.response import Response
 
+logger = logging.getLogger(__name__)
+
 
 def index(request):
     unauthorized_access = (
@@ -16,6 +22,30 @@ def index(request):
     return render(request, "login.html", context)
 
 
+def health(request):
+    """
+    Liveness check for load balancers and the connection pool: runs a
+    trivial query and a cache round trip, 503 if either fails.
+    """
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        checks["database"] = "ok"
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}")
+        checks["database"] = "error"
+    try:
+        cache.set("health_check", 1, timeout=10)
+        checks["cache"] = "ok" if cache.get("health_check") == 1 else "error"
+    except Exception as e:
+        logger.error(f"Cache health check failed: {e}")
+        checks["cache"] = "error"
+
+    healthy = all(value == "ok" for value in checks.values())
+    return JsonResponse(checks, status=200 if healthy else 503)
+
+
 # from rest_framework.decorators import api_view
 
 
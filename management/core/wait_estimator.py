@@ -0,0 +1,172 @@
+"""
+Queue wait-time estimates from the rate at which tickets get assigned.
+
+Each department keeps an exponentially decayed count of assignments. On
+every assignment the count is decayed to the current time and incremented,
+so it is updated in O(1) and never recomputed from history. Divided by the
+decay constant it is the recent assignment rate, and a queued ticket's
+expected wait is its position in its tier over that tier's part of the
+rate of all departments together. That overall rate is kept as one more
+counter, and a tier's part is its weighted fair queuing share among the
+tiers that are waiting.
+
+The same projection for the back of the queue drives the SLA check, which
+logs an alert when queued tickets are expected to wait longer than
+QUEUE_SLA_SECONDS, i.e. when more agents are needed.
+
+Counters live in the cache. Concurrent assignments may occasionally lose
+an increment, which only makes the estimate slightly pessimistic.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+import math
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.constants import Status, StatusCode
+from core.dumps import ETA_RATE_DECAY_SECONDS, QUEUE_SLA_SECONDS
+from core.models import Agent, Department, Ticket, TicketEvent
+from core.ticket_queue import tier_share
+
+logger = logging.getLogger(__name__)
+
+ALL = "all"
+# past this the decayed count is negligible
+RATE_TIMEOUT = ETA_RATE_DECAY_SECONDS * 10
+
+
+def rate_key(department_id):
+    return f"eta:rate:{department_id}"
+
+
+def _decayed(stats, now):
+    if not stats:
+        return 0.0
+    return stats["count"] * math.exp(-(now - stats["at"]) / ETA_RATE_DECAY_SECONDS)
+
+
+def _counted(stats, now):
+    return {"count": _decayed(stats, now) + 1, "at": now}
+
+
+def record_assignment(department_id):
+    """Count one assignment by an agent of `department_id`."""
+    now = time.time()
+    keys = [rate_key(department_id), rate_key(ALL)]
+    stats = cache.get_many(keys)
+    cache.set_many(
+        {key: _counted(stats.get(key), now) for key in keys},
+        timeout=RATE_TIMEOUT,
+    )
+
+
+def record_assignment_on_commit(ticket):
+    """Count the assignment of `ticket` once the transaction commits."""
+    if Ticket.agent.is_cached(ticket) and ticket.agent is not None:
+        department_id = ticket.agent.department_id
+        transaction.on_commit(lambda: record_assignment(department_id))
+        return
+
+    agent_id = ticket.agent_id
+
+    def _record():
+        department_id = (
+            Agent.objects.filter(pk=agent_id)
+            .values_list("department_id", flat=True)
+            .first()
+        )
+        if department_id is not None:
+            record_assignment(department_id)
+
+    transaction.on_commit(_record)
+
+
+def service_rate(department_id=ALL):
+    """Recent assignments per second of a department, or of all of them."""
+    now = time.time()
+    return _decayed(cache.get(rate_key(department_id)), now) / ETA_RATE_DECAY_SECONDS
+
+
+def estimate_wait(queue_position, tier=None):
+    """
+    Expected seconds until the ticket at `queue_position` of `tier` is
+    assigned, or None while there is no recent assignment to estimate from.
+    Without a tier the position is taken as one in the whole queue.
+    """
+    rate = service_rate()
+    if not queue_position or rate <= 0:
+        return None
+    if tier is not None:
+        rate *= tier_share(tier)
+    return round(queue_position / rate)
+
+
+def seed_from_history():
+    """
+    Rebuild the counters from the assignments in the ticket event log when
+    the cache has none. Only the last few decay periods matter.
+    """
+    since = timezone.now() - timedelta(seconds=ETA_RATE_DECAY_SECONDS * 5)
+    changes = (
+        TicketEvent.objects.filter(
+            status=StatusCode.ASSIGNED,
+            agent__isnull=False,
+            created_at__gte=since,
+        )
+        .order_by("created_at")
+        .values_list("agent__department_id", "created_at")
+    )
+    counters = {}
+    for department_id, created_at in changes.iterator():
+        at = created_at.timestamp()
+        for key in (rate_key(department_id), rate_key(ALL)):
+            counters[key] = _counted(counters.get(key), at)
+    cache.set_many(counters, timeout=RATE_TIMEOUT)
+    return len(counters)
+
+
+def check_sla():
+    """
+    Project the wait of the last queued ticket and log an alert when it
+    exceeds QUEUE_SLA_SECONDS. Returns the projection with the assignments
+    per minute of each department.
+    """
+    if cache.get(rate_key(ALL)) is None:
+        seed_from_history()
+    depth = Ticket.objects.filter(status=Status.WAITING).count()
+    rate = service_rate()
+    if depth == 0:
+        projected = 0
+    elif rate <= 0:
+        projected = None  # tickets are waiting and nothing is being assigned
+    else:
+        projected = round(depth / rate)
+
+    breached = depth > 0 and (projected is None or projected > QUEUE_SLA_SECONDS)
+    if breached:
+        logger.warning(
+            f"Queue SLA at risk: {depth} waiting tickets, projected wait "
+            f"{projected if projected is not None else 'unbounded'}s "
+            f"(SLA {QUEUE_SLA_SECONDS}s) at {rate * 60:.2f} assignments/min."
+        )
+    now = time.time()
+    department_ids = list(Department.objects.values_list("id", flat=True))
+    counters = cache.get_many([rate_key(pk) for pk in department_ids])
+    return {
+        "waiting": depth,
+        "assignments_per_minute": rate * 60,
+        "projected_wait_seconds": projected,
+        "sla_seconds": QUEUE_SLA_SECONDS,
+        "breached": breached,
+        "departments": {
+            pk: _decayed(counters.get(rate_key(pk)), now) / ETA_RATE_DECAY_SECONDS * 60
+            for pk in department_ids
+        },
+    }
@@ -0,0 +1,152 @@
+"""
+Stripe webhook inbox.
+
+`record_event` stores a verified event and is all the webhook view does on
+the request path. `process_pending_events` is the consumer: it applies
+stored events in batches, in the order Stripe created them, and marks each
+one processed so a redelivered or re-run event is never applied twice.
+
+Events of one payment intent are applied in order: when an event fails, the
+later events of the same intent are held back until it succeeds or is given
+up on.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.constants import WebhookStatus
+from core.dumps import STRIPE_EVENT_BATCH_SIZE, STRIPE_EVENT_MAX_ATTEMPTS
+from core.models import BillingSummary, PaymentDetails, StripeEvent, User
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_LOCK_KEY = "stripe_events:consumer"
+CONSUMER_LOCK_SECONDS = 10 * 60
+
+
+def record_event(payload):
+    """
+    Store a verified Stripe event (the decoded webhook body). Returns
+    (event, created); `created` is False for a redelivery.
+    """
+    obj = payload["data"]["object"]
+    if payload["type"].startswith("payment_intent."):
+        intent_id = obj.get("id")
+    else:
+        intent_id = obj.get("payment_intent")
+    return StripeEvent.objects.get_or_create(
+        event_id=payload["id"],
+        defaults={
+            "event_type": payload["type"],
+            "payment_intent_id": intent_id or "",
+            "payload": payload,
+            "created": datetime.fromtimestamp(payload["created"], tz=dt_timezone.utc),
+        },
+    )
+
+
+def payment_intent_succeeded(obj):
+    user = User.objects.get(id=obj.get("metadata", {}).get("user_id"))
+    was_verified = PaymentDetails.objects.filter(
+        stripe_payment_intent_id=obj["id"], payment_verified=True
+    ).exists()
+    payment, _ = PaymentDetails.objects.update_or_create(
+        stripe_payment_intent_id=obj["id"],
+        defaults={
+            "user": user,
+            "amount": Decimal(obj["amount"]) / 100,
+            "payment_verified": True,
+        },
+    )
+    if not was_verified:
+        BillingSummary.record_payment(payment)
+    logger.info("Payment Success")
+
+
+def payment_intent_failed(obj):
+    # TODO: some db logic can be perform btw: Unbound error
+    logger.warning("Payment Failed")
+
+
+EVENT_HANDLERS = {
+    "payment_intent.succeeded": payment_intent_succeeded,
+    "payment_intent.payment_failed": payment_intent_failed,
+}
+
+
+def apply_event(event):
+    handler = EVENT_HANDLERS.get(event.event_type)
+    if handler:
+        handler(event.payload["data"]["object"])
+
+
+def process_batch(batch_size=STRIPE_EVENT_BATCH_SIZE):
+    """
+    Apply one batch of pending events. Returns the number of events that
+    reached a final state; failed and held back events stay pending.
+    """
+    with transaction.atomic():
+        events = list(
+            StripeEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookStatus.PENDING)
+            .order_by("created", "id")[:batch_size]
+        )
+        held = set()
+        done = 0
+        now = timezone.now()
+        for event in events:
+            intent = event.payment_intent_id
+            if intent and intent in held:
+                continue
+            try:
+                with transaction.atomic():
+                    apply_event(event)
+            except Exception as e:
+                event.attempts += 1
+                event.error = f"{type(e).__name__}: {e}"
+                if event.attempts >= STRIPE_EVENT_MAX_ATTEMPTS:
+                    event.status = WebhookStatus.FAILED
+                    done += 1
+                    logger.error(f"Giving up on Stripe event {event.event_id}: {e}")
+                elif intent:
+                    held.add(intent)
+                continue
+            event.status = WebhookStatus.PROCESSED
+            event.processed_at = now
+            event.error = ""
+            done += 1
+
+        StripeEvent.objects.bulk_update(
+            events, ["status", "attempts", "error", "processed_at"]
+        )
+    return done
+
+
+def process_pending_events(batch_size=STRIPE_EVENT_BATCH_SIZE):
+    """
+    Drain the inbox batch by batch. Only one consumer runs at a time, which
+    keeps events of the same payment intent in order. Returns the number of
+    events handled, or None if another consumer is already running.
+    """
+    if not cache.add(CONSUMER_LOCK_KEY, 1, timeout=CONSUMER_LOCK_SECONDS):
+        return None
+    handled = 0
+    try:
+        while True:
+            done = process_batch(batch_size)
+            handled += done
+            # a short batch means the inbox is drained; failed events wait
+            # for the next run instead of being retried in a tight loop
+            if done < batch_size:
+                break
+    finally:
+        cache.delete(CONSUMER_LOCK_KEY)
+    return handled
@@ -0,0 +1,162 @@
+"""
+Read-replica routing.
+
+Inside a GET or HEAD request, reads go to a randomly chosen healthy replica
+from `settings.DATABASE_REPLICAS`; writes always go to the primary. The
+primary is used for reads whenever a replica could return stale data:
+
+* in requests with any other method, which read in order to write, and in
+  views marked with `primary_reads`;
+* inside a transaction on the primary;
+* for the rest of a request once it has written anything;
+* for REPLICA_STICKY_SECONDS after a client wrote, so a client always reads
+  its own writes. The client is recognised by its Authorization header or
+  session cookie, and by a short-lived cookie for anonymous clients;
+* when every replica lags more than REPLICA_MAX_LAG_SECONDS or is down.
+
+Outside requests (Celery tasks, management commands) everything stays on
+the primary.
+
+Copyright (c) Supportix. All rights reserved.
+Written in 2025 by Dorna Raj Gyawali <dronarajgyawali@gmail.com>
+"""
+
+import hashlib
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.dumps import (
+    REPLICA_LAG_CHECK_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_STICKY_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_pinned"
+REPLICA_METHODS = ("GET", "HEAD")
+
+# Routing state of the current request: {"pinned": bool, "wrote": bool}.
+_request_state = ContextVar("replica_routing", default=None)
+
+# alias -> (checked_at, lag in seconds or None when unreachable)
+_replica_lag = {}
+
+LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_lag(alias):
+    """
+    Replication lag of `alias` in seconds, None if it cannot be reached.
+    Measured at most once every REPLICA_LAG_CHECK_SECONDS per process.
+    """
+    checked_at, lag = _replica_lag.get(alias, (0, None))
+    if time.monotonic() - checked_at < REPLICA_LAG_CHECK_SECONDS:
+        return lag
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            lag = float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning(f"Replica {alias} is unavailable: {e}")
+        lag = None
+    _replica_lag[alias] = (time.monotonic(), lag)
+    return lag
+
+
+def healthy_replicas():
+    return [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if (lag := replica_lag(alias)) is not None and lag <= REPLICA_MAX_LAG_SECONDS
+    ]
+
+
+def primary_reads(view):
+    """Mark a view that writes what it reads, so it never reads a replica."""
+    view.primary_reads = True
+    return view
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state["pinned"] or not settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["pinned"] = state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Opens the routing state for a request and remembers clients that wrote,
+    so their next requests read from the primary until replicas catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def client_key(request):
+        credential = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+            settings.SESSION_COOKIE_NAME
+        )
+        if not credential:
+            return None
+        return f"db:pinned:{hashlib.sha256(credential.encode()).hexdigest()}"
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.client_key(request)
+        pinned = (
+            request.method not in REPLICA_METHODS
+            or PIN_COOKIE in request.COOKIES
+            or bool(key and cache.get(key))
+        )
+        state = {"pinned": pinned, "wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state["wrote"]:
+            if key:
+                cache.set(key, 1, timeout=REPLICA_STICKY_SECONDS)
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=REPLICA_STICKY_SECONDS, httponly=True
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _request_state.get()
+        if state is not None and getattr(view_func, "primary_reads", False):
+            state["pinned"] = True
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 EXTERNAL_APPS = [
     "chat",
@@ -79,6 +80,7 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "main.db_router.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -129,9 +131,53 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        # ping a reused connection before handing it out
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# How database connections are reused, see "Database Connections" in README:
+#   persistent: every worker thread keeps its connection for DB_CONN_MAX_AGE.
+#   pgbouncer:  DB_HOST/DB_PORT point at PgBouncer in transaction pooling mode,
+#               which cannot keep server-side cursors open across queries.
+#   psycopg:    Django's psycopg3 pool, per process; needs `psycopg[pool]`.
+DB_POOL = os.getenv("DB_POOL", "persistent")
+if DB_POOL == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif DB_POOL == "psycopg":
+    from psycopg_pool import ConnectionPool
+
+    # the pool owns connection lifetime, Django must not close them
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_idle": 300,
+            "check": ConnectionPool.check_connection,
+        }
+    }
+
+
+# Read replicas: DB_REPLICA_HOSTS is a comma separated list of `host[:port]`
+# of streaming replicas of the primary. Reads inside requests are spread over
+# them by main.db_router.ReplicaRouter.
+DATABASE_REPLICAS = []
+for index, address in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(","))
+):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["main.db_router.ReplicaRouter"]
 
 # Redis configuration
 CACHES = {
@@ -148,6 +194,8 @@ CACHES = {
 # Stripe configuration
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+# Override the API host, e.g. to point at a local stripe-mock server.
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
 
 # Cloudinary configuration
 cloudinary.config(
@@ -159,6 +207,10 @@ cloudinary.config(
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
+# Attachment upload sessions: "cloudinary" or "local" (filesystem stand-in)
+CHAT_UPLOAD_STORAGE = os.getenv("CHAT_UPLOAD_STORAGE", "cloudinary")
+CHAT_UPLOAD_TEMP_DIR = os.getenv("CHAT_UPLOAD_TEMP_DIR", BASE_DIR / "uploads")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -213,6 +265,13 @@ CELERY_TIMEZONE = TIME_ZONE
 
 CELERY_BEAT_SCHEDULER = "celery.beat:PersistentScheduler"
 
+# Image processing is CPU heavy: it runs on its own queue so the number of
+# concurrent renders is bounded by that worker's concurrency, e.g.
+# `celery -A main worker -Q media -c 2`.
+CELERY_TASK_ROUTES = {
+    "chat.tasks.generate_image_derivatives": {"queue": "media"},
+}
+
 CELERY_BEAT_SCHEDULE = {
     "assign_tickets_every_minute": {
         "task": "core.tasks.process_ticket_queue",
@@ -226,4 +285,28 @@ CELERY_BEAT_SCHEDULE = {
         "task": "core.tasks.apply_rules_to_all_tickets",
         "schedule": crontab(hour=1, minute=0),
     },
+    "archive_old_chat_messages": {
+        "task": "chat.tasks.archive_old_messages",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "discard_expired_upload_sessions": {
+        "task": "chat.tasks.discard_expired_uploads",
+        "schedule": crontab(minute="*/30"),
+    },
+    "process_stripe_events": {
+        "task": "core.tasks.process_stripe_events",
+        "schedule": crontab(minute="*/1"),
+    },
+    "refresh_supported_currencies": {
+        "task": "core.tasks.refresh_currencies",
+        "schedule": crontab(minute=15),
+    },
+    "check_queue_sla": {
+        "task": "core.tasks.check_queue_sla",
+        "schedule": crontab(minute="*/5"),
+    },
+    "refresh_ticket_state": {
+        "task": "core.tasks.refresh_ticket_state",
+        "schedule": crontab(minute="*/5"),
+    },
 }
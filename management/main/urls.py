@@ -20,7 +20,7 @@ from django.urls import include, path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from core.api import viewset
-from core.views import index
+from core.views import health, index
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -30,5 +30,6 @@ urlpatterns = [
     path("api/login/", TokenObtainPairView.as_view(), name="token-obtain-pair"),
     path("api/logout/", viewset.logout, name="logout"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token-refresh-pair"),
+    path("health/", health, name="health"),
     path("", index),
 ]